@@ -0,0 +1,78 @@
+"""Measure the time needed to import Concrete ML modules.
+
+Each import is done in a fresh Python process, so that modules cached by previous imports do not
+impact the measurements. The heavy optional dependencies loaded by each import are also reported,
+since they are the main contributors to the import time.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "concrete.fhe",
+    "concrete.ml.deployment",
+    "concrete.ml.sklearn",
+    "concrete.ml.quantization",
+    "concrete.ml.torch.compile",
+]
+
+HEAVY_DEPENDENCIES = ["torch", "brevitas", "skorch", "hummingbird", "xgboost", "sklearn"]
+
+MEASURE_SCRIPT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+
+heavy_dependencies = [name for name in {heavy_dependencies} if name in sys.modules]
+print(json.dumps({{"duration": duration, "heavy_dependencies": heavy_dependencies}}))
+"""
+
+
+def measure_import(module: str, repeat: int):
+    """Measure the time needed to import a module in a fresh process.
+
+    Args:
+        module (str): The module to import.
+        repeat (int): The number of measurements.
+
+    Returns:
+        Tuple[float, List[str]]: The median import time, in seconds, and the heavy dependencies
+            loaded by the import.
+    """
+    script = MEASURE_SCRIPT.format(module=module, heavy_dependencies=HEAVY_DEPENDENCIES)
+
+    durations = []
+    heavy_dependencies = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", script], check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        durations.append(result["duration"])
+        heavy_dependencies = result["heavy_dependencies"]
+
+    return statistics.median(durations), heavy_dependencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--modules", nargs="+", default=DEFAULT_MODULES, help="the modules to import"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="the number of measurements")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        duration, heavy_dependencies = measure_import(module, args.repeat)
+        print(f"{module:<30} {duration:6.2f}s  loads: {', '.join(heavy_dependencies) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
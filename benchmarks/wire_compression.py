@@ -0,0 +1,110 @@
+"""Measure the compression ratio and CPU cost of compressing keys and ciphertexts.
+
+For each available codec, the serialized evaluation keys and encrypted inputs of a model are
+compressed and decompressed, reporting the compression ratio and the time spent. These are
+compared to the sizes obtained when compiling the model with Concrete's `compress_evaluation_keys`
+and `compress_input_ciphertexts` options, which reduce the size of the keys and ciphertexts before
+they are serialized.
+"""
+
+import argparse
+import time
+
+import numpy
+from concrete.fhe import Configuration
+
+from concrete.ml.deployment.compression import available_compressions, compress, decompress
+from concrete.ml.sklearn import DecisionTreeClassifier
+
+
+def get_payloads(n_bits: int, max_depth: int, concrete_compression: bool):
+    """Compile a model, then generate its serialized evaluation keys and an encrypted input.
+
+    Args:
+        n_bits (int): The number of bits used to quantize the model.
+        max_depth (int): The maximum depth of the decision tree.
+        concrete_compression (bool): Whether to use Concrete's key and ciphertext compression.
+
+    Returns:
+        Dict[str, bytes]: The serialized evaluation keys and encrypted input.
+    """
+    x_train = numpy.random.rand(100, 10)
+    y_train = (x_train.sum(axis=1) > 5).astype(numpy.int64)
+
+    model = DecisionTreeClassifier(n_bits=n_bits, max_depth=max_depth).fit(x_train, y_train)
+    configuration = Configuration(
+        compress_evaluation_keys=concrete_compression,
+        compress_input_ciphertexts=concrete_compression,
+    )
+    circuit = model.compile(x_train, configuration=configuration)
+    circuit.keygen()
+
+    quantized_input = model.quantize_input(x_train[:1])
+    return {
+        "evaluation keys": circuit.client.evaluation_keys.serialize(),
+        "ciphertext": circuit.encrypt(quantized_input).serialize(),
+    }
+
+
+def measure(data: bytes, compression: str, level, repeat: int):
+    """Measure the compression ratio and the time spent compressing and decompressing data.
+
+    Args:
+        data (bytes): The data to compress.
+        compression (str): The codec to use.
+        level (Optional[int]): The compression level.
+        repeat (int): The number of measurements.
+
+    Returns:
+        Tuple[float, float, float]: The compression ratio and the median compression and
+            decompression times, in seconds.
+    """
+    compression_times = []
+    decompression_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+
+        # Force the compression, even if the data is not worth compressing
+        compressed_data = compress(data, compression, level=level, min_ratio=0)
+        compression_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        decompress(compressed_data)
+        decompression_times.append(time.perf_counter() - start)
+
+    return (
+        len(data) / len(compressed_data),
+        float(numpy.median(compression_times)),
+        float(numpy.median(decompression_times)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-bits", type=int, default=6, help="the number of bits of the model")
+    parser.add_argument("--max-depth", type=int, default=4, help="the depth of the model")
+    parser.add_argument("--levels", nargs="+", type=int, default=[1, 3], help="the levels to use")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of measurements")
+    args = parser.parse_args()
+
+    for concrete_compression in [False, True]:
+        payloads = get_payloads(args.n_bits, args.max_depth, concrete_compression)
+
+        print(f"Concrete compression: {'enabled' if concrete_compression else 'disabled'}")
+        for name, data in payloads.items():
+            print(f"  {name}: {len(data) / 10**6:.3f} MB")
+
+            for compression in available_compressions():
+                for level in args.levels:
+                    ratio, compression_time, decompression_time = measure(
+                        data, compression, level, args.repeat
+                    )
+                    print(
+                        f"    {compression:<5} level {level:<2} ratio {ratio:6.3f}  "
+                        f"compression {compression_time:7.3f}s  "
+                        f"decompression {decompression_time:7.3f}s"
+                    )
+
+
+if __name__ == "__main__":
+    main()
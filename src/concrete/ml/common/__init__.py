@@ -1,3 +1,3 @@
 """Module for shared data structures and code."""
 
-from . import check_inputs, debugging, utils
+from . import check_inputs, compilation_cache, debugging, utils
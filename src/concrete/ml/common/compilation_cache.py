@@ -0,0 +1,308 @@
+"""Persistent on-disk cache of compiled circuits.
+
+Compiling a circuit runs the Concrete optimizer and generates native code, which is by far the
+most expensive part of a `compile` call. This cache stores the resulting execution servers on disk,
+indexed by a hash of the circuit's MLIR, compilation configuration and library versions, so that
+compiling the same model again, for instance in a new process, re-uses them.
+
+The cache is disabled by default. It is enabled by setting the `CONCRETE_ML_COMPILATION_CACHE`
+environment variable to the directory to use. Its size is bounded by the
+`CONCRETE_ML_COMPILATION_CACHE_MAX_SIZE` environment variable, in bytes, least recently used
+entries being evicted first.
+"""
+
+import hashlib
+import os
+import tempfile
+import warnings
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import concrete.fhe
+from concrete.fhe import Server
+from concrete.fhe.compilation import Circuit, Compiler, Configuration
+from concrete.fhe.compilation.client import Client
+from concrete.fhe.compilation.specs import ClientSpecs
+
+from ..common.debugging import assert_true
+from ..version import __version__ as CML_VERSION
+
+# Environment variable giving the directory of the compilation cache. The cache is disabled if it
+# is not set
+COMPILATION_CACHE_ENV_VARIABLE = "CONCRETE_ML_COMPILATION_CACHE"
+
+# Environment variable giving the maximum size of the compilation cache, in bytes
+COMPILATION_CACHE_MAX_SIZE_ENV_VARIABLE = "CONCRETE_ML_COMPILATION_CACHE_MAX_SIZE"
+
+# Default maximum size of the compilation cache, in bytes
+DEFAULT_COMPILATION_CACHE_MAX_SIZE = 2**30
+
+
+class CompilationCache:
+    """On-disk cache of compiled Concrete servers, with a size-based eviction.
+
+    Args:
+        location (Union[str, Path]): The directory in which the compiled servers are stored.
+        max_size (int): The maximum size of the cache, in bytes. Once reached, the least recently
+            used entries are removed. Default to 1 GiB.
+    """
+
+    def __init__(
+        self, location: Union[str, Path], max_size: int = DEFAULT_COMPILATION_CACHE_MAX_SIZE
+    ):
+        assert_true(
+            isinstance(max_size, int) and max_size > 0,
+            f"The maximum size of the compilation cache must be a strictly positive integer. Got "
+            f"{max_size}",
+            ValueError,
+        )
+
+        self.location = Path(location)
+        self.max_size = max_size
+
+        self.location.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def get_key(circuit: Circuit) -> str:
+        """Compute the key of a circuit's server.
+
+        The MLIR of a circuit entirely determines the compiled server for a given configuration,
+        as it contains the quantized graph, the constants and the bit-widths found using the
+        input-set. The key is thus a hash of this MLIR, of the configuration (which includes the
+        probabilities of error) and of the Concrete and Concrete ML versions.
+
+        Args:
+            circuit (Circuit): The circuit, whose MLIR has been generated.
+
+        Returns:
+            str: The key of the circuit's server.
+        """
+        # Options that only control what is printed during compilation are not relevant
+        configuration_items = sorted(
+            (name, repr(value))
+            for name, value in vars(circuit.configuration).items()
+            if not name.startswith("show_")
+            and name not in {"verbose", "fhe_simulation", "fhe_execution"}
+        )
+
+        hasher = hashlib.sha256()
+        for content in (
+            concrete.fhe.__version__,
+            CML_VERSION,
+            repr(configuration_items),
+            circuit.mlir,
+        ):
+            hasher.update(content.encode("utf-8"))
+            hasher.update(b"\0")
+
+        return hasher.hexdigest()
+
+    def _get_path(self, key: str) -> Path:
+        return self.location / f"{key}.zip"
+
+    def load(self, key: str) -> Optional[Server]:
+        """Load a compiled server from the cache.
+
+        Args:
+            key (str): The key of the server.
+
+        Returns:
+            Optional[Server]: The server if it is in the cache, None otherwise.
+        """
+        path = self._get_path(key)
+
+        if not path.is_file():
+            return None
+
+        try:
+            server = Server.load(path)
+
+        # An entry that can't be loaded, for instance because it was truncated, is removed and
+        # the server is compiled again
+        except Exception:  # pylint: disable=broad-exception-caught
+            path.unlink(missing_ok=True)
+            return None
+
+        # Restoring the loaded server relies on private attributes of Concrete's servers, so the
+        # server is compiled again if they changed, instead of failing or giving a broken server
+        if not _has_server_internals(server):
+            warnings.warn(
+                "The compilation cache can't restore compiled servers with this version of "
+                "Concrete, the circuit is compiled instead.",
+                category=UserWarning,
+                stacklevel=2,
+            )
+            return None
+
+        # Concrete's deserialized client specs give wrong statistics, so they are rebuilt from the
+        # loaded compilation result, as Concrete does when compiling the server
+        # pylint: disable-next=protected-access
+        server.client_specs = ClientSpecs(
+            server._support.load_client_parameters(server._compilation_result)
+        )
+
+        # Mark the entry as recently used
+        os.utime(path)
+
+        return server
+
+    def store(self, key: str, server: Server):
+        """Store a compiled server in the cache and evict entries if the cache is full.
+
+        Args:
+            key (str): The key of the server.
+            server (Server): The server to store.
+        """
+        # Write the entry to a temporary file first, so that concurrent processes never read
+        # incomplete entries
+        with tempfile.TemporaryDirectory(dir=self.location) as temporary_directory:
+            temporary_path = Path(temporary_directory) / "server.zip"
+            server.save(temporary_path)
+            os.replace(temporary_path, self._get_path(key))
+
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in its maximum size."""
+        entries = []
+        for path in self.location.glob("*.zip"):
+            try:
+                stat = path.stat()
+
+            # The entry may have been removed by another process in the meantime
+            except FileNotFoundError:  # pragma: no cover
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        cache_size = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if cache_size <= self.max_size:
+                break
+
+            path.unlink(missing_ok=True)
+            cache_size -= size
+
+
+def get_compilation_cache() -> Optional[CompilationCache]:
+    """Get the compilation cache set through the environment, if any.
+
+    Returns:
+        Optional[CompilationCache]: The compilation cache if the `CONCRETE_ML_COMPILATION_CACHE`
+            environment variable is set, None otherwise.
+    """
+    location = os.environ.get(COMPILATION_CACHE_ENV_VARIABLE)
+
+    if not location:
+        return None
+
+    max_size = int(
+        os.environ.get(
+            COMPILATION_CACHE_MAX_SIZE_ENV_VARIABLE, str(DEFAULT_COMPILATION_CACHE_MAX_SIZE)
+        )
+    )
+
+    return CompilationCache(location, max_size)
+
+
+def _has_server_internals(server: Server) -> bool:
+    """Check that a server has the private attributes used to attach it to a circuit.
+
+    Args:
+        server (Server): The server.
+
+    Returns:
+        bool: Whether the server's compilation result, library support and MLIR can be accessed.
+    """
+    return (
+        hasattr(server, "_compilation_result")
+        and hasattr(server, "_mlir")
+        and hasattr(getattr(server, "_support", None), "load_client_parameters")
+    )
+
+
+def _set_circuit_server(circuit: Circuit, server: Server):
+    """Attach an already compiled server to a circuit.
+
+    Args:
+        circuit (Circuit): The circuit.
+        server (Server): The server to attach.
+    """
+    # Keep the MLIR and configuration of the server, as Concrete does when compiling it, so that it
+    # can still be saved using the `via_mlir` option
+    # pylint: disable-next=protected-access
+    server._mlir = circuit.mlir
+    # pylint: disable-next=protected-access
+    server._configuration = circuit.configuration
+
+    circuit.server = server
+
+    # Follow the key cache settings of the configuration, as Concrete does
+    keyset_cache_directory = None
+    if circuit.configuration.use_insecure_key_cache:
+        keyset_cache_directory = circuit.configuration.insecure_key_cache_location
+
+    circuit.client = Client(server.client_specs, keyset_cache_directory)
+
+
+def compile_with_cache(
+    compiler: Compiler,
+    inputset: Any,
+    configuration: Optional[Configuration] = None,
+    fhe_simulation: bool = False,
+    fhe_execution: bool = True,
+    **kwargs,
+) -> Circuit:
+    """Compile a function, re-using its compiled server from the compilation cache if possible.
+
+    If the compilation cache is disabled, if debugging artifacts are requested or if the circuit is
+    only compiled for simulation, this is the same as calling `compiler.compile`. Otherwise, the
+    function is traced and converted to MLIR, and the server is loaded from the cache or compiled
+    and then stored in the cache.
+
+    Simulation servers are not cached, as Concrete does not restore their statistics when they
+    are loaded from disk.
+
+    Args:
+        compiler (Compiler): The compiler of the function.
+        inputset (Any): The input-set to use for compiling.
+        configuration (Optional[Configuration]): Options to use for compilation. Default to None.
+        fhe_simulation (bool): Whether the circuit is compiled for simulation. Default to False.
+        fhe_execution (bool): Whether the circuit is compiled for execution. Default to True.
+        **kwargs: Other configuration options given to `compiler.compile`.
+
+    Returns:
+        Circuit: The compiled circuit.
+    """
+    compilation_cache = get_compilation_cache()
+
+    if compilation_cache is None or kwargs.get("artifacts") is not None or not fhe_execution:
+        return compiler.compile(
+            inputset,
+            configuration=configuration,
+            fhe_simulation=fhe_simulation,
+            fhe_execution=fhe_execution,
+            **kwargs,
+        )
+
+    # Only trace the function, generate the circuit's MLIR and, if needed, the simulation server
+    circuit = compiler.compile(
+        inputset,
+        configuration=configuration,
+        fhe_simulation=fhe_simulation,
+        fhe_execution=False,
+        **kwargs,
+    )
+    circuit.configuration = circuit.configuration.fork(fhe_execution=True)
+
+    key = compilation_cache.get_key(circuit)
+    server = compilation_cache.load(key)
+
+    if server is None:
+        circuit.enable_fhe_execution()
+        compilation_cache.store(key, circuit.server)
+    else:
+        _set_circuit_server(circuit, server)
+
+    return circuit
@@ -2,16 +2,15 @@
 
 import inspect
 import json
-from typing import Any, Dict, Type
+import warnings
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
 
 import numpy
 import onnx
 import torch
 from numpy.random import RandomState
-from skorch.dataset import ValidSplit
 
-from ...quantization.base_quantized_op import ALL_QUANTIZED_OPS
-from ...quantization.quantized_module import QuantizedModule
 from ...quantization.quantizers import (
     MinMaxQuantizationStats,
     QuantizationOptions,
@@ -19,7 +18,6 @@ from ...quantization.quantizers import (
     UniformQuantizationParameters,
     UniformQuantizer,
 )
-from ...sklearn import _get_sklearn_all_models
 from . import SUPPORTED_TORCH_ACTIVATIONS, USE_SKOPS
 
 # If USE_SKOPS is False or Skops can't be imported, default to pickle
@@ -49,55 +47,115 @@ _TRUSTED_TORCH_ACTIVATIONS = [
     _get_fully_qualified_name(activation_class) for activation_class in SUPPORTED_TORCH_ACTIVATIONS
 ]
 
-_TRUSTED_CONCRETE_MODELS = [
-    _get_fully_qualified_name(model_class) for model_class in _get_sklearn_all_models()
-]
 
-# Define all the trusted types that Skops should consider
-TRUSTED_SKOPS = (
-    _TRUSTED_TORCH_ACTIVATIONS
-    + _TRUSTED_CONCRETE_MODELS
-    + [_get_fully_qualified_name(QuantizedModule)]
-    + [
-        "numpy.int64",
-        "numpy.float64",
-        "numpy.int32",
-        "xgboost.core.Booster",
-        "xgboost.sklearn.XGBClassifier",
-        "xgboost.sklearn.XGBRegressor",
-        "sklearn._loss.glm_distribution.DistributionBoundary",
-        "sklearn._loss.glm_distribution.TweedieDistribution",
-        "sklearn._loss.glm_distribution.GammaDistribution",
-        "sklearn._loss.glm_distribution.PoissonDistribution",
-        "sklearn.linear_model._glm.link.LogLink",
-        "sklearn.linear_model._glm.link.IdentityLink",
-        "sklearn._loss.link.IdentityLink",
-        "sklearn._loss.link.Interval",
-        "sklearn._loss.link.LogLink",
-        "sklearn._loss.link.LogLink",
-        "sklearn._loss._loss.CyHalfTweedieLossIdentity",
-        "sklearn._loss.loss.HalfTweedieLossIdentity",
-        "sklearn._loss._loss.CyHalfPoissonLoss",
-        "sklearn._loss.loss.HalfPoissonLoss",
-        "sklearn._loss._loss.CyHalfGammaLoss",
-        "sklearn._loss.loss.HalfGammaLoss",
-        "sklearn._loss._loss.CyHalfTweedieLoss",
-        "sklearn._loss.loss.HalfTweedieLoss",
-        "torch.utils.data.dataloader.DataLoader",
-        "torch.utils.data.dataset.Dataset",
-        "skorch.dataset.Dataset",
-        "skorch.dataset.ValidSplit",
-        "inspect._empty",
-        "sklearn.neighbors._classification.KNeighborsClassifier",
-        "sklearn.metrics._dist_metrics.EuclideanDistance",
-        "sklearn.neighbors._kd_tree.KDTree",
+@lru_cache(maxsize=None)
+def _get_trusted_skops() -> List[str]:
+    """Get all the trusted types that Skops should consider.
+
+    Built-in models are not imported here, as some of them depend on libraries that are slow to
+    import (e.g., xgboost or skorch). Their fully qualified names are instead retrieved from the
+    modules that define them.
+
+    Returns:
+        List[str]: The fully qualified names of the trusted types.
+    """
+    # pylint: disable-next=import-outside-toplevel, cyclic-import
+    from ...sklearn import _MODELS_MODULES
+
+    trusted_concrete_models = [
+        f"concrete.ml.sklearn.{module_name}.{model_name}"
+        for model_name, module_name in _MODELS_MODULES.items()
     ]
-)
+
+    return (
+        _TRUSTED_TORCH_ACTIVATIONS
+        + trusted_concrete_models
+        + ["concrete.ml.quantization.quantized_module.QuantizedModule"]
+        + [
+            "numpy.int64",
+            "numpy.float64",
+            "numpy.int32",
+            "xgboost.core.Booster",
+            "xgboost.sklearn.XGBClassifier",
+            "xgboost.sklearn.XGBRegressor",
+            "sklearn._loss.glm_distribution.DistributionBoundary",
+            "sklearn._loss.glm_distribution.TweedieDistribution",
+            "sklearn._loss.glm_distribution.GammaDistribution",
+            "sklearn._loss.glm_distribution.PoissonDistribution",
+            "sklearn.linear_model._glm.link.LogLink",
+            "sklearn.linear_model._glm.link.IdentityLink",
+            "sklearn._loss.link.IdentityLink",
+            "sklearn._loss.link.Interval",
+            "sklearn._loss.link.LogLink",
+            "sklearn._loss.link.LogLink",
+            "sklearn._loss._loss.CyHalfTweedieLossIdentity",
+            "sklearn._loss.loss.HalfTweedieLossIdentity",
+            "sklearn._loss._loss.CyHalfPoissonLoss",
+            "sklearn._loss.loss.HalfPoissonLoss",
+            "sklearn._loss._loss.CyHalfGammaLoss",
+            "sklearn._loss.loss.HalfGammaLoss",
+            "sklearn._loss._loss.CyHalfTweedieLoss",
+            "sklearn._loss.loss.HalfTweedieLoss",
+            "torch.utils.data.dataloader.DataLoader",
+            "torch.utils.data.dataset.Dataset",
+            "skorch.dataset.Dataset",
+            "skorch.dataset.ValidSplit",
+            "inspect._empty",
+            "sklearn.neighbors._classification.KNeighborsClassifier",
+            "sklearn.metrics._dist_metrics.EuclideanDistance",
+            "sklearn.neighbors._kd_tree.KDTree",
+        ]
+    )
+
 
 # Initialize the list of all classes that can be serialized in Concrete ML (i.e., that have a
-# `dump_dict` and `load_dict` method)
+# `dump_dict` and `load_dict` method). Quantizers are available right away, as the client only
+# needs them, while the other classes are only imported when first needed
 # pylint: disable=invalid-name
-SERIALIZABLE_CLASSES: Dict[str, Type] = {}
+SERIALIZABLE_CLASSES: Dict[str, Type] = {
+    serializable_class.__name__: serializable_class
+    for serializable_class in [
+        QuantizedArray,
+        UniformQuantizer,
+        QuantizationOptions,
+        UniformQuantizationParameters,
+        MinMaxQuantizationStats,
+    ]
+}
+_ALL_SERIALIZABLE_CLASSES_ARE_LOADED = False
+
+
+def _get_serializable_class(type_name: str) -> Optional[Type]:
+    """Get a class that can be serialized in Concrete ML from its name.
+
+    Args:
+        type_name (str): The name of the class.
+
+    Returns:
+        Optional[Type]: The class, or None if no serializable class has this name.
+    """
+    # pylint: disable-next=global-statement
+    global _ALL_SERIALIZABLE_CLASSES_ARE_LOADED
+
+    if type_name not in SERIALIZABLE_CLASSES and not _ALL_SERIALIZABLE_CLASSES_ARE_LOADED:
+        # pylint: disable=import-outside-toplevel, cyclic-import
+        from ...quantization.base_quantized_op import ALL_QUANTIZED_OPS
+        from ...quantization.quantized_module import QuantizedModule
+        from ...sklearn import _get_sklearn_all_models
+
+        # pylint: enable=import-outside-toplevel, cyclic-import
+
+        serializable_classes = (
+            _get_sklearn_all_models() + list(ALL_QUANTIZED_OPS) + [QuantizedModule]
+        )
+
+        # Map these classes with their names
+        SERIALIZABLE_CLASSES.update(
+            {model_class.__name__: model_class for model_class in serializable_classes}
+        )
+        _ALL_SERIALIZABLE_CLASSES_ARE_LOADED = True
+
+    return SERIALIZABLE_CLASSES.get(type_name)
 
 
 # pylint: disable-next=too-many-return-statements, too-many-branches
@@ -137,7 +195,7 @@ def object_hook(d: Any) -> Any:
             # If Skops is available, indicate the trusted objects to the loader. An error is
             # thrown if an object of an unexpected type is encountered
             if USE_SKOPS:
-                loads_sklearn_kwargs["trusted"] = TRUSTED_SKOPS
+                loads_sklearn_kwargs["trusted"] = _get_trusted_skops()
 
             return pickle_or_skops_loads(bytes.fromhex(serialized_value), **loads_sklearn_kwargs)
 
@@ -172,41 +230,24 @@ def object_hook(d: Any) -> Any:
             return torch.device(serialized_value)
 
         if type_name == "valid_split":
+            # Skorch is only imported when needed, as it is slow to import. Its import warnings
+            # are silenced, as done when importing built-in models
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+
+                # pylint: disable-next=import-outside-toplevel
+                from skorch.dataset import ValidSplit
+
             return ValidSplit(**serialized_value)
 
         if type_name == "inspect_empty":
             # pylint: disable-next=protected-access
             return inspect._empty
 
-        # pylint: disable-next=global-statement
-        global SERIALIZABLE_CLASSES
-
-        # Define the list of all classes that can be serialized in Concrete ML (i.e., that have a
-        # `dump_dict` and `load_dict` method) if not already done
-        if not SERIALIZABLE_CLASSES:
-            serializable_classes = (
-                _get_sklearn_all_models()
-                + list(ALL_QUANTIZED_OPS)
-                + [
-                    QuantizedArray,
-                    QuantizedModule,
-                    UniformQuantizer,
-                    QuantizationOptions,
-                    UniformQuantizationParameters,
-                    MinMaxQuantizationStats,
-                ]
-            )
-
-            # Map these classes with their names
-            SERIALIZABLE_CLASSES = {
-                model_class.__name__: model_class for model_class in serializable_classes
-            }
-
         # If the value reaches this point and the initial object was properly serialized, we
         # expect it to be a class from Concrete ML that implements a `load_dict` method
-        if type_name in SERIALIZABLE_CLASSES:
-            serializable_class = SERIALIZABLE_CLASSES[type_name]
-
+        serializable_class = _get_serializable_class(type_name)
+        if serializable_class is not None:
             assert hasattr(serializable_class, "load_dict"), (
                 f"Class {type_name} does not support a 'load_dict' method and therefore "
                 "cannot be serialized."
@@ -2,6 +2,7 @@
 
 import inspect
 import json
+import sys
 from json.encoder import _make_iterencode  # type: ignore[attr-defined]
 from json.encoder import encode_basestring  # type: ignore[attr-defined]
 from json.encoder import encode_basestring_ascii  # type: ignore[attr-defined]
@@ -13,7 +14,6 @@ import onnx
 import sklearn
 import torch
 from numpy.random import RandomState
-from skorch.dataset import ValidSplit
 
 from concrete import fhe
 
@@ -248,7 +248,10 @@ class ConcreteEncoder(JSONEncoder):
         # provide any simple ways for serializing it. Since this such an instance is used by
         # default, ValidSplit instances are treated manually as well. However, this does not work
         # if the cross-validation strategy is set using a Generator object (see below)
-        if isinstance(o, ValidSplit):
+        # Skorch is not imported here as it is slow to import, and such an instance can only exist
+        # if the user already imported it
+        skorch_dataset = sys.modules.get("skorch.dataset")
+        if skorch_dataset is not None and isinstance(o, skorch_dataset.ValidSplit):
             if isinstance(o.cv, Generator):
                 raise NotImplementedError(
                     "Serializing a custom Generator object is not secure and is therefore "
@@ -1,15 +1,33 @@
 """Utils that can be re-used by other pieces of code in the module."""
 
 import enum
+import multiprocessing
+import os
 import string
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from functools import partial
+from pathlib import Path
 from types import FunctionType
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import numpy
 import onnx
 import torch
-from concrete.fhe import Exactness
+from concrete.fhe import EvaluationKeys, Exactness, Server, Value
+from concrete.fhe.compilation import Circuit
 from concrete.fhe.dtypes import Integer
 from sklearn.base import is_classifier, is_regressor
 
@@ -47,6 +65,10 @@ USE_OLD_VL = False
 # should be exact compared to their Concrete ML QuantizedModule
 QUANT_ROUND_LIKE_ROUND_PBS = False
 
+# State of the FHE execution worker processes, initialized once per process in order to avoid
+# loading the server and deserializing the evaluation keys for each executed row
+_FHE_EXECUTION_WORKER_STATE: Dict[str, Any] = {}
+
 
 class FheMode(str, enum.Enum):
     """Enum representing the execution mode.
@@ -349,6 +371,39 @@ def is_pandas_type(input_container: Any) -> bool:
     return is_pandas_dataframe(input_container) or is_pandas_series(input_container)
 
 
+def iter_data_chunks(X: Any, chunk_size: int) -> Generator[Any, None, None]:
+    """Split the input data in chunks of at most chunk_size examples.
+
+    Numpy arrays (including memory-mapped ones), Torch tensors, Pandas DataFrames and lists are
+    sliced, so that only a single chunk is loaded in memory at a time. Any other iterable, such as
+    a generator of DataFrames, is consumed one element at a time, each element being split further
+    if it has more than chunk_size examples.
+
+    Args:
+        X (Any): The input data to split, with the examples as its first dimension.
+        chunk_size (int): The maximum number of examples in a chunk.
+
+    Yields:
+        Any: The chunks of input data, of the same type as the given data or elements.
+    """
+    assert_true(
+        isinstance(chunk_size, int) and chunk_size > 0,
+        f"chunk_size must be a strictly positive integer. Got {chunk_size}",
+        ValueError,
+    )
+
+    if isinstance(X, (numpy.ndarray, torch.Tensor, list)) or is_pandas_type(X):
+        for start in range(0, len(X), chunk_size):
+            if is_pandas_type(X):
+                yield X.iloc[start : start + chunk_size]
+            else:
+                yield X[start : start + chunk_size]
+
+    else:
+        for X_element in X:
+            yield from iter_data_chunks(X_element, chunk_size)
+
+
 def _get_dtype(values: Any):
     """Get a set of values' dtype in a string format to facilitate operations between sets.
 
@@ -661,3 +716,202 @@ def process_rounding_threshold_bits(rounding_threshold_bits):
         rounding_threshold_bits = {"n_bits": n_bits_rounding, "method": method}
 
     return rounding_threshold_bits
+
+
+def get_n_jobs(n_jobs: Optional[int]) -> int:
+    """Get the number of workers to use from a joblib-like `n_jobs` value.
+
+    As in scikit-learn, None means 1 and negative values are counted backward from the number of
+    available CPUs, so that -1 means all CPUs, -2 all CPUs but one and so on.
+
+    Args:
+        n_jobs (Optional[int]): The number of jobs to consider.
+
+    Returns:
+        int: The number of workers to use, which is always greater or equal to 1.
+
+    Raises:
+        ValueError: If n_jobs is 0 or not an integer.
+    """
+    if n_jobs is None:
+        return 1
+
+    if not isinstance(n_jobs, int) or n_jobs == 0:
+        raise ValueError(f"n_jobs should be a non-zero integer or None. Got {n_jobs}.")
+
+    if n_jobs < 0:
+        return max((os.cpu_count() or 1) + 1 + n_jobs, 1)
+
+    return n_jobs
+
+
+def _init_fhe_execution_worker(server_path: str, serialized_evaluation_keys: bytes) -> None:
+    """Load the server and the evaluation keys once in an FHE execution worker process.
+
+    Args:
+        server_path (str): The path to the saved server zip file.
+        serialized_evaluation_keys (bytes): The serialized evaluation keys.
+    """
+    _FHE_EXECUTION_WORKER_STATE["server"] = Server.load(Path(server_path))
+    _FHE_EXECUTION_WORKER_STATE["evaluation_keys"] = EvaluationKeys.deserialize(
+        serialized_evaluation_keys
+    )
+
+
+def _run_fhe_execution_worker(*serialized_encrypted_inputs: bytes) -> Tuple[bytes, ...]:
+    """Run the FHE circuit on serialized encrypted inputs in an FHE execution worker process.
+
+    Args:
+        *serialized_encrypted_inputs (bytes): The serialized encrypted inputs.
+
+    Returns:
+        Tuple[bytes, ...]: The serialized encrypted outputs.
+    """
+    encrypted_inputs = (Value.deserialize(x) for x in serialized_encrypted_inputs)
+
+    encrypted_outputs = _FHE_EXECUTION_WORKER_STATE["server"].run(
+        *encrypted_inputs, evaluation_keys=_FHE_EXECUTION_WORKER_STATE["evaluation_keys"]
+    )
+
+    return tuple(encrypted_output.serialize() for encrypted_output in to_tuple(encrypted_outputs))
+
+
+def _decrypt_serialized_outputs(circuit: Circuit, execution: Future) -> Tuple[numpy.ndarray, ...]:
+    """Wait for an FHE execution submitted to a worker process and decrypt its outputs.
+
+    Args:
+        circuit (Circuit): The compiled FHE circuit, holding the keys used for encryption.
+        execution (Future): The execution, returning the serialized encrypted outputs.
+
+    Returns:
+        Tuple[numpy.ndarray, ...]: The decrypted outputs.
+    """
+    serialized_encrypted_outputs = execution.result()
+    return to_tuple(circuit.decrypt(*(Value.deserialize(x) for x in serialized_encrypted_outputs)))
+
+
+def pad_batch(q_input: numpy.ndarray, batch_size: int) -> numpy.ndarray:
+    """Pad a batch of examples to the given batch size by repeating its last example.
+
+    Repeating an existing example, instead of padding with zeros for instance, makes sure that the
+    padded values stay within the ranges the circuit was compiled for.
+
+    Args:
+        q_input (numpy.ndarray): The batch of quantized examples, of size at most batch_size.
+        batch_size (int): The batch size to pad to.
+
+    Returns:
+        numpy.ndarray: The padded batch.
+    """
+    n_missing = batch_size - q_input.shape[0]
+
+    if n_missing == 0:
+        return q_input
+
+    padding = numpy.repeat(q_input[-1:], n_missing, axis=0)
+    return numpy.concatenate([q_input, padding], axis=0)
+
+
+def get_circuit_batch_size(circuit: Circuit) -> int:
+    """Get the number of examples a circuit processes at once.
+
+    Args:
+        circuit (Circuit): The compiled circuit, taking examples as the first dimension of its
+            inputs.
+
+    Returns:
+        int: The circuit's batch size.
+    """
+    return circuit.graph.ordered_inputs()[0].output.shape[0]
+
+
+def encrypt_run_decrypt_in_parallel(
+    circuit: Circuit, *q_x: numpy.ndarray, n_jobs: Optional[int] = None
+) -> Union[numpy.ndarray, Tuple[numpy.ndarray, ...]]:
+    """Encrypt, execute in FHE and decrypt the inputs, batch by batch, using a pool of processes.
+
+    The examples are split in batches of the size the circuit was compiled for, the last one being
+    padded if needed. The batches are encrypted and decrypted in the current process, while the FHE
+    executions are spread across worker processes. Each batch is submitted as soon as it is
+    encrypted, so that encryption overlaps with execution, and only a few batches per worker are
+    in flight at any time, so that memory usage stays bounded. The server and the evaluation keys
+    are only sent once to each worker, which then executes the batches it receives independently.
+    Threads cannot be used here as the FHE runtime does not release Python's GIL during execution.
+
+    Args:
+        circuit (Circuit): The compiled FHE circuit to execute.
+        *q_x (numpy.ndarray): The quantized inputs, with the examples as their first dimension.
+        n_jobs (Optional[int]): The number of worker processes to use, following scikit-learn's
+            convention. Default to None, which executes all batches sequentially in the current
+            process.
+
+    Returns:
+        Union[numpy.ndarray, Tuple[numpy.ndarray, ...]]: The decrypted outputs of all examples, in
+            the same order as the inputs.
+    """
+    batch_size = get_circuit_batch_size(circuit)
+    n_examples = q_x[0].shape[0]
+
+    n_batches = -(-n_examples // batch_size)
+    batches = (
+        tuple(pad_batch(q_x_j[start : start + batch_size], batch_size) for q_x_j in q_x)
+        for start in range(0, n_examples, batch_size)
+    )
+
+    n_workers = min(get_n_jobs(n_jobs), n_batches)
+
+    # Avoid the overhead of starting new processes if a single worker is needed
+    if n_workers <= 1:
+        q_outputs = [to_tuple(circuit.encrypt_run_decrypt(*batch)) for batch in batches]
+
+    else:
+        # Make sure the keys are generated before sharing the evaluation keys with the workers
+        circuit.keygen(force=False)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            server_path = Path(tmp_dir) / "server.zip"
+            circuit.server.save(server_path)
+
+            # The 'spawn' start method is used as forking a process that holds the FHE runtime's
+            # threads is not safe
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_fhe_execution_worker,
+                initargs=(str(server_path), circuit.keys.evaluation.serialize()),
+            ) as executor:
+                q_outputs = []
+
+                # Executions that are running or waiting for a worker, from the oldest to the most
+                # recently submitted one
+                pending_executions: Deque[Future] = deque()
+
+                for batch in batches:
+                    serialized_encrypted_batch = tuple(
+                        encrypted.serialize() for encrypted in to_tuple(circuit.encrypt(*batch))
+                    )
+                    pending_executions.append(
+                        executor.submit(_run_fhe_execution_worker, *serialized_encrypted_batch)
+                    )
+
+                    # Wait for the oldest execution once each worker has a batch queued, so that
+                    # encrypted batches do not pile up in memory
+                    if len(pending_executions) >= 2 * n_workers:
+                        q_outputs.append(
+                            _decrypt_serialized_outputs(circuit, pending_executions.popleft())
+                        )
+
+                while pending_executions:
+                    q_outputs.append(
+                        _decrypt_serialized_outputs(circuit, pending_executions.popleft())
+                    )
+
+    # Concatenate the batches and remove the outputs of the padded examples
+    q_results = tuple(
+        numpy.concatenate(q_output_batches, axis=0)[:n_examples]
+        for q_output_batches in zip(*q_outputs)
+    )
+
+    if len(q_results) == 1:
+        return q_results[0]
+    return q_results
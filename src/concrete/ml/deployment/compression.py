@@ -0,0 +1,255 @@
+"""Compression of the serialized keys and values sent between clients and servers.
+
+Compressed payloads start with a small header giving the codec used and the size of the
+uncompressed payload, so that they can be told apart from uncompressed ones. Concrete serializes
+values using Cap'n Proto, whose messages start with the number of segments as a little-endian 32
+bits integer, so serialized values never start with the header's magic bytes.
+
+Keys and ciphertexts mostly contain uniformly random data, which does not compress well. Payloads
+are thus only compressed if a sample of them compresses enough, so that no time is wasted
+compressing them otherwise. Concrete's `compress_evaluation_keys` and `compress_input_ciphertexts`
+configuration options are much more efficient at reducing their size.
+
+Payloads are decompressed in a streaming fashion and never beyond the size given in their header,
+which is itself bounded, so that servers cannot be made to allocate arbitrary amounts of memory by
+small malicious payloads.
+"""
+
+import importlib
+import lzma
+import struct
+import zlib
+from typing import List, Optional
+
+from ..common.debugging.custom_assert import assert_true
+
+# Magic bytes starting compressed payloads
+COMPRESSION_MAGIC = b"CMLZ"
+
+# Header of compressed payloads: magic bytes, codec id and size of the uncompressed payload
+COMPRESSION_HEADER_FORMAT = "<4sBQ"
+COMPRESSION_HEADER_SIZE = struct.calcsize(COMPRESSION_HEADER_FORMAT)
+
+# HTTP header listing the codecs a client accepts for the responses, by order of preference
+ACCEPT_COMPRESSION_HEADER = "X-Accept-Compression"
+
+# Size of the sample used to check whether a payload is worth compressing, in bytes
+COMPRESSION_SAMPLE_SIZE = 1024 * 1024
+
+# Default maximum size of decompressed payloads, in bytes. Evaluation keys of large circuits can
+# take a few GB
+DEFAULT_MAX_DECOMPRESSED_SIZE = 8 * 1024**3
+
+# Codecs, with their id in the header and the module implementing them. The zstd and lz4 codecs
+# require the optional 'zstandard' and 'lz4' packages
+CODECS = {
+    "zlib": (1, "zlib"),
+    "lzma": (2, "lzma"),
+    "zstd": (3, "zstandard"),
+    "lz4": (4, "lz4.frame"),
+}
+CODEC_NAMES = {codec_id: name for name, (codec_id, _) in CODECS.items()}
+
+
+def _import_codec(compression: str):
+    """Import the module implementing a codec.
+
+    Args:
+        compression (str): The name of the codec.
+
+    Returns:
+        module: The module implementing the codec.
+
+    Raises:
+        ValueError: If the codec is unknown or its optional dependency is not installed.
+    """
+    assert_true(
+        compression in CODECS,
+        f"Unknown compression '{compression}'. Expected one of {sorted(CODECS)}",
+        ValueError,
+    )
+
+    module_name = CODECS[compression][1]
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as error:
+        raise ValueError(
+            f"The '{compression}' compression requires the '{module_name.split('.')[0]}' package, "
+            "which is not installed."
+        ) from error
+
+
+def available_compressions() -> List[str]:
+    """List the codecs that can be used in the current environment.
+
+    Returns:
+        List[str]: The names of the available codecs.
+    """
+    compressions = []
+    for compression in CODECS:
+        try:
+            _import_codec(compression)
+        except ValueError:
+            continue
+        compressions.append(compression)
+
+    return compressions
+
+
+def negotiate_compression(accepted_compressions: Optional[str]) -> Optional[str]:
+    """Choose the codec to use for a response, given the ones accepted by the client.
+
+    Args:
+        accepted_compressions (Optional[str]): The codecs accepted by the client, separated by
+            commas and by order of preference, as given in the `X-Accept-Compression` header.
+
+    Returns:
+        Optional[str]: The first accepted codec that is available, or None if there is none.
+    """
+    if not accepted_compressions:
+        return None
+
+    available = available_compressions()
+    for compression in accepted_compressions.split(","):
+        if compression.strip() in available:
+            return compression.strip()
+
+    return None
+
+
+def _compress_with(module, compression: str, data: bytes, level: Optional[int]) -> bytes:
+    if compression == "zlib":
+        return module.compress(data, level if level is not None else zlib.Z_DEFAULT_COMPRESSION)
+
+    if compression == "lzma":
+        return module.compress(data, preset=level if level is not None else lzma.PRESET_DEFAULT)
+
+    if compression == "zstd":
+        compressor = module.ZstdCompressor(level=level if level is not None else 3)
+        return compressor.compress(data)
+
+    return module.compress(data, compression_level=level if level is not None else 0)
+
+
+def _decompress_with(module, compression: str, data: bytes, max_length: int) -> bytes:
+    # Decompress at most `max_length` bytes, whatever the payload claims to contain
+    if compression == "zlib":
+        return module.decompressobj().decompress(data, max_length)
+
+    if compression == "lzma":
+        return module.LZMADecompressor().decompress(data, max_length)
+
+    if compression == "zstd":
+        with module.ZstdDecompressor().stream_reader(data) as reader:
+            return reader.read(max_length)
+
+    return module.LZ4FrameDecompressor().decompress(data, max_length=max_length)
+
+
+def is_compressed(data: bytes) -> bool:
+    """Check whether a payload was compressed using `compress`.
+
+    Args:
+        data (bytes): The payload.
+
+    Returns:
+        bool: Whether the payload is compressed.
+    """
+    return bytes(data[: len(COMPRESSION_MAGIC)]) == COMPRESSION_MAGIC
+
+
+def compress(
+    data: bytes,
+    compression: Optional[str],
+    level: Optional[int] = None,
+    min_ratio: float = 1.1,
+) -> bytes:
+    """Compress a serialized payload.
+
+    A sample of the payload is compressed first, and the payload is left uncompressed if the
+    sample's compression ratio is below `min_ratio`. Uncompressed payloads are understood by
+    `decompress` as well.
+
+    Args:
+        data (bytes): The serialized payload.
+        compression (Optional[str]): The codec to use, one of "zlib", "lzma", "zstd" or "lz4". If
+            None, the payload is not compressed.
+        level (Optional[int]): The compression level, specific to each codec. If None, the codec's
+            default level is used. Default to None.
+        min_ratio (float): The minimum compression ratio for the payload to be compressed.
+            Default to 1.1.
+
+    Returns:
+        bytes: The compressed payload, or the payload itself if it is not worth compressing.
+    """
+    if compression is None:
+        return data
+
+    module = _import_codec(compression)
+
+    if len(data) > COMPRESSION_SAMPLE_SIZE:
+        sample = bytes(data[:COMPRESSION_SAMPLE_SIZE])
+        if len(sample) < min_ratio * len(_compress_with(module, compression, sample, level)):
+            return data
+
+    compressed_data = _compress_with(module, compression, bytes(data), level)
+
+    if len(data) < min_ratio * (COMPRESSION_HEADER_SIZE + len(compressed_data)):
+        return data
+
+    header = struct.pack(
+        COMPRESSION_HEADER_FORMAT, COMPRESSION_MAGIC, CODECS[compression][0], len(data)
+    )
+    return header + compressed_data
+
+
+def decompress(data: bytes, max_size: Optional[int] = DEFAULT_MAX_DECOMPRESSED_SIZE) -> bytes:
+    """Decompress a payload compressed using `compress`.
+
+    Payloads whose header announces more than `max_size` bytes are rejected before anything is
+    decompressed, and no more than the announced size is ever decompressed.
+
+    Args:
+        data (bytes): The payload, compressed or not.
+        max_size (Optional[int]): The maximum size of the uncompressed payload, in bytes. If None,
+            the size is not bounded. Default to DEFAULT_MAX_DECOMPRESSED_SIZE.
+
+    Returns:
+        bytes: The uncompressed payload.
+
+    Raises:
+        ValueError: If the payload was compressed with an unknown codec, is too large once
+            decompressed or is corrupted.
+    """
+    if not is_compressed(data):
+        return data
+
+    _, codec_id, size = struct.unpack(
+        COMPRESSION_HEADER_FORMAT, bytes(data[:COMPRESSION_HEADER_SIZE])
+    )
+
+    if codec_id not in CODEC_NAMES:
+        raise ValueError(f"The payload was compressed with an unknown codec (id {codec_id}).")
+
+    if max_size is not None and size > max_size:
+        raise ValueError(
+            f"The payload is too large: {size} bytes once decompressed, while at most {max_size} "
+            "are allowed."
+        )
+
+    compression = CODEC_NAMES[codec_id]
+    module = _import_codec(compression)
+
+    # Ask for one more byte than announced, so that payloads decompressing to more than their
+    # header says are detected without decompressing them entirely
+    decompressed_data = _decompress_with(
+        module, compression, bytes(data[COMPRESSION_HEADER_SIZE:]), size + 1
+    )
+
+    if len(decompressed_data) != size:
+        raise ValueError(
+            f"The payload is corrupted: expected {size} bytes once decompressed but got "
+            f"{'more' if len(decompressed_data) > size else len(decompressed_data)}."
+        )
+
+    return decompressed_data
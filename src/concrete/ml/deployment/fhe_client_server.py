@@ -1,10 +1,16 @@
 """APIs for FHE deployment."""
 
+import hashlib
+import io
 import json
+import struct
 import sys
+import threading
+import time
 import zipfile
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import numpy
 
@@ -13,7 +19,10 @@ from concrete import fhe
 from ..common.debugging.custom_assert import assert_true
 from ..common.serialization.dumpers import dump
 from ..common.serialization.loaders import load
+from ..common.utils import get_circuit_batch_size, pad_batch
 from ..version import __version__ as CML_VERSION
+from .compression import DEFAULT_MAX_DECOMPRESSED_SIZE, compress, decompress
+from .key_store import DirectoryKeyStore, KeyStore
 
 try:
     # 3.8 and above
@@ -24,6 +33,102 @@ except ImportError:  # pragma: no cover
     # pylint: disable-next=no-name-in-module
     from importlib_metadata import version
 
+# Default size of the chunks in which serialized values and keys are streamed, in bytes
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def iter_chunks(data: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[memoryview]:
+    """Split serialized data in chunks, without copying it.
+
+    The chunks can for instance be given to `requests.post(url, data=...)`, which then uploads
+    them one after the other using chunked transfer encoding instead of building the whole request
+    body in memory.
+
+    Args:
+        data (bytes): The serialized data.
+        chunk_size (int): The maximum size of the chunks, in bytes. Default to 1 MB.
+
+    Returns:
+        Iterator[memoryview]: The chunks of data.
+    """
+    assert_true(
+        chunk_size > 0, f"The chunk size must be strictly positive. Got {chunk_size}", ValueError
+    )
+
+    view = memoryview(data)
+    return (view[start : start + chunk_size] for start in range(0, len(view), chunk_size))
+
+
+def join_chunks(chunks: Iterable[bytes]) -> bytes:
+    """Gather chunks of serialized data, for instance as downloaded from a server.
+
+    The chunks are kept in memory until they are joined, so the peak memory is about twice the size
+    of the data.
+
+    Args:
+        chunks (Iterable[bytes]): The chunks of serialized data.
+
+    Returns:
+        bytes: The serialized data.
+    """
+    return b"".join(chunks)
+
+
+# Format of the size preceding each payload packed by `pack_payloads`
+PAYLOAD_SIZE_FORMAT = "<Q"
+PAYLOAD_SIZE_LENGTH = struct.calcsize(PAYLOAD_SIZE_FORMAT)
+
+
+def pack_payloads(payloads: Sequence[bytes]) -> bytes:
+    """Pack several serialized payloads, such as ciphertexts, so that they can be sent together.
+
+    Each payload is preceded by its size, as a little-endian 64 bits integer.
+
+    Args:
+        payloads (Sequence[bytes]): The serialized payloads.
+
+    Returns:
+        bytes: The packed payloads.
+    """
+    buffer = io.BytesIO()
+    for payload in payloads:
+        buffer.write(struct.pack(PAYLOAD_SIZE_FORMAT, len(payload)))
+        buffer.write(payload)
+
+    return buffer.getvalue()
+
+
+def unpack_payloads(data: bytes) -> List[bytes]:
+    """Unpack payloads packed using `pack_payloads`.
+
+    Args:
+        data (bytes): The packed payloads.
+
+    Returns:
+        List[bytes]: The serialized payloads.
+
+    Raises:
+        ValueError: If the packed payloads are truncated.
+    """
+    view = memoryview(data)
+
+    payloads = []
+    start = 0
+    while start < len(view):
+        if start + PAYLOAD_SIZE_LENGTH > len(view):
+            raise ValueError("The packed payloads are truncated.")
+
+        (size,) = struct.unpack_from(PAYLOAD_SIZE_FORMAT, view, start)
+        start += PAYLOAD_SIZE_LENGTH
+
+        if start + size > len(view):
+            raise ValueError("The packed payloads are truncated.")
+
+        payloads.append(bytes(view[start : start + size]))
+        start += size
+
+    return payloads
+
 
 def check_concrete_versions(zip_path: Path):
     """Check that current versions match the ones used in development.
@@ -79,18 +184,75 @@ def check_concrete_versions(zip_path: Path):
 
 
 class FHEModelServer:
-    """Server API to load and run the FHE circuit."""
+    """Server API to load and run the FHE circuit.
+
+    Evaluation keys can either be given to `run` directly or be registered once using
+    `register_evaluation_keys`, in which case `run` only needs the returned key id. Registered keys
+    are kept deserialized in a least recently used cache, so that clients sending several requests
+    do not pay for their deserialization each time. They can also be persisted in a key store, from
+    which keys evicted from the cache are loaded again.
+    """
 
     server: fhe.Server
 
-    def __init__(self, path_dir: str):
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+        self,
+        path_dir: str,
+        evaluation_keys_cache_size: int = 8,
+        evaluation_keys_dir: Optional[str] = None,
+        evaluation_keys_store: Optional[KeyStore] = None,
+        evaluation_keys_cache_memory: Optional[int] = None,
+        max_decompressed_size: Optional[int] = DEFAULT_MAX_DECOMPRESSED_SIZE,
+    ):
         """Initialize the FHE API.
 
         Args:
             path_dir (str): the path to the directory where the circuit is saved
+            evaluation_keys_cache_size (int): the maximum number of registered evaluation keys kept
+                deserialized in memory. Default to 8.
+            evaluation_keys_dir (Optional[str]): the directory where registered evaluation keys
+                are stored, so that keys evicted from the cache can be loaded again. This is a
+                shortcut for giving a `DirectoryKeyStore` as `evaluation_keys_store`. If both are
+                None, evicted keys need to be registered again. Default to None.
+            evaluation_keys_store (Optional[KeyStore]): the store where registered evaluation keys
+                are persisted. Keys that expire from the store can no longer be used, even if they
+                are in the cache. Default to None.
+            evaluation_keys_cache_memory (Optional[int]): the maximum total size, in bytes, of the
+                serialized evaluation keys kept deserialized in memory. The most recently used keys
+                are always kept. If None, only the number of keys is bounded. Default to None.
+            max_decompressed_size (Optional[int]): the maximum size, in bytes, of the compressed
+                data and evaluation keys once decompressed. Larger payloads are rejected before
+                being decompressed. If None, the size is not bounded. Default to
+                `compression.DEFAULT_MAX_DECOMPRESSED_SIZE`.
         """
+        assert_true(
+            isinstance(evaluation_keys_cache_size, int) and evaluation_keys_cache_size > 0,
+            "The evaluation keys cache size must be a strictly positive integer. Got "
+            f"{evaluation_keys_cache_size}",
+            ValueError,
+        )
+        assert_true(
+            evaluation_keys_dir is None or evaluation_keys_store is None,
+            "Only one of 'evaluation_keys_dir' and 'evaluation_keys_store' can be set.",
+            ValueError,
+        )
+
+        if evaluation_keys_dir is not None:
+            evaluation_keys_store = DirectoryKeyStore(evaluation_keys_dir)
 
         self.path_dir = path_dir
+        self.evaluation_keys_cache_size = evaluation_keys_cache_size
+        self.evaluation_keys_cache_memory = evaluation_keys_cache_memory
+        self.evaluation_keys_store = evaluation_keys_store
+        self.max_decompressed_size = max_decompressed_size
+
+        # Registered evaluation keys, from the least to the most recently used, with the size of
+        # their serialized form and the time they were last used
+        self._evaluation_keys_cache: OrderedDict[str, Tuple[fhe.EvaluationKeys, int, float]] = (
+            OrderedDict()
+        )
+        self._evaluation_keys_lock = threading.Lock()
 
         # Load the FHE circuit
         self.load()
@@ -103,17 +265,129 @@ class FHEModelServer:
 
         self.server = fhe.Server.load(Path(self.path_dir).joinpath("server.zip"))
 
+    def _cache_evaluation_keys(self, key_id: str, evaluation_keys: fhe.EvaluationKeys, size: int):
+        with self._evaluation_keys_lock:
+            self._evaluation_keys_cache[key_id] = (evaluation_keys, size, time.time())
+            self._evaluation_keys_cache.move_to_end(key_id)
+
+            cache_memory = sum(size for _, size, _ in self._evaluation_keys_cache.values())
+
+            while len(self._evaluation_keys_cache) > 1 and (
+                len(self._evaluation_keys_cache) > self.evaluation_keys_cache_size
+                or (
+                    self.evaluation_keys_cache_memory is not None
+                    and cache_memory > self.evaluation_keys_cache_memory
+                )
+            ):
+                _, (_, evicted_size, _) = self._evaluation_keys_cache.popitem(last=False)
+                cache_memory -= evicted_size
+
+    def _get_cached_evaluation_keys(self, key_id: str) -> Optional[fhe.EvaluationKeys]:
+        with self._evaluation_keys_lock:
+            cached_keys = self._evaluation_keys_cache.get(key_id)
+
+            if cached_keys is None:
+                return None
+
+            evaluation_keys, size, last_access = cached_keys
+
+            # Keys that were not used for longer than the store's time to live are expired
+            if self.evaluation_keys_store is not None and self.evaluation_keys_store.is_expired(
+                last_access
+            ):
+                del self._evaluation_keys_cache[key_id]
+                self.evaluation_keys_store.delete(key_id)
+                return None
+
+            self._evaluation_keys_cache[key_id] = (evaluation_keys, size, time.time())
+            self._evaluation_keys_cache.move_to_end(key_id)
+
+        # Keep the keys alive in the store as well, as other processes may share it
+        if self.evaluation_keys_store is not None and self.evaluation_keys_store.ttl is not None:
+            self.evaluation_keys_store.touch(key_id)
+
+        return evaluation_keys
+
+    def register_evaluation_keys(self, serialized_evaluation_keys: bytes) -> str:
+        """Register evaluation keys so that they can be used by several calls to `run`.
+
+        The keys are deserialized once and kept in memory until they are evicted from the cache.
+        If a key store was given, they are also persisted in it.
+
+        Args:
+            serialized_evaluation_keys (bytes): the serialized evaluation keys
+
+        Returns:
+            str: the id of the keys, to give to `run`. The same keys always get the same id.
+        """
+        # Keys are identified by their uncompressed form, so that they get the same id however they
+        # were sent
+        serialized_evaluation_keys = decompress(
+            serialized_evaluation_keys, self.max_decompressed_size
+        )
+        key_id = hashlib.sha256(serialized_evaluation_keys).hexdigest()
+
+        if self.evaluation_keys_store is not None:
+            self.evaluation_keys_store.put(key_id, serialized_evaluation_keys)
+
+        self._cache_evaluation_keys(
+            key_id,
+            fhe.EvaluationKeys.deserialize(serialized_evaluation_keys),
+            len(serialized_evaluation_keys),
+        )
+
+        return key_id
+
+    def get_evaluation_keys(self, key_id: str) -> fhe.EvaluationKeys:
+        """Get registered evaluation keys.
+
+        Args:
+            key_id (str): the id of the keys, as returned by `register_evaluation_keys`
+
+        Returns:
+            fhe.EvaluationKeys: the deserialized evaluation keys
+
+        Raises:
+            KeyError: if the keys are not registered, expired or were evicted from the cache
+                without being persisted in a key store
+        """
+        evaluation_keys = self._get_cached_evaluation_keys(key_id)
+        if evaluation_keys is not None:
+            return evaluation_keys
+
+        serialized_evaluation_keys = None
+        if self.evaluation_keys_store is not None:
+            serialized_evaluation_keys = self.evaluation_keys_store.get(key_id)
+
+        if serialized_evaluation_keys is None:
+            raise KeyError(
+                f"No evaluation keys are registered with id {key_id}. They need to be "
+                "registered (again) using 'register_evaluation_keys'."
+            )
+
+        evaluation_keys = fhe.EvaluationKeys.deserialize(serialized_evaluation_keys)
+        self._cache_evaluation_keys(key_id, evaluation_keys, len(serialized_evaluation_keys))
+
+        return evaluation_keys
+
     def run(
         self,
         serialized_encrypted_quantized_data: bytes,
-        serialized_evaluation_keys: bytes,
+        serialized_evaluation_keys: Union[bytes, str, fhe.EvaluationKeys],
+        compression: Optional[str] = None,
     ) -> bytes:
         """Run the model on the server over encrypted data.
 
+        The data and the evaluation keys can be compressed, using `compression.compress`.
+
         Args:
             serialized_encrypted_quantized_data (bytes): the encrypted, quantized
                 and serialized data
-            serialized_evaluation_keys (bytes): the serialized evaluation keys
+            serialized_evaluation_keys (Union[bytes, str, fhe.EvaluationKeys]): the serialized
+                evaluation keys, the id of evaluation keys registered with
+                `register_evaluation_keys` or evaluation keys that are already deserialized
+            compression (Optional[str]): the codec used to compress the result, if it is worth
+                compressing. If None, the result is not compressed. Default to None.
 
         Returns:
             bytes: the result of the model
@@ -121,14 +395,23 @@ class FHEModelServer:
         assert_true(self.server is not None, "Model has not been loaded.")
 
         deserialized_encrypted_quantized_data = fhe.Value.deserialize(
-            serialized_encrypted_quantized_data
+            decompress(serialized_encrypted_quantized_data, self.max_decompressed_size)
         )
-        deserialized_evaluation_keys = fhe.EvaluationKeys.deserialize(serialized_evaluation_keys)
+
+        if isinstance(serialized_evaluation_keys, fhe.EvaluationKeys):
+            deserialized_evaluation_keys = serialized_evaluation_keys
+        elif isinstance(serialized_evaluation_keys, str):
+            deserialized_evaluation_keys = self.get_evaluation_keys(serialized_evaluation_keys)
+        else:
+            deserialized_evaluation_keys = fhe.EvaluationKeys.deserialize(
+                decompress(serialized_evaluation_keys, self.max_decompressed_size)
+            )
+
         result = self.server.run(
             deserialized_encrypted_quantized_data, evaluation_keys=deserialized_evaluation_keys
         )
         serialized_result = result.serialize()
-        return serialized_result
+        return compress(serialized_result, compression)
 
 
 class FHEModelDev:
@@ -160,6 +443,7 @@ class FHEModelDev:
             "model_post_processing_params": self.model.post_processing_params,
             "input_quantizers": self.model.input_quantizers,
             "output_quantizers": self.model.output_quantizers,
+            "batch_size": get_circuit_batch_size(self.model.fhe_circuit),
         }
 
         # Export the `is_fitted` attribute for built-in models
@@ -230,15 +514,22 @@ class FHEModelClient:
 
     client: fhe.Client
 
-    def __init__(self, path_dir: str, key_dir: Optional[str] = None):
+    def __init__(
+        self, path_dir: str, key_dir: Optional[str] = None, compression: Optional[str] = None
+    ):
         """Initialize the FHE API.
 
         Args:
             path_dir (str): the path to the directory where the circuit is saved
             key_dir (str): the path to the directory where the keys are stored
+            compression (Optional[str]): the codec used to compress the serialized evaluation keys
+                and encrypted values, if they are worth compressing. Available codecs are given
+                by `compression.available_compressions`. If None, they are not compressed.
+                Default to None.
         """
         self.path_dir = path_dir
         self.key_dir = key_dir
+        self.compression = compression
 
         # If path_dir does not exist raise
         assert_true(
@@ -280,6 +571,10 @@ class FHEModelClient:
         # FIXME: https://github.com/zama-ai/concrete-ml-internal/issues/3131
         self.model.post_processing_params = serialized_processing["model_post_processing_params"]
 
+        # Load the number of examples the circuit processes at once, models saved before this
+        # option was introduced being compiled for a single example
+        self.batch_size = serialized_processing.get("batch_size", 1)
+
     def generate_private_and_evaluation_keys(self, force=False):
         """Generate the private and evaluation keys.
 
@@ -294,11 +589,30 @@ class FHEModelClient:
         Returns:
             bytes: the evaluation keys
         """
-        return self.client.evaluation_keys.serialize()
+        return compress(self.client.evaluation_keys.serialize(), self.compression)
+
+    def get_serialized_evaluation_keys_chunks(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[memoryview]:
+        """Get the serialized evaluation keys in chunks, to be streamed to a server.
+
+        The keys are fully serialized before being split, so this does not lower the client's
+        memory usage: it only lets the keys be uploaded without building the whole request body.
+
+        Args:
+            chunk_size (int): the maximum size of the chunks, in bytes. Default to 1 MB.
+
+        Returns:
+            Iterator[memoryview]: the chunks of the serialized evaluation keys
+        """
+        return iter_chunks(self.get_serialized_evaluation_keys(), chunk_size)
 
     def quantize_encrypt_serialize(self, x: numpy.ndarray) -> bytes:
         """Quantize, encrypt and serialize the values.
 
+        If the circuit was compiled for batches of examples, the values are padded to the batch
+        size. The outputs of the padded examples can then be ignored once decrypted.
+
         Args:
             x (numpy.ndarray): the values to quantize, encrypt and serialize
 
@@ -308,13 +622,57 @@ class FHEModelClient:
         # Quantize the values
         quantized_x = self.model.quantize_input(x)
 
+        if self.batch_size > 1:
+            assert_true(
+                quantized_x.shape[0] <= self.batch_size,
+                f"The circuit was compiled for batches of {self.batch_size} examples but got "
+                f"{quantized_x.shape[0]} examples. Please split the values in chunks of at most "
+                f"{self.batch_size} examples using `quantize_encrypt_serialize_batches`.",
+                ValueError,
+            )
+            quantized_x = pad_batch(quantized_x, self.batch_size)
+
         # Encrypt the values
         enc_qx = self.client.encrypt(quantized_x)
 
         # Serialize the encrypted values to be sent to the server
-        serialized_enc_qx = enc_qx.serialize()
+        serialized_enc_qx = compress(enc_qx.serialize(), self.compression)
         return serialized_enc_qx
 
+    def quantize_encrypt_serialize_batches(self, x: numpy.ndarray) -> List[bytes]:
+        """Split the values in batches, then quantize, encrypt and serialize each of them.
+
+        The values are split in batches of the size the circuit was compiled for, the last one being
+        padded if needed. Each batch can then be sent to the server separately.
+
+        Args:
+            x (numpy.ndarray): the values to quantize, encrypt and serialize
+
+        Returns:
+            List[bytes]: the quantized, encrypted and serialized batches
+        """
+        return [
+            self.quantize_encrypt_serialize(x[start : start + self.batch_size])
+            for start in range(0, x.shape[0], self.batch_size)
+        ]
+
+    def quantize_encrypt_serialize_chunks(
+        self, x: numpy.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[memoryview]:
+        """Quantize, encrypt and serialize the values in chunks, to be streamed to a server.
+
+        The values are fully serialized before being split, so this does not lower the client's
+        memory usage: it only lets the values be uploaded without building the whole request body.
+
+        Args:
+            x (numpy.ndarray): the values to quantize, encrypt and serialize
+            chunk_size (int): the maximum size of the chunks, in bytes. Default to 1 MB.
+
+        Returns:
+            Iterator[memoryview]: the chunks of the quantized, encrypted and serialized values
+        """
+        return iter_chunks(self.quantize_encrypt_serialize(x), chunk_size)
+
     def deserialize_decrypt(self, serialized_encrypted_quantized_result: bytes) -> numpy.ndarray:
         """Deserialize and decrypt the values.
 
@@ -327,7 +685,7 @@ class FHEModelClient:
         """
         # Deserialize the encrypted values
         deserialized_encrypted_quantized_result = fhe.Value.deserialize(
-            serialized_encrypted_quantized_result
+            decompress(serialized_encrypted_quantized_result)
         )
 
         # Decrypt the values
@@ -365,3 +723,20 @@ class FHEModelClient:
         )
 
         return deserialized_decrypted_dequantized_result
+
+    def deserialize_decrypt_dequantize_chunks(
+        self, serialized_encrypted_quantized_result_chunks: Iterable[bytes]
+    ) -> numpy.ndarray:
+        """Deserialize, decrypt and de-quantize values received in chunks.
+
+        Args:
+            serialized_encrypted_quantized_result_chunks (Iterable[bytes]): the chunks of the
+                serialized, encrypted and quantized result, for instance as given by
+                `requests.Response.iter_content`
+
+        Returns:
+            numpy.ndarray: the decrypted (de-quantized) values
+        """
+        return self.deserialize_decrypt_dequantize(
+            join_chunks(serialized_encrypted_quantized_result_chunks)
+        )
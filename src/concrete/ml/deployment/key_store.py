@@ -0,0 +1,346 @@
+"""Persistent stores of serialized evaluation keys."""
+
+import os
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from ..common.debugging.custom_assert import assert_true
+
+# Name of the SQLite database file in the key store's directory
+SQLITE_KEY_STORE_FILE_NAME = "keys.sqlite"
+
+
+class KeyStore(ABC):
+    """Base class of the persistent stores of serialized evaluation keys.
+
+    Keys that have not been used for `ttl` seconds are expired. Once the stored keys take more than
+    `max_size` bytes, the least recently used ones are removed. Stores keep their data on disk, so
+    that several processes using the same location share the same keys and keys survive restarts.
+
+    Args:
+        ttl (Optional[float]): The time, in seconds, after which unused keys expire. If None, keys
+            never expire. Default to None.
+        max_size (Optional[int]): The maximum size of the stored keys, in bytes. If None, the size
+            is not bounded. Default to None.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_size: Optional[int] = None):
+        assert_true(
+            ttl is None or ttl > 0,
+            f"The keys' time to live must be strictly positive. Got {ttl}",
+            ValueError,
+        )
+        assert_true(
+            max_size is None or max_size > 0,
+            f"The maximum size of the key store must be strictly positive. Got {max_size}",
+            ValueError,
+        )
+
+        self.ttl = ttl
+        self.max_size = max_size
+
+    @abstractmethod
+    def _put(self, key_id: str, serialized_keys: bytes):
+        """Store keys, replacing existing ones with the same id.
+
+        Args:
+            key_id (str): The id of the keys.
+            serialized_keys (bytes): The serialized keys.
+        """
+
+    @abstractmethod
+    def _get(self, key_id: str) -> Optional[Tuple[bytes, float]]:
+        """Get keys without updating their last access time.
+
+        Args:
+            key_id (str): The id of the keys.
+
+        Returns:
+            Optional[Tuple[bytes, float]]: The serialized keys and the time they were last used, or
+                None if they are not stored.
+        """
+
+    @abstractmethod
+    def touch(self, key_id: str):
+        """Mark keys as used now.
+
+        Args:
+            key_id (str): The id of the keys.
+        """
+
+    @abstractmethod
+    def delete(self, key_id: str):
+        """Remove keys from the store, if stored.
+
+        Args:
+            key_id (str): The id of the keys.
+        """
+
+    @abstractmethod
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """List the stored keys.
+
+        Returns:
+            List[Tuple[str, int, float]]: The id, size in bytes and last access time of all keys.
+        """
+
+    def is_expired(self, last_access: float) -> bool:
+        """Check if keys last used at a given time are expired.
+
+        Args:
+            last_access (float): The time the keys were last used, as given by `time.time`.
+
+        Returns:
+            bool: Whether the keys are expired.
+        """
+        return self.ttl is not None and time.time() - last_access > self.ttl
+
+    def put(self, key_id: str, serialized_keys: bytes):
+        """Store keys, then remove expired keys and evict keys if the store is full.
+
+        Args:
+            key_id (str): The id of the keys.
+            serialized_keys (bytes): The serialized keys.
+
+        Raises:
+            ValueError: If the keys are larger than the maximum size of the store, as they would be
+                evicted right away.
+        """
+        assert_true(
+            self.max_size is None or len(serialized_keys) <= self.max_size,
+            f"The keys take {len(serialized_keys)} bytes, which is more than the maximum size of "
+            f"the key store ({self.max_size} bytes).",
+            ValueError,
+        )
+
+        self._put(key_id, serialized_keys)
+        self.clean()
+
+    def get(self, key_id: str) -> Optional[bytes]:
+        """Get keys and mark them as used now.
+
+        Args:
+            key_id (str): The id of the keys.
+
+        Returns:
+            Optional[bytes]: The serialized keys, or None if they are not stored or expired.
+        """
+        stored_keys = self._get(key_id)
+
+        if stored_keys is None:
+            return None
+
+        serialized_keys, last_access = stored_keys
+
+        if self.is_expired(last_access):
+            self.delete(key_id)
+            return None
+
+        self.touch(key_id)
+
+        return serialized_keys
+
+    def clean(self):
+        """Remove the expired keys and the least recently used ones if the store is full."""
+        entries = []
+        for key_id, size, last_access in self.entries():
+            if self.is_expired(last_access):
+                self.delete(key_id)
+            else:
+                entries.append((last_access, size, key_id))
+
+        if self.max_size is None:
+            return
+
+        store_size = sum(size for _, size, _ in entries)
+
+        for _, size, key_id in sorted(entries):
+            if store_size <= self.max_size:
+                break
+
+            self.delete(key_id)
+            store_size -= size
+
+
+class DirectoryKeyStore(KeyStore):
+    """Store keys as files in a directory.
+
+    Each key is stored in a `{key_id}.ekl` file, whose modification time gives the time it was last
+    used. As key ids are expected to identify their content, keys that are already stored are not
+    written again.
+
+    Args:
+        location (Union[str, Path]): The directory where the keys are stored.
+        ttl (Optional[float]): The time, in seconds, after which unused keys expire. If None, keys
+            never expire. Default to None.
+        max_size (Optional[int]): The maximum size of the stored keys, in bytes. If None, the size
+            is not bounded. Default to None.
+    """
+
+    def __init__(
+        self,
+        location: Union[str, Path],
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+    ):
+        super().__init__(ttl=ttl, max_size=max_size)
+
+        self.location = Path(location)
+        self.location.mkdir(parents=True, exist_ok=True)
+
+    def _get_path(self, key_id: str) -> Path:
+        return self.location / f"{key_id}.ekl"
+
+    def _put(self, key_id: str, serialized_keys: bytes):
+        # Key ids identify their content, so keys that are already stored are not written again
+        if self._get_path(key_id).is_file():
+            self.touch(key_id)
+            return
+
+        # Write the keys to a temporary file first, so that other processes sharing the same
+        # directory never read incomplete keys
+        temporary_path = self._get_path(key_id).with_suffix(f".{uuid.uuid4().hex}.tmp")
+        temporary_path.write_bytes(serialized_keys)
+        os.replace(temporary_path, self._get_path(key_id))
+
+    def _get(self, key_id: str) -> Optional[Tuple[bytes, float]]:
+        path = self._get_path(key_id)
+
+        try:
+            return path.read_bytes(), path.stat().st_mtime
+
+        # The keys may also have been removed by another process in the meantime
+        except FileNotFoundError:
+            return None
+
+    def touch(self, key_id: str):
+        try:
+            os.utime(self._get_path(key_id))
+
+        # The keys may have been removed by another process in the meantime
+        except FileNotFoundError:  # pragma: no cover
+            pass
+
+    def delete(self, key_id: str):
+        self._get_path(key_id).unlink(missing_ok=True)
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        entries = []
+        for path in self.location.glob("*.ekl"):
+            try:
+                stat = path.stat()
+
+            # The keys may have been removed by another process in the meantime
+            except FileNotFoundError:  # pragma: no cover
+                continue
+
+            entries.append((path.stem, stat.st_size, stat.st_mtime))
+
+        return entries
+
+
+class SQLiteKeyStore(KeyStore):
+    """Store keys in a SQLite database.
+
+    The database uses SQLite's write-ahead logging, so that several processes can share it.
+
+    Args:
+        location (Union[str, Path]): The directory where the database is stored.
+        ttl (Optional[float]): The time, in seconds, after which unused keys expire. If None, keys
+            never expire. Default to None.
+        max_size (Optional[int]): The maximum size of the stored keys, in bytes. If None, the size
+            is not bounded. Default to None.
+    """
+
+    def __init__(
+        self,
+        location: Union[str, Path],
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+    ):
+        super().__init__(ttl=ttl, max_size=max_size)
+
+        Path(location).mkdir(parents=True, exist_ok=True)
+        self.path = Path(location) / SQLITE_KEY_STORE_FILE_NAME
+
+        self._execute("PRAGMA journal_mode=WAL")
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS keys (key_id TEXT PRIMARY KEY, "
+            "serialized_keys BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Use a new connection for each operation, so that the store can be used from several
+        # threads
+        return sqlite3.connect(self.path, timeout=60)
+
+    def _execute(self, query: str, parameters: tuple = ()) -> list:
+        connection = self._connect()
+        try:
+            with connection:
+                return connection.execute(query, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def _put(self, key_id: str, serialized_keys: bytes):
+        self._execute(
+            "INSERT OR REPLACE INTO keys VALUES (?, ?, ?)",
+            (key_id, sqlite3.Binary(serialized_keys), time.time()),
+        )
+
+    def _get(self, key_id: str) -> Optional[Tuple[bytes, float]]:
+        rows = self._execute(
+            "SELECT serialized_keys, last_access FROM keys WHERE key_id = ?", (key_id,)
+        )
+
+        if not rows:
+            return None
+
+        serialized_keys, last_access = rows[0]
+        return bytes(serialized_keys), last_access
+
+    def touch(self, key_id: str):
+        self._execute("UPDATE keys SET last_access = ? WHERE key_id = ?", (time.time(), key_id))
+
+    def delete(self, key_id: str):
+        self._execute("DELETE FROM keys WHERE key_id = ?", (key_id,))
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        rows = self._execute("SELECT key_id, length(serialized_keys), last_access FROM keys")
+        return [(key_id, size, last_access) for key_id, size, last_access in rows]
+
+
+# Key stores that can be created from their name
+KEY_STORES = {"directory": DirectoryKeyStore, "sqlite": SQLiteKeyStore}
+
+
+def create_key_store(
+    kind: str,
+    location: Union[str, Path],
+    ttl: Optional[float] = None,
+    max_size: Optional[int] = None,
+) -> KeyStore:
+    """Create a key store from its name.
+
+    Args:
+        kind (str): The kind of key store, either "directory" or "sqlite".
+        location (Union[str, Path]): The directory where the keys are stored.
+        ttl (Optional[float]): The time, in seconds, after which unused keys expire. If None, keys
+            never expire. Default to None.
+        max_size (Optional[int]): The maximum size of the stored keys, in bytes. If None, the size
+            is not bounded. Default to None.
+
+    Returns:
+        KeyStore: The key store.
+    """
+    assert_true(
+        kind in KEY_STORES,
+        f"Unknown key store '{kind}'. Expected one of {sorted(KEY_STORES)}",
+        ValueError,
+    )
+
+    return KEY_STORES[kind](location, ttl=ttl, max_size=max_size)
@@ -0,0 +1,208 @@
+"""Registry of FHE models served together, loaded when first needed."""
+
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..common.debugging.custom_assert import assert_true
+from .fhe_client_server import FHEModelServer
+from .key_store import create_key_store
+
+
+def discover_models(root_dir: Union[str, Path]) -> Dict[str, str]:
+    """Find the models saved in a directory tree.
+
+    Every directory containing a `server.zip` file is considered as a model, named after its path
+    relative to the root directory.
+
+    Args:
+        root_dir (Union[str, Path]): The root of the directory tree.
+
+    Returns:
+        Dict[str, str]: The paths to the directories of the models, indexed by their name.
+    """
+    root_dir = Path(root_dir).resolve()
+
+    models = {}
+    for server_zip_path in sorted(root_dir.rglob("server.zip")):
+        model_dir = server_zip_path.parent
+        model_name = model_dir.relative_to(root_dir).as_posix()
+
+        # Use the name of the root directory if it directly contains a model
+        if model_name == ".":
+            model_name = root_dir.name
+
+        models[model_name] = str(model_dir)
+
+    return models
+
+
+class FHEModelRegistry:
+    """Serve several FHE models, loading them when they are first used.
+
+    Loaded models are kept in a least recently used cache. Its size is bounded by the total size
+    of the models' `server.zip` files, which mostly contain the compiled circuits and thus give an
+    estimate of the memory they use once loaded. A model being loaded does not block the use of the
+    models that are already loaded.
+
+    Args:
+        models (Dict[str, str]): The paths to the directories of the models, indexed by their name.
+        max_loaded_size (Optional[int]): The maximum total size, in bytes, of the `server.zip` files
+            of the loaded models. The most recently used model is always kept loaded. If None, the
+            loaded models are never evicted. Default to None.
+        evaluation_keys_dir (Optional[str]): The directory where the evaluation keys registered for
+            the models are stored, each model using a sub-directory named after it. If None, keys
+            are only kept in memory. Default to None.
+        key_store (str): The kind of key store persisting the evaluation keys in
+            `evaluation_keys_dir`, either "directory" or "sqlite". Default to "directory".
+        key_store_options (Optional[Dict[str, Any]]): Other options of the key stores, such as
+            the keys' time to live `ttl` or the stores' `max_size`. Default to None.
+        **server_options: Other options given to the models' `FHEModelServer`, such as
+            `evaluation_keys_cache_size`.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, str],
+        max_loaded_size: Optional[int] = None,
+        evaluation_keys_dir: Optional[str] = None,
+        key_store: str = "directory",
+        key_store_options: Optional[Dict[str, Any]] = None,
+        **server_options,
+    ):
+        assert_true(
+            max_loaded_size is None or max_loaded_size > 0,
+            f"The maximum size of the loaded models must be strictly positive. Got "
+            f"{max_loaded_size}",
+            ValueError,
+        )
+
+        self.models = dict(models)
+        self.max_loaded_size = max_loaded_size
+        self.evaluation_keys_dir = evaluation_keys_dir
+        self.key_store = key_store
+        self.key_store_options = key_store_options if key_store_options is not None else {}
+        self.server_options = server_options
+
+        # Loaded models, from the least to the most recently used, with their size
+        self._loaded: OrderedDict[str, Tuple[FHEModelServer, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Locks held while loading each model, so that a model is only loaded once at a time
+        # without blocking the requests for the other models
+        self._loading_locks: Dict[str, threading.Lock] = {}
+
+        # Number of loads and total time spent loading each model
+        self.load_metrics: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def loaded_models(self) -> List[str]:
+        """Get the names of the loaded models, from the least to the most recently used.
+
+        Returns:
+            List[str]: The names of the loaded models.
+        """
+        with self._lock:
+            return list(self._loaded)
+
+    def load(self, model_name: str) -> Tuple[FHEModelServer, Optional[float]]:
+        """Get a model's server, loading it if needed.
+
+        Args:
+            model_name (str): The name of the model.
+
+        Returns:
+            Tuple[FHEModelServer, Optional[float]]: The model's server and the time, in seconds,
+                spent loading it, or None if it was already loaded.
+
+        Raises:
+            KeyError: If the registry has no model with this name.
+        """
+        if model_name not in self.models:
+            raise KeyError(f"No model is named {model_name}.")
+
+        with self._lock:
+            if model_name in self._loaded:
+                self._loaded.move_to_end(model_name)
+                return self._loaded[model_name][0], None
+
+            loading_lock = self._loading_locks.setdefault(model_name, threading.Lock())
+
+        with loading_lock:
+
+            # The model may have been loaded by another thread in the meantime
+            with self._lock:
+                if model_name in self._loaded:
+                    self._loaded.move_to_end(model_name)
+                    return self._loaded[model_name][0], None
+
+            # Load the model without holding the registry's lock, so that the models that are
+            # already loaded can still be used
+            start = time.perf_counter()
+
+            evaluation_keys_store = None
+            if self.evaluation_keys_dir is not None:
+                evaluation_keys_store = create_key_store(
+                    self.key_store,
+                    Path(self.evaluation_keys_dir) / model_name,
+                    **self.key_store_options,
+                )
+
+            server = FHEModelServer(
+                self.models[model_name],
+                evaluation_keys_store=evaluation_keys_store,
+                **self.server_options,
+            )
+
+            load_time = time.perf_counter() - start
+
+            model_size = (Path(self.models[model_name]) / "server.zip").stat().st_size
+
+            with self._lock:
+                self._loaded[model_name] = (server, model_size)
+                self._evict()
+
+                metrics = self.load_metrics.setdefault(model_name, {"loads": 0, "load_time": 0.0})
+                metrics["loads"] += 1
+                metrics["load_time"] += load_time
+
+        return server, load_time
+
+    def get(self, model_name: str) -> FHEModelServer:
+        """Get a model's server, loading it if needed.
+
+        Args:
+            model_name (str): The name of the model.
+
+        Returns:
+            FHEModelServer: The model's server.
+        """
+        return self.load(model_name)[0]
+
+    def _evict(self):
+        """Unload the least recently used models until the loaded ones fit in the maximum size."""
+        if self.max_loaded_size is None:
+            return
+
+        loaded_size = sum(model_size for _, model_size in self._loaded.values())
+
+        while loaded_size > self.max_loaded_size and len(self._loaded) > 1:
+            _, (_, model_size) = self._loaded.popitem(last=False)
+            loaded_size -= model_size
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get the registry's metrics.
+
+        Returns:
+            Dict[str, Any]: The loaded models and, for each model, the number of times it was
+                loaded and the total time spent loading it.
+        """
+        with self._lock:
+            return {
+                "loaded_models": list(self._loaded),
+                "load_metrics": {
+                    name: dict(metrics) for name, metrics in self.load_metrics.items()
+                },
+            }
@@ -0,0 +1,163 @@
+"""Scheduler grouping concurrent requests into batches."""
+
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from ..common.debugging.custom_assert import assert_true
+
+
+class BatchScheduler:
+    """Group concurrent requests into batches before processing them.
+
+    Requests are grouped by a key, for instance the id of the model and of the evaluation keys they
+    use, as only such requests can be processed together. A batch is dispatched as soon as it
+    holds `max_batch_size` requests, or `max_wait_time` seconds after its first request arrived.
+    At low load, requests thus wait at most `max_wait_time` seconds, while under load they are
+    processed in full batches. With `dispatch_when_idle`, a request arriving while no batch is
+    being processed is dispatched right away, so that batching adds no latency at low load.
+
+    The scheduler must be used from a single asyncio event loop.
+
+    Args:
+        process_batch (Callable[[Hashable, List[Any]], Awaitable[List[Any]]]): The coroutine
+            function processing a batch. It is called with the key of the batch and the list of
+            request inputs, and returns the list of results, in the same order. A result that is
+            an exception is raised to its request only.
+        max_batch_size (int): The maximum number of requests in a batch. Default to 8.
+        max_wait_time (float): The maximum time, in seconds, a request waits for other requests
+            before its batch is dispatched. Default to 0.005.
+        dispatch_when_idle (bool): Whether to dispatch requests right away when no batch is being
+            processed. Default to False.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 8,
+        max_wait_time: float = 0.005,
+        dispatch_when_idle: bool = False,
+    ):
+        assert_true(
+            isinstance(max_batch_size, int) and max_batch_size > 0,
+            f"The maximum batch size must be a strictly positive integer. Got {max_batch_size}",
+            ValueError,
+        )
+        assert_true(
+            max_wait_time >= 0,
+            f"The maximum wait time must be positive. Got {max_wait_time}",
+            ValueError,
+        )
+
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+        self.dispatch_when_idle = dispatch_when_idle
+
+        # Requests waiting for their batch to be dispatched, with the timer dispatching it
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+
+        # Keep a reference to the tasks processing batches, as asyncio only keeps weak ones
+        self._running_batches: set = set()
+
+        self.batch_size_histogram: Counter = Counter()
+
+    @property
+    def queue_depth(self) -> int:
+        """Get the number of requests waiting for their batch to be dispatched.
+
+        Returns:
+            int: The number of waiting requests.
+        """
+        return sum(len(requests) for requests in self._pending.values())
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get the scheduler's metrics.
+
+        Returns:
+            Dict[str, Any]: The number of waiting requests, of batches being processed and the
+                number of dispatched batches for each batch size.
+        """
+        return {
+            "queue_depth": self.queue_depth,
+            "running_batches": len(self._running_batches),
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+        }
+
+    async def submit(self, key: Hashable, request_input: Any) -> Any:
+        """Submit a request and wait for its result.
+
+        Args:
+            key (Hashable): The key of the request. Only requests with the same key are batched
+                together.
+            request_input (Any): The input of the request.
+
+        Returns:
+            Any: The result of the request.
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        requests = self._pending.setdefault(key, [])
+        requests.append((request_input, future))
+
+        is_idle = self.dispatch_when_idle and not self._running_batches
+
+        if len(requests) >= self.max_batch_size or is_idle:
+            self._dispatch(key)
+
+        elif len(requests) == 1:
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self.max_wait_time, self._dispatch, key
+            )
+
+        return await future
+
+    def _dispatch(self, key: Hashable):
+        """Dispatch the pending requests of a key as a batch.
+
+        Args:
+            key (Hashable): The key of the batch.
+        """
+        timer: Optional[asyncio.TimerHandle] = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        requests = self._pending.pop(key, [])
+        if not requests:
+            return
+
+        self.batch_size_histogram[len(requests)] += 1
+
+        task = asyncio.ensure_future(self._process(key, requests))
+        self._running_batches.add(task)
+        task.add_done_callback(self._running_batches.discard)
+
+    async def _process(self, key: Hashable, requests: List[Tuple[Any, asyncio.Future]]):
+        """Process a batch and set the results of its requests.
+
+        Args:
+            key (Hashable): The key of the batch.
+            requests (List[Tuple[Any, asyncio.Future]]): The inputs of the requests, with the
+                futures to set their results in.
+        """
+        try:
+            results = await self.process_batch(
+                key, [request_input for request_input, _ in requests]
+            )
+
+        # Forward any error to all the requests of the batch
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            for _, future in requests:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), result in zip(requests, results):
+            if future.done():
+                continue
+
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -1,23 +1,225 @@
 """Deployment server.
 
+The server either serves the model saved in PATH_TO_MODEL or, if MODELS_PATH is set, all the models
+saved in this directory tree. Each directory containing a server.zip file is then a model, named
+after its path relative to MODELS_PATH. Models are loaded when first used and the least recently
+used ones are unloaded once the total size of their server.zip files exceeds
+MAX_LOADED_MODELS_SIZE bytes, if set.
+
+Models can be warmed up, that is loaded by all the workers at startup, by listing them in
+WARM_MODELS, separated by commas, or in a JSON manifest file whose path is given in WARM_MANIFEST,
+as a list of model names. The /ready route answers with a 503 status until the warm-up is done, so
+that it can be used as a readiness probe.
+
 Routes:
+    - Check readiness
+    - List the models
     - Get client.zip
     - Add a key
     - Compute
+    - Get metrics
+
+The routes for a given model are under /models/{model_name}. When serving a single model, the
+/get_client, /add_key and /compute routes can also be used directly.
+
+Keys and encrypted inputs are either sent as multipart form files to /add_key and /compute, or as
+raw request bodies to /add_key_stream and /compute_stream, the uid of the key then being given as a
+query parameter. The latter lets clients stream large payloads in chunks without building the whole
+request in memory. In both cases, payloads are written to temporary files in chunks as they are
+received and results are streamed back from temporary files, so that the server process never
+holds them in memory. Only the worker running a computation loads its input and result.
+
+Keys and inputs can be compressed using the codecs listed by /compressions. Clients can also ask
+for compressed results by listing the codecs they accept, by order of preference, in the
+X-Accept-Compression header. Results are then compressed with the first available one, if they are
+worth compressing.
+
+FHE computations run in a pool of workers, so that the server keeps answering other requests in
+the meantime. The pool is configured with the following environment variables:
+    - COMPUTE_EXECUTOR: "process" (default) or "thread"
+    - COMPUTE_WORKERS: the number of workers, default to the number of CPUs
+    - MAX_PENDING_COMPUTATIONS: the maximum number of computations that are running or waiting for
+        a worker, default to twice the number of workers. Further requests get a 429 response.
+
+Concurrent computations using the same model and key are grouped into batches. A batch is split in
+one part per worker, each worker looking up the model and the deserialized key once for all the
+computations of its part. Computations arriving while no batch is running are run right away, so
+that batching adds no latency at low load. The batching policy is configured with the following
+environment variables:
+    - MAX_BATCH_SIZE: the maximum number of computations in a batch, default to 8
+    - MAX_BATCH_WAIT_TIME: the maximum time, in seconds, a computation waits for others before its
+        batch is run while other batches are running, default to 0.005
+
+Evaluation keys are stored in KEY_PATH, so that they are shared by all the workers and kept when
+the server restarts. Deserialized keys are kept in memory in a bounded cache. The keys are
+configured with the following environment variables:
+    - KEY_STORE: "directory" (default), storing each key in a file, or "sqlite", storing the keys
+        in a SQLite database
+    - KEY_TTL: the time, in seconds, after which unused keys are removed, default to never
+    - KEY_STORE_MAX_SIZE: the maximum size, in bytes, of the stored keys of each model, the least
+        recently used ones being removed first, default to no limit
+    - EVALUATION_KEYS_CACHE_SIZE: the maximum number of deserialized keys kept in memory for each
+        model, default to 8
+    - EVALUATION_KEYS_CACHE_MEMORY: the maximum size, in bytes, of the serialized keys kept in
+        memory for each model, default to no limit
+    - MAX_DECOMPRESSED_SIZE: the maximum size, in bytes, of compressed keys and inputs once
+        decompressed, larger ones being rejected before being decompressed, default to 8 GB
+
+Added keys are deserialized in the background: /add_key answers as soon as the key is received and
+computations using it wait for its deserialization to be done. Keys that were compressed are an
+exception, as their uid is only known once decompressed.
 """
 
-import io
+import asyncio
+import atexit
+import hashlib
+import json
 import os
-import uuid
+import shutil
+import tempfile
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 import uvicorn
-from fastapi import FastAPI, Form, HTTPException, UploadFile
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import FastAPI, Form, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
 
 # No relative import here because when not used in the package itself
-from concrete.ml.deployment import FHEModelServer
+from concrete.ml.deployment.compression import (
+    ACCEPT_COMPRESSION_HEADER,
+    DEFAULT_MAX_DECOMPRESSED_SIZE,
+    available_compressions,
+    is_compressed,
+    negotiate_compression,
+)
+from concrete.ml.deployment.model_registry import FHEModelRegistry, discover_models
+from concrete.ml.deployment.scheduler import BatchScheduler
+
+# The models served by the current process
+MODEL_REGISTRY: Optional[FHEModelRegistry] = None
+
+
+# pylint: disable-next=too-many-arguments
+def init_model_registry(
+    models: Dict[str, str],
+    max_loaded_size: Optional[int],
+    evaluation_keys_dir: str,
+    key_store: str,
+    key_store_options: Dict[str, Any],
+    server_options: Dict[str, Any],
+    warm_models: Sequence[str] = (),
+):
+    """Create the model registry of the current process.
+
+    When computations run in a process pool, each worker has its own registry. Keys are then not
+    sent to all workers: they are loaded from the key store in which they are stored when added.
+
+    Args:
+        models (Dict[str, str]): the paths to the directories of the models, indexed by their name
+        max_loaded_size (Optional[int]): the maximum total size of the loaded models' server.zip
+        evaluation_keys_dir (str): the directory where the keys are stored
+        key_store (str): the kind of key store, either "directory" or "sqlite"
+        key_store_options (Dict[str, Any]): the options of the key stores
+        server_options (Dict[str, Any]): the options of the models' FHEModelServer
+        warm_models (Sequence[str]): the models to load right away
+    """
+    # pylint: disable-next=global-statement
+    global MODEL_REGISTRY
+
+    MODEL_REGISTRY = FHEModelRegistry(
+        models,
+        max_loaded_size=max_loaded_size,
+        evaluation_keys_dir=evaluation_keys_dir,
+        key_store=key_store,
+        key_store_options=key_store_options,
+        **server_options,
+    )
+
+    warm_up(warm_models)
+
+
+def warm_up(warm_models: Sequence[str]) -> int:
+    """Load models in the registry of the current process.
+
+    Args:
+        warm_models (Sequence[str]): the models to load
+
+    Returns:
+        int: the id of the current process
+    """
+    assert MODEL_REGISTRY is not None
+    for model_name in warm_models:
+        MODEL_REGISTRY.load(model_name)
+    return os.getpid()
+
+
+def register_evaluation_keys(
+    model_name: str, evaluation_keys_path: str
+) -> Tuple[str, Optional[float]]:
+    """Register evaluation keys for a model of the current process.
+
+    Keys are read from a file rather than sent to the worker, so that they are not copied through
+    the pool's pipe.
+
+    Args:
+        model_name (str): the name of the model
+        evaluation_keys_path (str): the path to the file containing the serialized evaluation keys
+
+    Returns:
+        Tuple[str, Optional[float]]: the uid of the keys and the time spent loading the model, if
+            it was not loaded yet
+    """
+    assert MODEL_REGISTRY is not None
+    fhe_server, load_time = MODEL_REGISTRY.load(model_name)
+    serialized_evaluation_keys = Path(evaluation_keys_path).read_bytes()
+    return fhe_server.register_evaluation_keys(serialized_evaluation_keys), load_time
+
+
+def run_model_computations(
+    model_name: str, uid: str, computations: Sequence[Tuple[str, str, Optional[str]]]
+) -> Tuple[Optional[float], List[Optional[BaseException]]]:
+    """Run a model of the current process on several inputs using the same key.
+
+    The model and the key are only looked up once for all the computations. Inputs are read from
+    files and results are written to files, so that they are not copied through the pool's pipe.
+
+    Args:
+        model_name (str): the name of the model
+        uid (str): uid of the public key to use
+        computations (Sequence[Tuple[str, str, Optional[str]]]): the paths to the inputs of the
+            circuit and to the files where their results are written, with the codec used to
+            compress each result
+
+    Returns:
+        Tuple[Optional[float], List[Optional[BaseException]]]: the time spent loading the model, if
+            it was not loaded yet, and for each computation, None if its result was written in its
+            file, or the error it raised
+    """
+    assert MODEL_REGISTRY is not None
+    fhe_server, load_time = MODEL_REGISTRY.load(model_name)
+
+    try:
+        evaluation_keys = fhe_server.get_evaluation_keys(uid)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        return load_time, [error] * len(computations)
+
+    errors: List[Optional[BaseException]] = []
+    for input_path, result_path, compression in computations:
+        try:
+            encrypted_result = fhe_server.run(
+                Path(input_path).read_bytes(), evaluation_keys, compression
+            )
+            Path(result_path).write_bytes(encrypted_result)
+            errors.append(None)
+
+        # An error only fails its own computation
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            errors.append(error)
+
+    return load_time, errors
+
 
 if __name__ == "__main__":
     app = FastAPI(debug=False)
@@ -26,21 +228,458 @@ if __name__ == "__main__":
 
     KEY_PATH = Path(os.environ.get("KEY_PATH", FILE_FOLDER / Path("server_keys")))
     CLIENT_SERVER_PATH = Path(os.environ.get("PATH_TO_MODEL", FILE_FOLDER / Path("dev")))
+    MODELS_PATH = os.environ.get("MODELS_PATH")
+    MAX_LOADED_MODELS_SIZE = os.environ.get("MAX_LOADED_MODELS_SIZE")
+    WARM_MODELS = [name for name in os.environ.get("WARM_MODELS", "").split(",") if name]
+    WARM_MANIFEST = os.environ.get("WARM_MANIFEST")
     PORT = os.environ.get("PORT", "5000")
+    KEY_STORE = os.environ.get("KEY_STORE", "directory")
+    KEY_TTL = os.environ.get("KEY_TTL")
+    KEY_STORE_MAX_SIZE = os.environ.get("KEY_STORE_MAX_SIZE")
+    EVALUATION_KEYS_CACHE_SIZE = int(os.environ.get("EVALUATION_KEYS_CACHE_SIZE", "8"))
+    EVALUATION_KEYS_CACHE_MEMORY = os.environ.get("EVALUATION_KEYS_CACHE_MEMORY")
+    MAX_DECOMPRESSED_SIZE = os.environ.get("MAX_DECOMPRESSED_SIZE")
+    COMPUTE_EXECUTOR = os.environ.get("COMPUTE_EXECUTOR", "process")
+    COMPUTE_WORKERS = int(os.environ.get("COMPUTE_WORKERS", str(os.cpu_count() or 1)))
+    MAX_PENDING_COMPUTATIONS = int(
+        os.environ.get("MAX_PENDING_COMPUTATIONS", str(2 * COMPUTE_WORKERS))
+    )
+    MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "8"))
+    MAX_BATCH_WAIT_TIME = float(os.environ.get("MAX_BATCH_WAIT_TIME", "0.005"))
+
+    # Size of the chunks in which uploaded payloads are written to temporary files
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+    # Uploaded payloads and results are stored in this directory while being processed
+    UPLOAD_PATH = Path(tempfile.mkdtemp(prefix="concrete-ml-server-"))
+    atexit.register(shutil.rmtree, UPLOAD_PATH, ignore_errors=True)
+
+    assert COMPUTE_EXECUTOR in {"thread", "process"}, COMPUTE_EXECUTOR
+
+    if MODELS_PATH is not None:
+        MODELS = discover_models(MODELS_PATH)
+        DEFAULT_MODEL_NAME = None
+    else:
+        MODELS = discover_models(CLIENT_SERVER_PATH)
+        assert len(MODELS) == 1, f"Expected a single model in {CLIENT_SERVER_PATH}"
+        DEFAULT_MODEL_NAME = next(iter(MODELS))
+
+    for model_path in MODELS.values():
+        assert (Path(model_path) / "client.zip").exists()
+
+    if WARM_MANIFEST is not None:
+        WARM_MODELS += json.loads(Path(WARM_MANIFEST).read_text(encoding="utf-8"))
+
+    for model_name in WARM_MODELS:
+        assert model_name in MODELS, f"Unknown model to warm: {model_name}"
+
+    # Evaluation keys are deserialized once when they are added and kept in a bounded cache, keys
+    # evicted from it being loaded again from the key store in KEY_PATH
+    MODEL_REGISTRY_ARGS = (
+        MODELS,
+        int(MAX_LOADED_MODELS_SIZE) if MAX_LOADED_MODELS_SIZE is not None else None,
+        str(KEY_PATH.resolve()),
+        KEY_STORE,
+        {
+            "ttl": float(KEY_TTL) if KEY_TTL is not None else None,
+            "max_size": int(KEY_STORE_MAX_SIZE) if KEY_STORE_MAX_SIZE is not None else None,
+        },
+        {
+            "evaluation_keys_cache_size": EVALUATION_KEYS_CACHE_SIZE,
+            "evaluation_keys_cache_memory": (
+                int(EVALUATION_KEYS_CACHE_MEMORY)
+                if EVALUATION_KEYS_CACHE_MEMORY is not None
+                else None
+            ),
+            "max_decompressed_size": (
+                int(MAX_DECOMPRESSED_SIZE)
+                if MAX_DECOMPRESSED_SIZE is not None
+                else DEFAULT_MAX_DECOMPRESSED_SIZE
+            ),
+        },
+        WARM_MODELS,
+    )
+
+    # Concrete holds the GIL while running a circuit, so computations run in separate processes by
+    # default in order to keep the event loop responsive
+    executor: Executor
+    if COMPUTE_EXECUTOR == "process":
+        executor = ProcessPoolExecutor(
+            max_workers=COMPUTE_WORKERS,
+            initializer=init_model_registry,
+            initargs=MODEL_REGISTRY_ARGS,
+        )
+
+        # Worker processes are only started once a task is submitted, so submit one per worker to
+        # have them all warmed up right away
+        warm_up_futures: List[Future] = [
+            executor.submit(warm_up, WARM_MODELS) for _ in range(COMPUTE_WORKERS)
+        ]
+    else:
+        init_model_registry(*MODEL_REGISTRY_ARGS[:-1])
+        executor = ThreadPoolExecutor(max_workers=COMPUTE_WORKERS)
+
+        # Threads share the same registry, which is warmed up in the background
+        warm_up_futures = [executor.submit(warm_up, WARM_MODELS)]
+
+    # Number of computations that are running or waiting for a worker. It is only accessed from
+    # the event loop, so it doesn't need a lock
+    pending_computations = 0
+
+    # Number of times each model was loaded by a worker and total time spent loading it
+    load_metrics: Dict[str, Dict[str, float]] = {}
+
+    # Keys being deserialized in the background, indexed by the name of the model and their uid
+    pending_key_registrations: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def record_load_time(model_name: str, load_time: Optional[float]):
+        """Record the time a worker spent loading a model.
+
+        Arguments:
+            model_name (str): the name of the model
+            load_time (Optional[float]): the time spent loading the model, None if it was
+                already loaded
+        """
+        if load_time is not None:
+            metrics = load_metrics.setdefault(model_name, {"loads": 0, "load_time": 0.0})
+            metrics["loads"] += 1
+            metrics["load_time"] += load_time
+
+    def check_model_name(model_name: str):
+        """Check that a model is served.
+
+        Arguments:
+            model_name (str): the name of the model
+
+        Raises:
+            HTTPException: if the model is not served
+        """
+        if model_name not in MODELS:
+            raise HTTPException(status_code=404, detail=f"No model is named {model_name}.")
+
+    async def process_batch(
+        batch_key: Tuple[str, str], computations: List[Tuple[str, str, Optional[str]]]
+    ):
+        """Run a batch of computations using the same model and key in the workers.
+
+        The batch is split in one part per worker, each part being a single task that looks up
+        the model and the key once for all its computations. A failing computation does not fail
+        the others.
+
+        Arguments:
+            batch_key (Tuple[str, str]): the name of the model and the uid of the key to use
+            computations (List[Tuple[str, str, Optional[str]]]): the paths to the inputs of the
+                circuit and to the files where their results are written, with the codec used to
+                compress each result
+
+        Returns:
+            List[Optional[BaseException]]: for each computation, None if its result was written in
+                its file, or the error it raised
+        """
+        model_name, uid = batch_key
+        loop = asyncio.get_running_loop()
+
+        part_size = -(-len(computations) // min(COMPUTE_WORKERS, len(computations)))
+        parts = [
+            computations[start : start + part_size]
+            for start in range(0, len(computations), part_size)
+        ]
+
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, run_model_computations, model_name, uid, part)
+                for part in parts
+            ),
+            return_exceptions=True,
+        )
+
+        errors: List[Optional[BaseException]] = []
+        for part, result in zip(parts, results):
+            if isinstance(result, BaseException):
+                errors += [result] * len(part)
+            else:
+                load_time, part_errors = result
+                record_load_time(model_name, load_time)
+                errors += part_errors
+
+        return errors
+
+    scheduler = BatchScheduler(
+        process_batch,
+        max_batch_size=MAX_BATCH_SIZE,
+        max_wait_time=MAX_BATCH_WAIT_TIME,
+        dispatch_when_idle=True,
+    )
+
+    async def iter_upload(upload: UploadFile) -> AsyncIterator[bytes]:
+        """Read an uploaded file in chunks.
+
+        Arguments:
+            upload (UploadFile): the uploaded file
+
+        Yields:
+            bytes: the chunks of the file
+        """
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    async def save_chunks(chunks: AsyncIterator[bytes], digest: Optional[Any] = None) -> Path:
+        """Write chunks of a payload to a temporary file as they are received.
+
+        Arguments:
+            chunks (AsyncIterator[bytes]): the chunks of the payload
+            digest (Optional[Any]): a hashlib object updated with the chunks, if any
+
+        Returns:
+            Path: the path to the temporary file
+        """
+        file_descriptor, path = tempfile.mkstemp(dir=UPLOAD_PATH)
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                async for chunk in chunks:
+                    file.write(chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+
+        except BaseException:
+            Path(path).unlink(missing_ok=True)
+            raise
+
+        return Path(path)
+
+    async def register_key(model_name: str, key_path: Path) -> str:
+        """Register a key saved in a temporary file.
+
+        Arguments:
+            model_name (str): the name of the model
+            key_path (Path): the path to the temporary file
+
+        Returns:
+            str: the uid of the key
+        """
+        try:
+            # Deserializing large keys takes time, so it is done outside of the event loop
+            uid, load_time = await asyncio.get_running_loop().run_in_executor(
+                executor, register_evaluation_keys, model_name, str(key_path)
+            )
+
+        finally:
+            key_path.unlink(missing_ok=True)
+
+        record_load_time(model_name, load_time)
+        return uid
+
+    async def wait_for_key(model_name: str, uid: str):
+        """Wait for a key that is deserialized in the background to be registered.
+
+        Arguments:
+            model_name (str): the name of the model
+            uid (str): uid of the key
+
+        Raises:
+            HTTPException: if the key was compressed with an unavailable codec
+        """
+        registration = pending_key_registrations.get((model_name, uid))
+        if registration is None:
+            return
+
+        try:
+            await asyncio.shield(registration)
 
-    fhe = FHEModelServer(str(CLIENT_SERVER_PATH.resolve()))
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error)) from error
 
-    KEYS: Dict[str, bytes] = {}
+    def forget_key_registration(model_name: str, uid: str, registration: asyncio.Task):
+        """Remove a key registration once done.
 
-    PATH_TO_CLIENT = (CLIENT_SERVER_PATH / "client.zip").resolve()
-    PATH_TO_SERVER = (CLIENT_SERVER_PATH / "server.zip").resolve()
+        Arguments:
+            model_name (str): the name of the model
+            uid (str): uid of the key
+            registration (asyncio.Task): the task registering the key
+        """
+        # The same key may have been added again in the meantime
+        if pending_key_registrations.get((model_name, uid)) is registration:
+            del pending_key_registrations[(model_name, uid)]
+
+        # Retrieve the exception, if any, so that it is not reported as never retrieved when no
+        # computation waited for the key
+        if not registration.cancelled():
+            registration.exception()
+
+    async def add_key_from_chunks(model_name: str, chunks: AsyncIterator[bytes]):
+        """Add public key for a model from the chunks of its serialization.
+
+        Arguments:
+            model_name (str): the name of the model
+            chunks (AsyncIterator[bytes]): the chunks of the public key
+
+        Returns:
+            Dict[str, str]
+                - uid: uid a personal uid
+
+        Raises:
+            HTTPException: if the key was compressed with an unavailable codec
+        """
+        check_model_name(model_name)
 
-    assert PATH_TO_CLIENT.exists()
-    assert PATH_TO_SERVER.exists()
+        # The uid of the key is its hash, which is computed while the key is received
+        digest = hashlib.sha256()
+        key_path = await save_chunks(chunks, digest)
 
-    @app.get("/get_client")
-    def get_client():
-        """Get client.
+        with key_path.open("rb") as file:
+            key_is_compressed = is_compressed(file.read(16))
+
+        registration = asyncio.create_task(register_key(model_name, key_path))
+
+        # The uid of compressed keys is the hash of the decompressed key, so their registration is
+        # waited for
+        if key_is_compressed:
+            try:
+                return {"uid": await registration}
+
+            except ValueError as error:
+                raise HTTPException(status_code=400, detail=str(error)) from error
+
+        uid = digest.hexdigest()
+        pending_key_registrations[(model_name, uid)] = registration
+        registration.add_done_callback(
+            lambda registration: forget_key_registration(model_name, uid, registration)
+        )
+        return {"uid": uid}
+
+    async def run_computation(
+        model_name: str, chunks: AsyncIterator[bytes], uid: str, compression: Optional[str]
+    ) -> Path:
+        """Save an encrypted input received in chunks and run a model's circuit over it.
+
+        Arguments:
+            model_name (str): the name of the model
+            chunks (AsyncIterator[bytes]): the chunks of the input of the circuit
+            uid (str): uid of the public key to use
+            compression (Optional[str]): the codec used to compress the result
+
+        Returns:
+            Path: the path to the temporary file containing the result of the circuit
+        """
+        input_path = await save_chunks(chunks)
+        result_path = input_path.with_suffix(".result")
+        computed = False
+        try:
+            await scheduler.submit(
+                (model_name, uid), (str(input_path), str(result_path), compression)
+            )
+            computed = True
+
+        finally:
+            input_path.unlink(missing_ok=True)
+
+            # The result may have been partially written if the computation failed
+            if not computed:
+                result_path.unlink(missing_ok=True)
+
+        return result_path
+
+    async def compute_from_chunks(
+        model_name: str, chunks: AsyncIterator[bytes], uid: str, request: Request
+    ):
+        """Compute a model's circuit over encrypted input received in chunks.
+
+        Arguments:
+            model_name (str): the name of the model
+            chunks (AsyncIterator[bytes]): the chunks of the input of the circuit
+            uid (str): uid of the public key to use
+            request (Request): the request, whose headers give the codecs accepted for the result
+
+        Returns:
+            FileResponse: the result of the circuit, streamed from a temporary file
+
+        Raises:
+            HTTPException: if too many computations are pending, if no key is registered with
+                this uid or if the input was compressed with an unavailable codec
+        """
+        # pylint: disable-next=global-statement
+        global pending_computations
+
+        check_model_name(model_name)
+
+        if pending_computations >= MAX_PENDING_COMPUTATIONS:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many pending computations, please retry later.",
+                headers={"Retry-After": "1"},
+            )
+
+        pending_computations += 1
+        try:
+            await wait_for_key(model_name, uid)
+            compression = negotiate_compression(request.headers.get(ACCEPT_COMPRESSION_HEADER))
+            result_path = await run_computation(model_name, chunks, uid, compression)
+
+        except KeyError as error:
+            raise HTTPException(status_code=404, detail=str(error)) from error
+
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error)) from error
+
+        finally:
+            pending_computations -= 1
+
+        # The result is removed once it has been sent
+        return FileResponse(
+            result_path,
+            media_type="application/octet-stream",
+            background=BackgroundTask(result_path.unlink, missing_ok=True),
+        )
+
+    @app.get("/ready")
+    def ready():
+        """Check whether the server is warmed up.
+
+        Returns:
+            Dict[str, Any]
+                - ready: whether the server is ready
+                - warm_models: the models loaded at startup
+
+        Raises:
+            HTTPException: if the warm-up is not done yet or failed
+        """
+        if not all(future.done() for future in warm_up_futures):
+            raise HTTPException(status_code=503, detail="The server is warming up.")
+
+        for future in warm_up_futures:
+            if future.exception() is not None:
+                raise HTTPException(
+                    status_code=500, detail=f"The warm-up failed: {future.exception()}"
+                )
+
+        return {"ready": True, "warm_models": WARM_MODELS}
+
+    @app.get("/compressions")
+    def list_compressions():
+        """List the codecs that can be used to compress keys, inputs and results.
+
+        Returns:
+            Dict[str, List[str]]
+                - compressions: the names of the codecs
+        """
+        return {"compressions": available_compressions()}
+
+    @app.get("/models")
+    def list_models():
+        """List the models.
+
+        Returns:
+            Dict[str, List[str]]
+                - models: the names of the models
+        """
+        return {"models": list(MODELS)}
+
+    @app.get("/models/{model_name:path}/get_client")
+    def get_model_client(model_name: str):
+        """Get a model's client.
+
+        Arguments:
+            model_name (str): the name of the model
 
         Returns:
             FileResponse: client.zip
@@ -48,44 +687,159 @@ if __name__ == "__main__":
         Raises:
             HTTPException: if the file can't be find locally
         """
-        path_to_client = (CLIENT_SERVER_PATH / "client.zip").resolve()
+        check_model_name(model_name)
+        path_to_client = (Path(MODELS[model_name]) / "client.zip").resolve()
         if not path_to_client.exists():
             raise HTTPException(status_code=500, detail="Could not find client.")
         return FileResponse(path_to_client, media_type="application/zip")
 
-    @app.post("/add_key")
-    async def add_key(key: UploadFile):
-        """Add public key.
+    @app.post("/models/{model_name:path}/add_key")
+    async def add_model_key(model_name: str, key: UploadFile):
+        """Add public key for a model.
 
         Arguments:
+            model_name (str): the name of the model
             key (UploadFile): public key
 
         Returns:
             Dict[str, str]
                 - uid: uid a personal uid
         """
-        uid = str(uuid.uuid4())
-        KEYS[uid] = await key.read()
-        return {"uid": uid}
+        return await add_key_from_chunks(model_name, iter_upload(key))
+
+    @app.post("/models/{model_name:path}/add_key_stream")
+    async def add_model_key_stream(model_name: str, request: Request):
+        """Add public key for a model, sent as the raw request body.
+
+        Arguments:
+            model_name (str): the name of the model
+            request (Request): the request, whose body is the public key
+
+        Returns:
+            Dict[str, str]
+                - uid: uid a personal uid
+        """
+        return await add_key_from_chunks(model_name, request.stream())
 
-    @app.post("/compute")
-    async def compute(model_input: UploadFile, uid: str = Form()):  # noqa: B008
-        """Compute the circuit over encrypted input.
+    @app.post("/models/{model_name:path}/compute")
+    async def compute_model(
+        model_name: str,
+        request: Request,
+        model_input: UploadFile,
+        uid: str = Form(),  # noqa: B008
+    ):
+        """Compute a model's circuit over encrypted input.
 
         Arguments:
+            model_name (str): the name of the model
+            request (Request): the request
             model_input (UploadFile): input of the circuit
             uid (str): uid of the public key to use
 
         Returns:
-            StreamingResponse: the result of the circuit
+            FileResponse: the result of the circuit
         """
-        key = KEYS[uid]
-        encrypted_results = fhe.run(
-            serialized_encrypted_quantized_data=await model_input.read(),
-            serialized_evaluation_keys=key,
-        )
-        return StreamingResponse(
-            io.BytesIO(encrypted_results),
-        )
+        return await compute_from_chunks(model_name, iter_upload(model_input), uid, request)
+
+    @app.post("/models/{model_name:path}/compute_stream")
+    async def compute_model_stream(model_name: str, request: Request, uid: str):
+        """Compute a model's circuit over encrypted input, sent as the raw request body.
+
+        Arguments:
+            model_name (str): the name of the model
+            request (Request): the request, whose body is the input of the circuit
+            uid (str): uid of the public key to use, given as a query parameter
+
+        Returns:
+            FileResponse: the result of the circuit
+        """
+        return await compute_from_chunks(model_name, request.stream(), uid, request)
+
+    if DEFAULT_MODEL_NAME is not None:
+
+        @app.get("/get_client")
+        def get_client():
+            """Get client.
+
+            Returns:
+                FileResponse: client.zip
+            """
+            return get_model_client(DEFAULT_MODEL_NAME)
+
+        @app.post("/add_key")
+        async def add_key(key: UploadFile):
+            """Add public key.
+
+            Arguments:
+                key (UploadFile): public key
+
+            Returns:
+                Dict[str, str]
+                    - uid: uid a personal uid
+            """
+            return await add_model_key(DEFAULT_MODEL_NAME, key)
+
+        @app.post("/add_key_stream")
+        async def add_key_stream(request: Request):
+            """Add public key, sent as the raw request body.
+
+            Arguments:
+                request (Request): the request, whose body is the public key
+
+            Returns:
+                Dict[str, str]
+                    - uid: uid a personal uid
+            """
+            return await add_model_key_stream(DEFAULT_MODEL_NAME, request)
+
+        @app.post("/compute")
+        async def compute(
+            request: Request, model_input: UploadFile, uid: str = Form()  # noqa: B008
+        ):
+            """Compute the circuit over encrypted input.
+
+            Arguments:
+                request (Request): the request
+                model_input (UploadFile): input of the circuit
+                uid (str): uid of the public key to use
+
+            Returns:
+                FileResponse: the result of the circuit
+            """
+            return await compute_model(DEFAULT_MODEL_NAME, request, model_input, uid)
+
+        @app.post("/compute_stream")
+        async def compute_stream(request: Request, uid: str):
+            """Compute the circuit over encrypted input, sent as the raw request body.
+
+            Arguments:
+                request (Request): the request, whose body is the input of the circuit
+                uid (str): uid of the public key to use, given as a query parameter
+
+            Returns:
+                FileResponse: the result of the circuit
+            """
+            return await compute_model_stream(DEFAULT_MODEL_NAME, request, uid)
+
+    @app.get("/metrics")
+    def metrics():
+        """Get the server's metrics.
+
+        Returns:
+            Dict[str, Any]
+                - pending_computations: the number of computations running or waiting
+                - pending_key_registrations: the number of keys being deserialized
+                - queue_depth: the number of computations waiting for their batch to be run
+                - running_batches: the number of batches sent to the workers
+                - batch_size_histogram: the number of batches run for each batch size
+                - load_metrics: the number of times each model was loaded by a worker and the
+                    total time spent loading it, in seconds
+        """
+        return {
+            "pending_computations": pending_computations,
+            "pending_key_registrations": len(pending_key_registrations),
+            **scheduler.get_metrics(),
+            "load_metrics": load_metrics,
+        }
 
     uvicorn.run(app, host="0.0.0.0", port=int(PORT))
@@ -214,7 +214,7 @@
 
 # Original file:
 # https://github.com/google/jax/blob/f6d329b2d9b5f83c6a59e5739aa1ca8d4d1ffa1c/examples/onnx2xla.py
-from typing import Any, Callable, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy
 import onnx
@@ -455,6 +455,61 @@ def get_op_type(node):
     return node.domain + ("" if node.domain == "" else ".") + node.op_type
 
 
+def get_tensors_to_free(
+    nodes_inputs: Sequence[Sequence[str]],
+    nodes_outputs: Sequence[Sequence[str]],
+    kept_tensor_names: Iterable[str] = (),
+) -> List[Tuple[str, ...]]:
+    """Determine, for each node of a graph, the tensors that are not needed once it has run.
+
+    A tensor is no longer needed after its last consumer, or after its producer if it is never
+    consumed. Freeing these tensors while executing a graph makes its peak memory proportional to
+    the largest set of tensors alive at the same time instead of the sum of all tensors.
+
+    Args:
+        nodes_inputs (Sequence[Sequence[str]]): The input tensor names of each node, in
+            execution order.
+        nodes_outputs (Sequence[Sequence[str]]): The output tensor names of each node, in
+            execution order.
+        kept_tensor_names (Iterable[str]): The tensors that should never be freed, typically the
+            graph's outputs.
+
+    Returns:
+        List[Tuple[str, ...]]: For each node, the names of the tensors that can be freed once it
+            has run.
+    """
+    last_node_indices: Dict[str, int] = {}
+    for node_index, (input_names, output_names) in enumerate(zip(nodes_inputs, nodes_outputs)):
+        for tensor_name in (*output_names, *input_names):
+            last_node_indices[tensor_name] = node_index
+
+    kept_tensor_names = set(kept_tensor_names)
+
+    tensors_to_free: List[List[str]] = [[] for _ in nodes_inputs]
+    for tensor_name, node_index in last_node_indices.items():
+        if tensor_name not in kept_tensor_names:
+            tensors_to_free[node_index].append(tensor_name)
+
+    return [tuple(tensor_names) for tensor_names in tensors_to_free]
+
+
+def _get_graph_tensors_to_free(graph: onnx.GraphProto) -> List[Tuple[str, ...]]:
+    """Determine, for each node of an ONNX graph, the tensors that are not needed once it has run.
+
+    Args:
+        graph (onnx.GraphProto): The ONNX graph.
+
+    Returns:
+        List[Tuple[str, ...]]: For each node, the names of the tensors that can be freed once it
+            has run.
+    """
+    return get_tensors_to_free(
+        [node.input for node in graph.node],
+        [node.output for node in graph.node],
+        (output.name for output in graph.output),
+    )
+
+
 def execute_onnx_with_numpy(
     graph: onnx.GraphProto,
     *inputs: numpy.ndarray,
@@ -475,12 +530,18 @@ def execute_onnx_with_numpy(
             for initializer in graph.initializer
         },
     )
-    for node in graph.node:
+    nodes_tensors_to_free = _get_graph_tensors_to_free(graph)
+
+    for node, tensors_to_free in zip(graph.node, nodes_tensors_to_free):
         curr_inputs = (node_results[input_name] for input_name in node.input)
         attributes = {attribute.name: get_attribute(attribute) for attribute in node.attribute}
         outputs = ONNX_OPS_TO_NUMPY_IMPL_BOOL[node.op_type](*curr_inputs, **attributes)
         node_results.update(zip(node.output, outputs))
 
+        # Drop the intermediate results that are not needed anymore
+        for tensor_name in tensors_to_free:
+            node_results.pop(tensor_name, None)
+
     return tuple(node_results[output.name] for output in graph.output)
 
 
@@ -519,7 +580,9 @@ def execute_onnx_with_numpy_trees(
         },
     )
 
-    for node in graph.node:
+    nodes_tensors_to_free = _get_graph_tensors_to_free(graph)
+
+    for node, tensors_to_free in zip(graph.node, nodes_tensors_to_free):
         curr_inputs = (node_results[input_name] for input_name in node.input)
         attributes = {attribute.name: get_attribute(attribute) for attribute in node.attribute}
 
@@ -538,6 +601,11 @@ def execute_onnx_with_numpy_trees(
         outputs = op_type(*curr_inputs, **attributes)
 
         node_results.update(zip(node.output, outputs))
+
+        # Drop the intermediate results that are not needed anymore
+        for tensor_name in tensors_to_free:
+            node_results.pop(tensor_name, None)
+
     return tuple(node_results[output.name] for output in graph.output)
 
 
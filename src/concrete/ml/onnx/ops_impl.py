@@ -7,7 +7,6 @@ from typing import Iterable, List, Optional, Sequence, Set, Tuple, Union
 import numpy
 import onnx
 import onnx.helper
-from brevitas.function import max_int, min_int
 from concrete.fhe import conv as fhe_conv
 from concrete.fhe import maxpool as fhe_maxpool
 from concrete.fhe import univariate
@@ -1813,6 +1812,10 @@ def numpy_brevitas_quant(
     y = x / scale
     y = y + zero_point
 
+    # Brevitas is only imported when running one of its quantizers, as it is slow to import
+    # pylint: disable-next=import-outside-toplevel
+    from brevitas.function import max_int, min_int
+
     # Clip the values to the correct range
     min_int_val = min_int(signed, narrow, bit_width)
     max_int_val = max_int(signed, narrow, bit_width)
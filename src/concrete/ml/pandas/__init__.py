@@ -1,7 +1,7 @@
 """Public API for encrypted data-frames."""
 
 from pathlib import Path
-from typing import Hashable, Optional, Sequence, Tuple, Union
+from typing import Callable, Hashable, Optional, Sequence, Tuple, Union
 
 from .client_engine import ClientEngine
 from .dataframe import EncryptedDataFrame
@@ -35,6 +35,8 @@ def merge(
     copy: Optional[bool] = None,
     indicator: Union[bool, str] = False,
     validate: Optional[str] = None,
+    n_jobs: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int, float], None]] = None,
 ) -> EncryptedDataFrame:
     """Merge two encrypted data-frames in FHE using Pandas parameters.
 
@@ -75,6 +77,12 @@ def merge(
             Default to False.
         validate (Optional[str]): Currently not supported, please keep the default value.
             Default to None.
+        n_jobs (Optional[int]): The number of worker processes to distribute the joined rows
+            over, following scikit-learn's convention. Default to None (rows are joined
+            sequentially).
+        progress_callback (Optional[Callable[[int, int, float], None]]): A function called
+            each time a row is joined, with the number of joined rows, the total number of rows
+            and the estimated remaining time in seconds. Default to None.
 
     Returns:
         EncryptedDataFrame: The joined encrypted data-frame.
@@ -92,4 +100,6 @@ def merge(
         copy=copy,
         indicator=indicator,
         validate=validate,
+        n_jobs=n_jobs,
+        progress_callback=progress_callback,
     )
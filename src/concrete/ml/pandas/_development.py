@@ -1,9 +1,10 @@
 """Define development methods for generating client/server files."""
 
+import inspect
 import itertools
 from functools import partial
 from pathlib import Path
-from typing import Dict, List, Tuple, Union
+from typing import Callable, Dict, List, Sequence, Tuple, Union
 
 from concrete.fhe.tracing import Tracer
 
@@ -18,6 +19,14 @@ SERVER_PATH = CLIENT_SERVER_DIR / "server.zip"
 
 N_BITS_PANDAS = 4
 
+# The (number of rows, number of columns) sizes of the right data-frame's blocks that can be joined
+# with a left key in a single FHE execution
+LEFT_RIGHT_JOIN_BLOCK_SIZES = [(2, 2), (4, 4), (8, 8)]
+
+# The scalar left/right join keeps the name Concrete gives to single circuits, so that encrypting,
+# running and decrypting without specifying any function still targets it
+LEFT_RIGHT_JOIN_FUNCTION_NAME = "main"
+
 
 def identity_pbs(value: Union[Tracer, int]) -> Union[Tracer, int]:
     """Define an identity TLU.
@@ -31,9 +40,21 @@ def identity_pbs(value: Union[Tracer, int]) -> Union[Tracer, int]:
     return fhe.univariate(lambda x: x)(value)
 
 
-@fhe.compiler(
-    {"val_1": "encrypted", "val_2": "encrypted", "left_key": "encrypted", "right_key": "encrypted"}
-)
+def select_on_condition(
+    value: Union[Tracer, int], condition: Union[Tracer, int]
+) -> Union[Tracer, int]:
+    """Define a bivariate TLU returning the value if the condition holds and 0 otherwise.
+
+    Args:
+        value (Union[Tracer, int]): The value to select.
+        condition (Union[Tracer, int]): The condition, either 0 or 1.
+
+    Returns:
+        Union[Tracer, int]: The value if the condition holds, else 0.
+    """
+    return fhe.multivariate(lambda value, condition: value * condition)(value, condition)
+
+
 def left_right_join_to_compile(
     val_1: Union[Tracer, int],
     val_2: Union[Tracer, int],
@@ -72,6 +93,99 @@ def left_right_join_to_compile(
     return sum_with_tlu
 
 
+def get_left_right_join_block_function_name(n_rows: int, n_columns: int) -> str:
+    """Get the name of the function joining a block of the right data-frame with a left key.
+
+    Args:
+        n_rows (int): The block's number of rows.
+        n_columns (int): The block's number of columns.
+
+    Returns:
+        str: The function's name.
+    """
+    return f"left_right_join_block_{n_rows}x{n_columns}"
+
+
+def get_left_right_join_block_to_compile(n_rows: int, n_columns: int) -> Callable:
+    """Build the function joining a block of the right data-frame with a left key in FHE.
+
+    This is the block version of 'left_right_join_to_compile': the left key is compared to the
+    'n_rows' right keys of the block only once, and the 'n_columns' accumulated sums are updated
+    in a single execution. Inputs are all encrypted scalars, ordered as follows:
+        * val_1_{j}, the values used for accumulating the sums, one for each column of the block
+        * left_key, the left data-frame's key
+        * right_key_{i}, the right data-frame's keys, one for each row of the block
+        * val_2_{i}_{j}, the right data-frame's values, in row-major order
+
+    Args:
+        n_rows (int): The block's number of rows.
+        n_columns (int): The block's number of columns.
+
+    Returns:
+        Callable: The function to compile, which returns the 'n_columns' new accumulated sums.
+    """
+    accumulator_names = [f"val_1_{j}" for j in range(n_columns)]
+    right_key_names = [f"right_key_{i}" for i in range(n_rows)]
+    value_names = [f"val_2_{i}_{j}" for i in range(n_rows) for j in range(n_columns)]
+
+    def left_right_join_block(**inputs: Union[Tracer, int]) -> Tuple[Union[Tracer, int], ...]:
+        conditions = [inputs["left_key"] == inputs[name] for name in right_key_names]
+
+        sums_with_tlu = []
+        for j, accumulator_name in enumerate(accumulator_names):
+            sum_on_condition = inputs[accumulator_name]
+
+            # Selecting the value with a single bivariate TLU is cheaper than multiplying it with
+            # the condition, which requires two TLUs
+            for i, condition in enumerate(conditions):
+                sum_on_condition = sum_on_condition + select_on_condition(
+                    inputs[f"val_2_{i}_{j}"], condition
+                )
+
+            # Adding an identity TLU is necessary here, else the function won't compile in FHE
+            sum_with_tlu = identity_pbs(sum_on_condition)
+            sums_with_tlu.append(sum_with_tlu)
+
+        return tuple(sums_with_tlu)
+
+    return _to_module_function(
+        left_right_join_block,
+        get_left_right_join_block_function_name(n_rows, n_columns),
+        accumulator_names + ["left_key"] + right_key_names + value_names,
+    )
+
+
+def _to_module_function(function: Callable, name: str, parameter_names: Sequence[str]):
+    """Turn a function into a Concrete module function with the given name and parameters.
+
+    Concrete identifies module functions by their name and inputs by their signature, which
+    therefore need to be set on functions that are built dynamically.
+
+    Args:
+        function (Callable): The function to consider, taking all its inputs as keyword arguments.
+        name (str): The function's name in the module.
+        parameter_names (Sequence[str]): The function's encrypted parameters' names, in order.
+
+    Returns:
+        FunctionDef: The Concrete module function.
+    """
+
+    def module_function(**inputs):
+        return function(**inputs)
+
+    module_function.__name__ = name
+    module_function.__signature__ = inspect.Signature(  # type: ignore[attr-defined]
+        [
+            inspect.Parameter(parameter_name, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+            for parameter_name in parameter_names
+        ]
+    )
+
+    return fhe.function({parameter_name: "encrypted" for parameter_name in parameter_names})(
+        module_function
+    )
+
+
 def get_left_right_join_max_value(n_bits: int) -> int:
     """Get the maximum value allowed in the data-frames for the left/right join operator.
 
@@ -107,11 +221,43 @@ def get_left_right_join_inputset(n_bits: int) -> List:
     return inputset
 
 
+def get_left_right_join_block_inputset(n_bits: int, n_rows: int, n_columns: int) -> List:
+    """Generate the input-set to use for compiling a block left/right join function.
+
+    As for the scalar left/right join, keys are assumed to be unique, meaning that at most one of
+    the block's right keys matches the left key.
+
+    Args:
+        n_bits (int): The maximum number of bits allowed for generating the input-set's values.
+        n_rows (int): The block's number of rows.
+        n_columns (int): The block's number of columns.
+
+    Returns:
+        List: The input-set.
+    """
+    high = get_left_right_join_max_value(n_bits)
+
+    inputset = []
+
+    # Consider every matching row in the block, or none (None), along with the extreme values
+    for val_1, val_2, left_key, matching_row in itertools.product(
+        [0, high], [0, high], [0, high], [None, *range(n_rows)]
+    ):
+        right_keys = [left_key if i == matching_row else high - left_key for i in range(n_rows)]
+        sample = [val_1] * n_columns + [left_key] + right_keys + [val_2] * (n_rows * n_columns)
+        inputset.append(tuple(sample))
+
+    return inputset
+
+
 # Store the configuration functions and parameters to their associated operator
 PANDAS_OPS_TO_CIRCUIT_CONFIG = {
     "left_right_join": {
         "get_inputset": partial(get_left_right_join_inputset, n_bits=N_BITS_PANDAS),
         "to_compile": left_right_join_to_compile,
+        "get_block_inputset": partial(get_left_right_join_block_inputset, n_bits=N_BITS_PANDAS),
+        "get_block_to_compile": get_left_right_join_block_to_compile,
+        "block_sizes": LEFT_RIGHT_JOIN_BLOCK_SIZES,
         "encrypt_config": {
             "n": 4,
             "pos": 1,
@@ -144,7 +290,7 @@ def get_min_max_allowed() -> Tuple[int, int]:
 
 
 def save_client_server(client_path: Path = CLIENT_PATH, server_path: Path = SERVER_PATH):
-    """Build the FHE circuit for all supported operators and save the client/server files.
+    """Build the FHE module for all supported operators and save the client/server files.
 
     Note that this function is not made public as the files are built and saved only once directly
     in the source.
@@ -160,16 +306,41 @@ def save_client_server(client_path: Path = CLIENT_PATH, server_path: Path = SERV
 
     config = PANDAS_OPS_TO_CIRCUIT_CONFIG["left_right_join"]
 
-    # Get the input-set and circuit generating functions
-    inputset = config["get_inputset"]()
-    cp_func = config["to_compile"]
-
-    # Compile the circuit and allow it to be composable with itself
-    merge_circuit = cp_func.compile(inputset, composable=True)
+    # Get the input-sets and functions of the scalar left/right join as well as its block versions,
+    # which are all gathered in a single module in order to share the same keys
+    functions = {
+        LEFT_RIGHT_JOIN_FUNCTION_NAME: _to_module_function(
+            config["to_compile"],
+            LEFT_RIGHT_JOIN_FUNCTION_NAME,
+            list(inspect.signature(config["to_compile"]).parameters),
+        )
+    }
+    inputsets = {LEFT_RIGHT_JOIN_FUNCTION_NAME: config["get_inputset"]()}
+
+    for n_rows, n_columns in config["block_sizes"]:
+        function_name = get_left_right_join_block_function_name(n_rows, n_columns)
+        functions[function_name] = config["get_block_to_compile"](n_rows, n_columns)
+        inputsets[function_name] = config["get_block_inputset"](n_rows=n_rows, n_columns=n_columns)
+
+    merge_module_to_compile = fhe.module()(type("LeftRightJoinModule", (), functions))
+
+    # Compile the module, whose functions are composable with each other. Concrete only supports
+    # the V0 parameter selection strategy for modules, which requires a PBS error probability. This
+    # one keeps the probability of error of each joined value close to the one of the scalar
+    # circuit compiled alone with Concrete's default global error probability (1 / 100_000)
+    merge_module = merge_module_to_compile.compile(
+        inputsets,
+        fhe.Configuration(
+            composable=True,
+            parameter_selection_strategy=fhe.ParameterSelectionStrategy.V0,
+            p_error=2**-18,
+            global_p_error=None,
+        ),
+    )
 
     # Save the client and server files using the MLIR
-    merge_circuit.client.save(client_path)
-    merge_circuit.server.save(server_path, via_mlir=True)
+    merge_module.runtime.client.save(client_path)
+    merge_module.runtime.server.save(server_path, via_mlir=True)
 
 
 def load_server() -> fhe.Server:
@@ -1,12 +1,24 @@
 """Implement Pandas operators in FHE using encrypted data-frames."""
 
-from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+import json
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
 
 import numpy
 import pandas
-from concrete.fhe import Server
+from concrete.fhe import EvaluationKeys, Server, Value
 from pandas.core.reshape.merge import _MergeOperation
 
+from concrete.ml.common.utils import get_n_jobs
+from concrete.ml.pandas._development import (
+    LEFT_RIGHT_JOIN_BLOCK_SIZES,
+    get_left_right_join_block_function_name,
+)
+
 # List of Pandas parameters per operator that are not currently supported
 UNSUPPORTED_PANDAS_PARAMETERS = {
     "merge": {
@@ -21,6 +33,9 @@ UNSUPPORTED_PANDAS_PARAMETERS = {
     },
 }
 
+# The server, evaluation keys and right data-frame's values loaded once in each join worker process
+_JOIN_WORKER_STATE: Dict[str, Any] = {}
+
 
 def check_parameter_is_supported(parameter: Any, parameter_name: str, operator: str):
     """Check that the given Pandas parameter is supported by the Concrete ML operator.
@@ -94,13 +109,274 @@ def check_dtype_of_selected_column_for_merge(left_encrypted, right_encrypted, se
         )
 
 
-# pylint: disable-next=invalid-name
+def get_server_left_right_join_block_sizes(server: Server) -> List[Tuple[int, int]]:
+    """Get the sizes of the block left/right join functions provided by a server.
+
+    Servers built before the block functions were introduced only provide the scalar join.
+
+    Args:
+        server (Server): The Concrete server to consider.
+
+    Returns:
+        List[Tuple[int, int]]: The (number of rows, number of columns) sizes of the blocks that the
+            server can join in a single FHE execution.
+    """
+    client_parameters = json.loads(server.client_specs.client_parameters.serialize())
+    function_names = {circuit["name"] for circuit in client_parameters["circuits"]}
+
+    return [
+        (n_rows, n_columns)
+        for n_rows, n_columns in LEFT_RIGHT_JOIN_BLOCK_SIZES
+        if get_left_right_join_block_function_name(n_rows, n_columns) in function_names
+    ]
+
+
+def get_left_right_join_block_size(
+    n_rows_right: int,
+    n_columns_right: int,
+    block_sizes: Sequence[Tuple[int, int]] = tuple(LEFT_RIGHT_JOIN_BLOCK_SIZES),
+) -> Optional[Tuple[int, int]]:
+    """Choose the size of the right data-frame's blocks to join with each left key in FHE.
+
+    The largest block that fits in the right data-frame is chosen, as fewer FHE executions are then
+    needed while padding the blocks only adds a few NaN values to process.
+
+    Args:
+        n_rows_right (int): The right data-frame's number of rows.
+        n_columns_right (int): The right data-frame's number of columns to join, which excludes the
+            column to merge on.
+        block_sizes (Sequence[Tuple[int, int]]): The available (number of rows, number of columns)
+            block sizes. Default to all the block sizes the left/right join is compiled for.
+
+    Returns:
+        Optional[Tuple[int, int]]: The (number of rows, number of columns) size of the blocks, or
+            None if no block fits and values should be joined one at a time.
+    """
+    fitting_block_sizes = [
+        (n_rows, n_columns)
+        for n_rows, n_columns in block_sizes
+        if n_rows <= n_rows_right and n_columns <= n_columns_right
+    ]
+
+    return max(fitting_block_sizes, key=lambda size: size[0] * size[1], default=None)
+
+
+def _join_right_row(
+    left_key: Value,
+    right_values: numpy.ndarray,
+    right_nan: Value,
+    right_key_column_position: int,
+    server: Server,
+    evaluation_keys: EvaluationKeys,
+    block_size: Optional[Tuple[int, int]] = None,
+) -> List[Value]:
+    """Compute in FHE the right data-frame's values to join with a single left row.
+
+    Args:
+        left_key (Value): The left row's encrypted key to merge on.
+        right_values (numpy.ndarray): The right data-frame's encrypted values.
+        right_nan (Value): The encrypted value representing a NaN.
+        right_key_column_position (int): The position of the right column to merge on.
+        server (Server): The Concrete server to use for running the computations in FHE.
+        evaluation_keys (EvaluationKeys): The evaluation keys to use for running the computations.
+        block_size (Optional[Tuple[int, int]]): The (number of rows, number of columns) size of
+            the right data-frame's blocks to join in a single FHE execution. Default to None
+            (values are joined one at a time).
+
+    Returns:
+        List[Value]: The encrypted values to join, one for each right column but the merged one.
+    """
+    if block_size is not None:
+        return _join_right_row_by_blocks(
+            left_key,
+            right_values,
+            right_nan,
+            right_key_column_position,
+            server,
+            evaluation_keys,
+            block_size,
+        )
+
+    n_rows_right, n_columns_right = right_values.shape
+
+    right_row_to_join = []
+
+    # Loop over the right data-frame's number of columns
+    for j_right in range(n_columns_right):
+
+        # Skip the right's index column
+        if j_right == right_key_column_position:
+            continue
+
+        # Default value is NaN
+        right_value_to_join = right_nan
+
+        # Loop over the right data-frame's number of rows in order to check if one row's key
+        # matches the on-going left key
+        for i_right in range(n_rows_right):
+
+            # Retrieve the right data-frame's value to sum if both keys match
+            value_to_put_right = right_values[i_right, j_right]
+
+            # Retrieve the right data frame's key to merge on
+            right_key = right_values[i_right, right_key_column_position]
+
+            merge_inputs = (right_value_to_join, value_to_put_right, left_key, right_key)
+
+            # Run the FHE execution:
+            # - on the first iteration, this is applied on a 0 (representing a NaN) and the
+            #   right data-frame's value
+            # - on the following iterations, this is applied between the previous accumulated
+            # value and the right data-frame's value.
+            # Basically, if both keys match, the function adds the accumulated value with the
+            # right data-frame's value. If they don't, it just adds 0 to the accumulated value.
+            # In practice, keys only match once throughout this very loop as keys are assumed to
+            # be unique on both data-frames.
+            right_value_to_join = server.run(*merge_inputs, evaluation_keys=evaluation_keys)
+
+        right_row_to_join.append(right_value_to_join)
+
+    return right_row_to_join
+
+
+def _join_right_row_by_blocks(
+    left_key: Value,
+    right_values: numpy.ndarray,
+    right_nan: Value,
+    right_key_column_position: int,
+    server: Server,
+    evaluation_keys: EvaluationKeys,
+    block_size: Tuple[int, int],
+) -> List[Value]:
+    """Compute in FHE the right values to join with a single left row, one block at a time.
+
+    Each FHE execution compares the left key with a block of right keys and updates the values to
+    join for a block of right columns, instead of a single value. The values are therefore
+    accumulated over the right data-frame's row blocks, as done over its rows in '_join_right_row'.
+    Blocks that exceed the right data-frame are padded with NaN values, which are never added.
+
+    Args:
+        left_key (Value): The left row's encrypted key to merge on.
+        right_values (numpy.ndarray): The right data-frame's encrypted values.
+        right_nan (Value): The encrypted value representing a NaN.
+        right_key_column_position (int): The position of the right column to merge on.
+        server (Server): The Concrete server to use for running the computations in FHE.
+        evaluation_keys (EvaluationKeys): The evaluation keys to use for running the computations.
+        block_size (Tuple[int, int]): The (number of rows, number of columns) size of the blocks.
+
+    Returns:
+        List[Value]: The encrypted values to join, one for each right column but the merged one.
+    """
+    n_rows_block, n_columns_block = block_size
+    function_name = get_left_right_join_block_function_name(n_rows_block, n_columns_block)
+
+    # Pad the right data-frame with NaN values so that it can be split in full blocks, skipping the
+    # right's index column
+    n_rows_right = right_values.shape[0]
+    right_keys = right_values[:, right_key_column_position]
+    right_values_to_join = numpy.delete(right_values, right_key_column_position, axis=1)
+    n_columns_right = right_values_to_join.shape[1]
+
+    n_padded_rows = -n_rows_right % n_rows_block
+    n_padded_columns = -n_columns_right % n_columns_block
+
+    right_keys = numpy.concatenate((right_keys, [right_nan] * n_padded_rows))
+    right_values_to_join = numpy.pad(
+        right_values_to_join,
+        ((0, n_padded_rows), (0, n_padded_columns)),
+        constant_values=right_nan,
+    )
+
+    right_row_to_join: List[Value] = []
+
+    # Loop over the right data-frame's column blocks
+    for j_right in range(0, right_values_to_join.shape[1], n_columns_block):
+
+        # Default values are NaN
+        right_block_to_join = [right_nan] * n_columns_block
+
+        # Loop over the right data-frame's row blocks in order to check if one row's key matches
+        # the on-going left key
+        for i_right in range(0, right_values_to_join.shape[0], n_rows_block):
+            block_keys = right_keys[i_right : i_right + n_rows_block]
+            block_values = right_values_to_join[
+                i_right : i_right + n_rows_block, j_right : j_right + n_columns_block
+            ]
+
+            merge_inputs = (*right_block_to_join, left_key, *block_keys, *block_values.flatten())
+
+            right_block_to_join = list(
+                server.run(
+                    *merge_inputs, evaluation_keys=evaluation_keys, function_name=function_name
+                )
+            )
+
+        right_row_to_join.extend(right_block_to_join)
+
+    # Remove the values computed for the padded columns
+    return right_row_to_join[:n_columns_right]
+
+
+def _init_join_worker(
+    server_path: str,
+    serialized_evaluation_keys: bytes,
+    serialized_right_values: numpy.ndarray,
+    serialized_right_nan: bytes,
+    right_key_column_position: int,
+    block_size: Optional[Tuple[int, int]],
+) -> None:
+    """Load the server, evaluation keys and right data-frame once in a join worker process.
+
+    Args:
+        server_path (str): The path where the server is saved.
+        serialized_evaluation_keys (bytes): The serialized evaluation keys.
+        serialized_right_values (numpy.ndarray): The right data-frame's serialized values.
+        serialized_right_nan (bytes): The serialized encrypted value representing a NaN.
+        right_key_column_position (int): The position of the right column to merge on.
+        block_size (Optional[Tuple[int, int]]): The size of the right data-frame's blocks to join
+            in a single FHE execution, if any.
+    """
+    _JOIN_WORKER_STATE["server"] = Server.load(Path(server_path))
+    _JOIN_WORKER_STATE["evaluation_keys"] = EvaluationKeys.deserialize(serialized_evaluation_keys)
+    _JOIN_WORKER_STATE["right_values"] = numpy.vectorize(Value.deserialize, otypes=[object])(
+        serialized_right_values
+    )
+    _JOIN_WORKER_STATE["right_nan"] = Value.deserialize(serialized_right_nan)
+    _JOIN_WORKER_STATE["right_key_column_position"] = right_key_column_position
+    _JOIN_WORKER_STATE["block_size"] = block_size
+
+
+def _run_join_worker(serialized_left_key: bytes) -> List[bytes]:
+    """Compute the right values to join with a single left row in a join worker process.
+
+    Args:
+        serialized_left_key (bytes): The left row's serialized encrypted key to merge on.
+
+    Returns:
+        List[bytes]: The serialized encrypted values to join.
+    """
+    right_row_to_join = _join_right_row(
+        Value.deserialize(serialized_left_key),
+        _JOIN_WORKER_STATE["right_values"],
+        _JOIN_WORKER_STATE["right_nan"],
+        _JOIN_WORKER_STATE["right_key_column_position"],
+        _JOIN_WORKER_STATE["server"],
+        _JOIN_WORKER_STATE["evaluation_keys"],
+        _JOIN_WORKER_STATE["block_size"],
+    )
+
+    return [right_value.serialize() for right_value in right_row_to_join]
+
+
+# pylint: disable-next=too-many-locals, invalid-name
 def encrypted_left_right_join(
     left_encrypted,
     right_encrypted,
     server: Server,
     how: str,
     on: Optional[str],
+    n_jobs: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int, float], None]] = None,
 ) -> numpy.ndarray:
     """Compute a left/right join in FHE between two encrypted data-frames using Pandas parameters.
 
@@ -118,6 +394,15 @@ def encrypted_left_right_join(
     to know the number of columns and rows at compilation time. More details can be found in the
     '_development.py' file.
 
+    When the right data-frame is large enough, the left key is instead compared to a block of right
+    keys and a block of right columns is joined in a single execution, using one of the block
+    functions compiled along the scalar one. This divides the number of executions by the blocks'
+    size.
+
+    As the values to join with each left row are computed independently, the left rows can be
+    distributed over several worker processes. Each worker loads the server, the evaluation keys
+    and the right data-frame once and then only receives the left keys to merge on.
+
     Args:
         left_encrypted (EncryptedDataFrame): The left encrypted data-frame.
         right_encrypted (EncryptedDataFrame): The right encrypted data-frame.
@@ -129,6 +414,12 @@ def encrypted_left_right_join(
             preserve key order.
         on (Optional[str]): Column name to join on. These must be found in both DataFrames. If it is
             None then this defaults to the intersection of the columns in both DataFrames.
+        n_jobs (Optional[int]): The number of worker processes to distribute the rows over,
+            following scikit-learn's convention. Default to None (rows are joined sequentially in
+            the current process).
+        progress_callback (Optional[Callable[[int, int, float], None]]): A function called each
+            time a row is joined, with the number of joined rows, the total number of rows and the
+            estimated remaining time in seconds. Default to None.
 
     Returns:
         numpy.ndarray: The values representing the joined encrypted data-frame.
@@ -140,20 +431,89 @@ def encrypted_left_right_join(
     if how == "right":
         left_encrypted, right_encrypted = right_encrypted, left_encrypted
 
-    joined_rows = []
-
     # Retrieve the left and right column's position on which keys to merge
     left_key_column_position = left_encrypted.column_names_to_position[on]
     right_key_column_position = right_encrypted.column_names_to_position[on]
 
-    # Retrieve the number of useful rows and columns
+    # Retrieve the number of useful rows
     n_rows_left = left_encrypted.encrypted_values.shape[0]
-    n_columns_right = right_encrypted.encrypted_values.shape[1]
-    n_rows_right = right_encrypted.encrypted_values.shape[0]
+    n_rows_right, n_columns_right = right_encrypted.encrypted_values.shape
+
+    # Choose the size of the right data-frame's blocks to join in a single FHE execution among the
+    # ones the server provides, without counting the column to merge on
+    block_size = get_left_right_join_block_size(
+        n_rows_right, n_columns_right - 1, get_server_left_right_join_block_sizes(server)
+    )
+
+    # Retrieve the left data frame's keys to merge on
+    left_keys = left_encrypted.encrypted_values[:, left_key_column_position]
+
+    right_rows_to_join: List[Optional[List[Value]]] = [None] * n_rows_left
+
+    start_time = time.time()
+
+    def report_progress(n_rows_joined: int):
+        if progress_callback is not None:
+            elapsed_time = time.time() - start_time
+            remaining_time = elapsed_time / n_rows_joined * (n_rows_left - n_rows_joined)
+            progress_callback(n_rows_joined, n_rows_left, remaining_time)
+
+    n_workers = min(get_n_jobs(n_jobs), n_rows_left)
+
+    if n_workers <= 1:
+        for i_left in range(n_rows_left):
+            right_rows_to_join[i_left] = _join_right_row(
+                left_keys[i_left],
+                right_encrypted.encrypted_values,
+                right_encrypted.encrypted_nan,
+                right_key_column_position,
+                server,
+                left_encrypted.evaluation_keys,
+                block_size,
+            )
+            report_progress(i_left + 1)
+
+    else:
+        with tempfile.TemporaryDirectory() as temp_dir:
+
+            # Servers can't be pickled, the workers therefore load it from disk
+            server_path = Path(temp_dir) / "server.zip"
+            server.save(server_path)
+
+            # The 'spawn' start method is used as forking a process that holds the FHE runtime's
+            # threads is not safe. Threads can't be used either as the FHE runtime does not release
+            # the GIL
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_join_worker,
+                initargs=(
+                    str(server_path),
+                    left_encrypted.evaluation_keys.serialize(),
+                    numpy.vectorize(Value.serialize, otypes=[object])(
+                        right_encrypted.encrypted_values
+                    ),
+                    right_encrypted.encrypted_nan.serialize(),
+                    right_key_column_position,
+                    block_size,
+                ),
+            ) as executor:
+                futures = {
+                    executor.submit(_run_join_worker, left_key.serialize()): i_left
+                    for i_left, left_key in enumerate(left_keys)
+                }
+
+                for n_rows_joined, future in enumerate(as_completed(futures), start=1):
+                    right_rows_to_join[futures[future]] = [
+                        Value.deserialize(right_value) for right_value in future.result()
+                    ]
+                    report_progress(n_rows_joined)
+
+    joined_rows = []
 
     # Loop over the left data frame's number of rows (which will become the joined data frame's
     # number of rows)
-    for i_left in range(n_rows_left):
+    for i_left, right_row_to_join in enumerate(right_rows_to_join):
 
         # For left merge, all left values are exactly equal to the left data-frame
         array_joined_i_left = left_encrypted.encrypted_values[i_left, :]
@@ -170,47 +530,7 @@ def encrypted_left_right_join(
 
         left_row_to_join = array_joined_i_left.tolist()
 
-        # Retrieve the left data frame's key to merge on
-        left_key = left_encrypted.encrypted_values[i_left, left_key_column_position]
-
-        right_row_to_join = []
-
-        # Loop over the right data-frame's number of columns
-        for j_right in range(n_columns_right):
-
-            # Skip the right's index column
-            if j_right == right_key_column_position:
-                continue
-
-            # Default value is NaN
-            right_value_to_join = right_encrypted.encrypted_nan
-
-            # Loop over the right data-frame's number of rows in order to check if one row's key
-            # matches the on-going left key
-            for i_right in range(n_rows_right):
-
-                # Retrieve the right data-frame's value to sum if both keys match
-                value_to_put_right = right_encrypted.encrypted_values[i_right, j_right]
-
-                # Retrieve the right data frame's key to merge on
-                right_key = right_encrypted.encrypted_values[i_right, right_key_column_position]
-
-                merge_inputs = (right_value_to_join, value_to_put_right, left_key, right_key)
-
-                # Run the FHE execution:
-                # - on the first iteration, this is applied on a 0 (representing a NaN) and the
-                #   right data-frame's value
-                # - on the following iterations, this is applied between the previous accumulated
-                # value and the right data-frame's value.
-                # Basically, if both keys match, the function adds the accumulated value with the
-                # right data-frame's value. If they don't, it just adds 0 to the accumulated value.
-                # In practice, keys only match once throughout this very loop as keys are assumed to
-                # be unique on both data-frames.
-                right_value_to_join = server.run(
-                    *merge_inputs, evaluation_keys=left_encrypted.evaluation_keys
-                )
-
-            right_row_to_join.append(right_value_to_join)
+        assert right_row_to_join is not None
 
         # In case of a right merge, since data-frames wee initially swapped, swap back the values
         # when re-building the joined data-frame
@@ -255,6 +575,8 @@ def encrypted_merge(
     copy: Optional[bool] = None,
     indicator: Union[bool, str] = False,
     validate: Optional[str] = None,
+    n_jobs: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int, float], None]] = None,
 ) -> Tuple[numpy.ndarray, List[str], Dict]:
     """Merge two encrypted data-frames in FHE using Pandas parameters.
 
@@ -295,6 +617,11 @@ def encrypted_merge(
             Default to False.
         validate (Optional[str]): Currently not supported, please keep the default value. Default
             to None.
+        n_jobs (Optional[int]): The number of worker processes to distribute the joined rows over,
+            following scikit-learn's convention. Default to None (rows are joined sequentially).
+        progress_callback (Optional[Callable[[int, int, float], None]]): A function called each
+            time a row is joined, with the number of joined rows, the total number of rows and the
+            estimated remaining time in seconds. Default to None.
 
     Raises:
         ValueError: If the merge is expected to be done on multiple columns.
@@ -369,7 +696,13 @@ def encrypted_merge(
     # Add a way to ensure that 'selected_column' only contains unique values in both data-frames
     # FIXME: https://github.com/zama-ai/concrete-ml-internal/issues/4342
     joined_array = encrypted_left_right_join(
-        left_encrypted, right_encrypted, server, how, selected_column
+        left_encrypted,
+        right_encrypted,
+        server,
+        how,
+        selected_column,
+        n_jobs=n_jobs,
+        progress_callback=progress_callback,
     )
 
     return joined_array, joined_column_names, joined_dtype_mappings
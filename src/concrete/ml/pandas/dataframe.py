@@ -1,8 +1,9 @@
 """Define the encrypted data-frame framework."""
 
 import json
+import struct
 from pathlib import Path
-from typing import Dict, Hashable, List, Optional, Sequence, Tuple, Union
+from typing import IO, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
 from zipfile import ZIP_STORED, ZipFile
 
 import numpy
@@ -24,6 +25,18 @@ from concrete.ml.pandas._utils import (
 
 _SERVER = load_server()
 
+# The names of the files stored in the columnar format's archive. Each column file contains the
+# column's encrypted values as raw serialized blobs, each prefixed by its length
+_COLUMNAR_METADATA_FILE = "metadata.json"
+_COLUMNAR_INDEX_FILE = "offsets"
+_COLUMNAR_NAN_FILE = "encrypted_nan"
+_COLUMNAR_COLUMN_FILE = "columns/{}"
+_EVALUATION_KEYS_FILE = "evaluation_keys"
+
+# The blobs' length prefixes and offsets are stored as unsigned 64-bit little-endian integers
+_LENGTH_FORMAT = "<Q"
+_LENGTH_SIZE = struct.calcsize(_LENGTH_FORMAT)
+
 
 class EncryptedDataFrame:
     """Define an encrypted data-frame framework that supports Pandas operators and parameters."""
@@ -183,6 +196,8 @@ class EncryptedDataFrame:
         copy: Optional[bool] = None,
         indicator: Union[bool, str] = False,
         validate: Optional[str] = None,
+        n_jobs: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int, float], None]] = None,
     ):
         """Merge two encrypted data-frames in FHE using Pandas parameters.
 
@@ -222,6 +237,12 @@ class EncryptedDataFrame:
                 Default to False.
             validate (Optional[str]): Currently not supported, please keep the default value.
                 Default to None.
+            n_jobs (Optional[int]): The number of worker processes to distribute the joined rows
+                over, following scikit-learn's convention. Default to None (rows are joined
+                sequentially).
+            progress_callback (Optional[Callable[[int, int, float], None]]): A function called
+                each time a row is joined, with the number of joined rows, the total number of rows
+                and the estimated remaining time in seconds. Default to None.
 
         Returns:
             EncryptedDataFrame: The joined encrypted data-frame.
@@ -241,6 +262,8 @@ class EncryptedDataFrame:
             copy=copy,
             indicator=indicator,
             validate=validate,
+            n_jobs=n_jobs,
+            progress_callback=progress_callback,
         )
 
         # Once multi-operator is supported, make sure to provide relevant keys and objects
@@ -313,29 +336,155 @@ class EncryptedDataFrame:
             api_version,
         )
 
-    def save(self, path: Union[Path, str]):
+    def _write_columnar(self, zip_file: ZipFile):
+        """Write the encrypted data-frame in an archive using the binary columnar format.
+
+        Values are serialized and written one at a time, column after column, along with the
+        offsets of the values in their column file.
+
+        Args:
+            zip_file (ZipFile): The archive, opened in write mode.
+        """
+        n_rows, n_columns = self._encrypted_values.shape
+        offsets = numpy.zeros((n_columns, n_rows), dtype=numpy.uint64)
+
+        for j_column in range(n_columns):
+            with zip_file.open(
+                _COLUMNAR_COLUMN_FILE.format(j_column), "w", force_zip64=True
+            ) as column_file:
+                offset = 0
+
+                for i_row in range(n_rows):
+                    serialized_value = self._encrypted_values[i_row, j_column].serialize()
+
+                    offsets[j_column, i_row] = offset
+                    column_file.write(struct.pack(_LENGTH_FORMAT, len(serialized_value)))
+                    column_file.write(serialized_value)
+
+                    offset += _LENGTH_SIZE + len(serialized_value)
+
+        metadata = {
+            "n_rows": n_rows,
+            "column_names": self._column_names,
+            "dtype_mappings": self._dtype_mappings,
+            "api_version": self._api_version,
+        }
+
+        zip_file.writestr(_COLUMNAR_METADATA_FILE, json.dumps(metadata).encode(encoding="utf-8"))
+        zip_file.writestr(_COLUMNAR_INDEX_FILE, offsets.astype("<u8").tobytes())
+        zip_file.writestr(_COLUMNAR_NAN_FILE, self._encrypted_nan.serialize())
+        zip_file.writestr(_EVALUATION_KEYS_FILE, serialize_evaluation_keys(self._evaluation_keys))
+
+    @staticmethod
+    def _read_value(column_file: IO[bytes]) -> fhe.Value:
+        """Read a length-prefixed encrypted value from a column file.
+
+        Args:
+            column_file (IO[bytes]): The column file, positioned at the value's length prefix.
+
+        Returns:
+            fhe.Value: The deserialized encrypted value.
+
+        Raises:
+            ValueError: If the column file is truncated.
+        """
+        length_bytes = column_file.read(_LENGTH_SIZE)
+
+        if len(length_bytes) != _LENGTH_SIZE:
+            raise ValueError("Encrypted data-frame file is truncated.")
+
+        (length,) = struct.unpack(_LENGTH_FORMAT, length_bytes)
+        serialized_value = column_file.read(length)
+
+        if len(serialized_value) != length:
+            raise ValueError("Encrypted data-frame file is truncated.")
+
+        return fhe.Value.deserialize(serialized_value)
+
+    @classmethod
+    def _read_columnar(cls, zip_file: ZipFile):
+        """Read an encrypted data-frame from an archive using the binary columnar format.
+
+        Column files are read one value at a time, so that serialized values are never all held in
+        memory.
+
+        Args:
+            zip_file (ZipFile): The archive, opened in read mode.
+
+        Returns:
+            EncryptedDataFrame: The loaded encrypted data-frame.
+
+        Raises:
+            ValueError: If a column file does not match the offset index.
+        """
+        metadata = json.loads(zip_file.read(_COLUMNAR_METADATA_FILE))
+        n_rows, n_columns = metadata["n_rows"], len(metadata["column_names"])
+
+        offsets = numpy.frombuffer(zip_file.read(_COLUMNAR_INDEX_FILE), dtype="<u8").reshape(
+            n_columns, n_rows
+        )
+
+        encrypted_values = numpy.empty((n_rows, n_columns), dtype=object)
+
+        for j_column in range(n_columns):
+            with zip_file.open(_COLUMNAR_COLUMN_FILE.format(j_column)) as column_file:
+                for i_row in range(n_rows):
+                    if column_file.tell() != offsets[j_column, i_row]:
+                        raise ValueError(
+                            f"Column {j_column} of the encrypted data-frame file does not match "
+                            "its offset index."
+                        )
+
+                    encrypted_values[i_row, j_column] = cls._read_value(column_file)
+
+        encrypted_nan = fhe.Value.deserialize(zip_file.read(_COLUMNAR_NAN_FILE))
+        evaluation_keys = deserialize_evaluation_keys(zip_file.read(_EVALUATION_KEYS_FILE))
+
+        return cls(
+            encrypted_values,
+            encrypted_nan,
+            evaluation_keys,
+            metadata["column_names"],
+            metadata["dtype_mappings"],
+            metadata["api_version"],
+        )
+
+    def save(self, path: Union[Path, str], columnar: bool = True):
         """Save the encrypted data-frame on disk.
 
+        By default, the encrypted values are stored column by column as raw binary blobs, along with
+        an index of their offsets. Otherwise, they are stored as hexadecimal strings in a JSON file,
+        as done in previous versions, which is about twice as large and slower to save and load.
+
         Args:
             path (Union[Path, str]): The path where to save the encrypted data-frame.
+            columnar (bool): If the binary columnar format should be used instead of the JSON
+                format. Default to True.
         """
         path = Path(path)
 
         if path.suffix != ".zip":
             path = path.with_suffix(".zip")
 
+        if columnar:
+            with ZipFile(path, "w", compression=ZIP_STORED, allowZip64=True) as zip_file:
+                self._write_columnar(zip_file)
+            return
+
         encrypted_df_dict, evaluation_keys = self._to_dict_and_eval_keys()
 
         encrypted_df_json_bytes = json.dumps(encrypted_df_dict).encode(encoding="utf-8")
 
         with ZipFile(path, "w", compression=ZIP_STORED, allowZip64=True) as zip_file:
             zip_file.writestr("encrypted_dataframe.json", encrypted_df_json_bytes)
-            zip_file.writestr("evaluation_keys", evaluation_keys)
+            zip_file.writestr(_EVALUATION_KEYS_FILE, evaluation_keys)
 
     @classmethod
     def load(cls, path: Union[Path, str]):
         """Load an encrypted data-frame from disk.
 
+        Both the binary columnar and JSON formats are supported.
+
         Args:
             path (Union[Path, str]): The path where to load the encrypted data-frame.
 
@@ -348,11 +497,14 @@ class EncryptedDataFrame:
             path = path.with_suffix(".zip")
 
         with ZipFile(path, "r", compression=ZIP_STORED, allowZip64=True) as zip_file:
+            if _COLUMNAR_METADATA_FILE in zip_file.namelist():
+                return cls._read_columnar(zip_file)
+
             with zip_file.open("encrypted_dataframe.json") as encrypted_df_json_file:
                 encrypted_df_json_bytes = encrypted_df_json_file.read()
                 encrypted_df_dict = json.loads(encrypted_df_json_bytes)
 
-            with zip_file.open("evaluation_keys") as evaluation_keys_file:
+            with zip_file.open(_EVALUATION_KEYS_FILE) as evaluation_keys_file:
                 evaluation_keys = evaluation_keys_file.read()
 
         return cls._from_dict_and_eval_keys(encrypted_df_dict, evaluation_keys)
@@ -1564,3 +1564,27 @@ class Conv1dModel(nn.Module):
         x = self.bn1(x)
         x = self.fc1(x)
         return x
+
+
+class TwinBranchesModel(nn.Module):
+    """Model with two identical branches applied to the same input, followed by a linear layer."""
+
+    def __init__(self, input_shape: int, output_shape: int):
+        super().__init__()
+
+        self.branch_1 = nn.Linear(input_shape, input_shape)
+        self.branch_2 = nn.Linear(input_shape, input_shape)
+        self.branch_2.load_state_dict(self.branch_1.state_dict())
+        self.fc = nn.Linear(input_shape, output_shape)
+
+    def forward(self, x):
+        """Forward pass.
+
+        Args:
+            x (torch.Tensor): The model's input.
+
+        Returns:
+            torch.Tensor: The model's output.
+        """
+        x = torch.relu(self.branch_1(x)) + torch.relu(self.branch_2(x))
+        return self.fc(x)
@@ -775,7 +775,7 @@ class QuantizedOp:
         outputs = impl_func(*inputs) if not self._has_attr else impl_func(*inputs, **attrs)
         assert_true(
             isinstance(outputs, tuple),
-            f"The output of {impl_func.__name__} needs to be a tuple. Got {outputs}",
+            f"The output of {impl_func.__name__} needs to be a tuple. Got {type(outputs)}",
         )
         num_outputs = len(outputs)
         assert_true(
@@ -10,7 +10,12 @@ from onnx import numpy_helper
 
 from ..common.debugging import assert_true
 from ..common.utils import process_rounding_threshold_bits
-from ..onnx.onnx_utils import ONNX_OPS_TO_NUMPY_IMPL, get_attribute, get_op_type
+from ..onnx.onnx_utils import (
+    ONNX_OPS_TO_NUMPY_IMPL,
+    get_attribute,
+    get_op_type,
+    get_tensors_to_free,
+)
 from ..onnx.ops_impl import RawOpOutput
 from ..torch.numpy_module import NumpyModule
 from .base_quantized_op import (
@@ -508,7 +513,15 @@ class ONNXConverter:
             graph_input.name: {graph_input.name} for graph_input in graph.input
         }
 
-        for node in graph.node:
+        # Calibration data is dropped as soon as no remaining node uses it, so that the memory
+        # used by this pass is bounded by the largest set of tensors alive at the same time
+        nodes_tensors_to_free = get_tensors_to_free(
+            [node.input for node in graph.node],
+            [node.output for node in graph.node],
+            graph_output_names,
+        )
+
+        for node, tensors_to_free in zip(graph.node, nodes_tensors_to_free):
             op_type = get_op_type(node)
 
             attributes = {attribute.name: get_attribute(attribute) for attribute in node.attribute}
@@ -681,6 +694,11 @@ class ONNXConverter:
                 node_results[output_name] = node_output[0]
                 constants.add(output_name)
 
+            # Constant nodes have no inputs, so skipping this step for them above only keeps the
+            # outputs that are never used
+            for tensor_name in tensors_to_free:
+                node_results.pop(tensor_name, None)
+
     def quantize_module(self, *calibration_data: numpy.ndarray) -> QuantizedModule:
         """Quantize numpy module.
 
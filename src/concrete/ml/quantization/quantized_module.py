@@ -3,7 +3,19 @@
 import copy
 import re
 from functools import partial
-from typing import Any, Dict, Generator, Iterable, List, Optional, Sequence, TextIO, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
 
 import numpy
 import onnx
@@ -12,6 +24,7 @@ from concrete.fhe.compilation.circuit import Circuit
 from concrete.fhe.compilation.compiler import Compiler
 from concrete.fhe.compilation.configuration import Configuration
 
+from ..common.compilation_cache import compile_with_cache
 from ..common.debugging import assert_true
 from ..common.serialization.dumpers import dump, dumps
 from ..common.utils import (
@@ -23,10 +36,14 @@ from ..common.utils import (
     all_values_are_integers,
     all_values_are_of_dtype,
     check_there_is_no_p_error_options_in_configuration,
+    encrypt_run_decrypt_in_parallel,
     generate_proxy_function,
+    get_circuit_batch_size,
     manage_parameters_for_pbs_errors,
+    pad_batch,
     to_tuple,
 )
+from ..onnx.onnx_utils import get_tensors_to_free
 from .base_quantized_op import ONNXOpInputOutputType, QuantizedOp
 from .quantized_ops import QuantizedReduceSum
 from .quantizers import QuantizedArray, UniformQuantizer
@@ -80,6 +97,184 @@ def _get_inputset_generator(q_inputs: Union[numpy.ndarray, Tuple[numpy.ndarray,
     return (numpy.expand_dims(q_input, 0) for q_input in q_inputs[0])
 
 
+def _get_batched_inputset_generator(
+    q_inputs: Union[numpy.ndarray, Tuple[numpy.ndarray, ...]], batch_size: int
+) -> Generator:
+    """Create an input set generator that groups the examples in batches of fixed size.
+
+    Since all examples are used, the circuit compiled with this input set sees the same value
+    ranges, and thus the same bit-widths, as the one compiled with `_get_inputset_generator`.
+
+    Args:
+        q_inputs (Union[numpy.ndarray, Tuple[numpy.ndarray, ...]]): The quantized inputs.
+        batch_size (int): The number of examples in each batch.
+
+    Returns:
+        Generator: The input set generator with batches of shape (batch_size, ...).
+    """
+    q_inputs = to_tuple(q_inputs)
+
+    assert len(q_inputs) > 0, "The input-set cannot be empty"
+
+    n_examples = q_inputs[0].shape[0]
+
+    batches = (
+        tuple(pad_batch(q_input[start : start + batch_size], batch_size) for q_input in q_inputs)
+        for start in range(0, n_examples, batch_size)
+    )
+
+    if len(q_inputs) > 1:
+        return batches
+
+    # Else, there's only a single input (q_inputs, )
+    return (batch[0] for batch in batches)
+
+
+def _get_simulation_method(circuit: Circuit) -> Callable:
+    """Get the method to use for simulating the given circuit.
+
+    Args:
+        circuit (Circuit): The compiled circuit to simulate.
+
+    Returns:
+        Callable: The simulation method.
+    """
+    is_crt_encoding = circuit.statistics["packing_key_switch_count"] != 0
+
+    # If the virtual library method should be used
+    # For now, use the virtual library when simulating
+    # circuits that use CRT  encoding because the official simulation is too slow
+    # FIXME: https://github.com/zama-ai/concrete-ml-internal/issues/4391
+    if USE_OLD_VL or is_crt_encoding:
+        return partial(circuit.graph, p_error=circuit.p_error)  # pragma: no cover
+
+    # Else, use the official simulation method
+    return circuit.simulate
+
+
+def _simulate_in_batches(circuit: Circuit, *q_x: numpy.ndarray) -> Tuple[numpy.ndarray, ...]:
+    """Simulate a circuit compiled with a batch dimension on all examples, batch by batch.
+
+    The examples are split in batches of the size the circuit was compiled for, the last one being
+    padded if needed. Outputs of padded examples are removed from the results.
+
+    Args:
+        circuit (Circuit): The circuit compiled for inputs of shape (batch_size, ...).
+        *q_x (numpy.ndarray): The quantized inputs, with the examples as their first dimension.
+
+    Returns:
+        Tuple[numpy.ndarray, ...]: The simulated outputs of all examples.
+    """
+    batch_size = get_circuit_batch_size(circuit)
+    n_examples = q_x[0].shape[0]
+
+    simulation_method = _get_simulation_method(circuit)
+
+    q_result_by_output: List[List[numpy.ndarray]] = []
+    for start in range(0, n_examples, batch_size):
+        q_batch = tuple(
+            pad_batch(q_input[start : start + batch_size], batch_size) for q_input in q_x
+        )
+        n_valid_examples = min(batch_size, n_examples - start)
+
+        q_result = to_tuple(simulation_method(*q_batch))
+
+        if not q_result_by_output:
+            q_result_by_output = [[] for _ in q_result]
+
+        for elt_index, elt in enumerate(q_result):
+            q_result_by_output[elt_index].append(elt[:n_valid_examples])
+
+    return tuple(numpy.concatenate(elt, axis=0) for elt in q_result_by_output)
+
+
+class _ClearForwardPlan:
+    """Plan for executing a QuantizedModule's graph in the clear.
+
+    The plan is built once and re-used across calls. Tensors are stored in a list of slots whose
+    indices are resolved beforehand, instead of being looked up by name in a dictionary, and the
+    input QuantizedArray objects are created from templates that already hold the input quantizers.
+    """
+
+    def __init__(self, quantized_module: "QuantizedModule"):
+        # Keep the objects the plan is built from, in order to detect if any of them is replaced
+        self.input_quantizers = tuple(quantized_module.input_quantizers)
+        self.quant_layers_dict = quantized_module.quant_layers_dict
+        self.ordered_module_input_names = quantized_module.ordered_module_input_names
+        self.ordered_module_output_names = quantized_module.ordered_module_output_names
+
+        self.input_templates = tuple(
+            QuantizedArray(
+                input_quantizer.n_bits,
+                None,
+                value_is_float=False,
+                options=input_quantizer.quant_options,
+                stats=input_quantizer.quant_stats,
+                params=input_quantizer.quant_params,
+            )
+            for input_quantizer in self.input_quantizers
+        )
+
+        # The first slot always holds None, which is given to layers for optional inputs that are
+        # not provided
+        slot_indices = {
+            input_name: slot_index
+            for slot_index, input_name in enumerate(self.ordered_module_input_names, start=1)
+        }
+
+        # Intermediate results are freed once their last consumer has run, so that the memory
+        # used by a forward pass is bounded by the largest set of tensors alive at the same time
+        layers_tensors_to_free = get_tensors_to_free(
+            [input_names for input_names, _ in self.quant_layers_dict.values()],
+            [(output_name,) for output_name in self.quant_layers_dict],
+            self.ordered_module_output_names,
+        )
+
+        self.steps: List[
+            Tuple[QuantizedOp, Tuple[str, ...], Tuple[int, ...], int, Tuple[int, ...]]
+        ] = []
+        for (output_name, (input_names, layer)), tensors_to_free in zip(
+            self.quant_layers_dict.items(), layers_tensors_to_free
+        ):
+            input_slots = tuple(slot_indices.get(input_name, 0) for input_name in input_names)
+            slot_indices[output_name] = len(slot_indices) + 1
+            slots_to_free = tuple(
+                slot_indices[tensor_name]
+                for tensor_name in tensors_to_free
+                if tensor_name in slot_indices
+            )
+            self.steps.append(
+                (layer, input_names, input_slots, slot_indices[output_name], slots_to_free)
+            )
+
+        self.output_slots = tuple(
+            slot_indices[output_name] for output_name in self.ordered_module_output_names
+        )
+        self.n_slots = len(slot_indices) + 1
+
+    def is_valid_for(self, quantized_module: "QuantizedModule") -> bool:
+        """Check if the plan still matches the given module's graph and input quantizers.
+
+        Args:
+            quantized_module (QuantizedModule): The module to check.
+
+        Returns:
+            bool: Whether the plan can be used for executing the module.
+        """
+        return (
+            self.quant_layers_dict is quantized_module.quant_layers_dict
+            and self.ordered_module_input_names is quantized_module.ordered_module_input_names
+            and self.ordered_module_output_names is quantized_module.ordered_module_output_names
+            and len(self.input_quantizers) == len(quantized_module.input_quantizers)
+            and all(
+                plan_quantizer is module_quantizer
+                for plan_quantizer, module_quantizer in zip(
+                    self.input_quantizers, quantized_module.input_quantizers
+                )
+            )
+        )
+
+
 class QuantizedModule:
     """Inference for a quantized model."""
 
@@ -128,9 +323,11 @@ class QuantizedModule:
         self.input_quantizers: List[UniformQuantizer] = []
         self.output_quantizers: List[UniformQuantizer] = []
         self.fhe_circuit: Optional[Circuit] = None
+        self.fhe_simulation_circuit: Optional[Circuit] = None
         self._is_compiled = False
         self._onnx_model = onnx_model
         self._post_processing_params: Dict[str, Any] = {}
+        self._clear_forward_plan: Optional[_ClearForwardPlan] = None
 
         # Initialize output quantizers based on quant_layers_dict
         if self.quant_layers_dict:
@@ -438,45 +635,50 @@ class QuantizedModule:
 
         """
 
-        q_inputs = [
-            QuantizedArray(
-                self.input_quantizers[idx].n_bits,
-                q_x[idx],
-                value_is_float=False,
-                options=self.input_quantizers[idx].quant_options,
-                stats=self.input_quantizers[idx].quant_stats,
-                params=self.input_quantizers[idx].quant_params,
-            )
-            for idx in range(len(self.input_quantizers))
-        ]
+        # Build the execution plan once, and only re-build it if the graph or input quantizers
+        # were replaced since then
+        if self._clear_forward_plan is None or not self._clear_forward_plan.is_valid_for(self):
+            self._clear_forward_plan = _ClearForwardPlan(self)
 
-        # Init layer_results with the inputs
-        layer_results: Dict[str, ONNXOpInputOutputType] = dict(
-            zip(self.ordered_module_input_names, q_inputs)
-        )
+        plan = self._clear_forward_plan
+
+        layer_results: List[ONNXOpInputOutputType] = [None] * plan.n_slots
+
+        # Wrap the inputs in quantized arrays, avoiding to re-build their quantizers
+        for slot_index, (input_template, q_input) in enumerate(
+            zip(plan.input_templates, q_x), start=1
+        ):
+            q_input_array = copy.copy(input_template)
+            q_input_array.qvalues = (
+                q_input.copy() if isinstance(q_input, numpy.ndarray) else q_input
+            )
+            q_input_array.dequant()
+            layer_results[slot_index] = q_input_array
 
         bad_qat_ops: List[Tuple[str, str]] = []
-        for output_name, (input_names, layer) in self.quant_layers_dict.items():
-            inputs = (layer_results.get(input_name, None) for input_name in input_names)
+        error_tracker: List[int] = []
+        for layer, input_names, input_slots, output_slot, slots_to_free in plan.steps:
+            inputs = (layer_results[input_slot] for input_slot in input_slots)
 
-            error_tracker: List[int] = []
             layer.error_tracker = error_tracker
-            output = layer(*inputs)
+            layer_results[output_slot] = layer(*inputs)
             layer.error_tracker = None
 
+            for slot_index in slots_to_free:
+                layer_results[slot_index] = None
+
             if len(error_tracker) > 0:
                 # The error message contains the ONNX tensor name that
                 # triggered this error
                 for input_idx in error_tracker:
                     bad_qat_ops.append((input_names[input_idx], str(layer.__class__.op_type())))
-
-            layer_results[output_name] = output
+                error_tracker.clear()
 
         if len(bad_qat_ops) > 0:
             _raise_qat_import_error(bad_qat_ops)
 
         output_quantized_arrays = tuple(
-            layer_results[output_name] for output_name in self.ordered_module_output_names
+            layer_results[output_slot] for output_slot in plan.output_slots
         )
 
         # The output of a graph must be a QuantizedArray
@@ -511,49 +713,28 @@ class QuantizedModule:
             "The quantized module is not compiled. Please run compile(...) first before "
             "executing it in FHE.",
         )
-        q_result_by_output: List[List[numpy.ndarray]] = [[] for _ in self.output_quantizers]
-        for i in range(q_x[0].shape[0]):
-
-            # Extract example i from every element in the tuple q_x
-            q_input = tuple(q_x[input][[i]] for input in range(len(q_x)))
-
-            # For mypy
-            assert self.fhe_circuit is not None
+        # For mypy
+        assert self.fhe_circuit is not None
 
-            # If the inference should be executed using simulation
-            if simulate:
-                is_crt_encoding = self.fhe_circuit.statistics["packing_key_switch_count"] != 0
+        if simulate:
 
-                # If the virtual library method should be used
-                # For now, use the virtual library when simulating
-                # circuits that use CRT  encoding because the official simulation is too slow
-                # FIXME: https://github.com/zama-ai/concrete-ml-internal/issues/4391
-                if USE_OLD_VL or is_crt_encoding:
-                    predict_method = partial(
-                        self.fhe_circuit.graph, p_error=self.fhe_circuit.p_error
-                    )  # pragma: no cover
+            # If a circuit was compiled for simulating batches of examples, use it instead of the
+            # one compiled for FHE execution
+            if self.fhe_simulation_circuit is not None:
+                q_results = _simulate_in_batches(self.fhe_simulation_circuit, *q_x)
 
-                # Else, use the official simulation method
-                else:
-                    predict_method = self.fhe_circuit.simulate
-
-            # Else, use the FHE execution method
             else:
-                predict_method = self.fhe_circuit.encrypt_run_decrypt
-
-            # Execute the forward pass in FHE or with simulation
-            q_result = to_tuple(predict_method(*q_input))
+                q_results = _simulate_in_batches(self.fhe_circuit, *q_x)
 
-            assert len(q_result) == len(q_result_by_output), (
-                "Number of outputs does not match the number of output quantizers.\n"
-                f"{len(q_result)=}!={len(self.output_quantizers)=}"
-            )
-            for elt_index, elt in enumerate(q_result):
-                q_result_by_output[elt_index].append(elt)
+        # Else, execute the examples in FHE, batch by batch
+        else:
+            q_results = to_tuple(encrypt_run_decrypt_in_parallel(self.fhe_circuit, *q_x))
 
-        q_results: Tuple[numpy.ndarray, ...] = tuple(
-            numpy.concatenate(elt, axis=0) for elt in q_result_by_output
+        assert len(q_results) == len(self.output_quantizers), (
+            "Number of outputs does not match the number of output quantizers.\n"
+            f"{len(q_results)=}!={len(self.output_quantizers)=}"
         )
+
         if len(q_results) == 1:
             return q_results[0]
         return q_results
@@ -637,6 +818,8 @@ class QuantizedModule:
         global_p_error: Optional[float] = None,
         verbose: bool = False,
         inputs_encryption_status: Optional[Sequence[str]] = None,
+        simulation_batch_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
     ) -> Circuit:
         """Compile the module's forward function.
 
@@ -660,6 +843,14 @@ class QuantizedModule:
                 during compilation. Default to False.
             inputs_encryption_status (Optional[Sequence[str]]): encryption status ('clear',
                 'encrypted') for each input.
+            simulation_batch_size (Optional[int]): If set, an additional circuit is compiled for
+                simulating this many examples at once, which makes FHE simulation on large data-sets
+                a lot faster. This circuit uses the same probability of error per PBS as the one
+                used for FHE execution. Default to None.
+            batch_size (Optional[int]): If set, the circuit is compiled for executing this many
+                examples at once, which amortizes the cost of encryption, execution and decryption
+                over the batch. Inputs are then split in batches of this size, the last one being
+                padded if needed. Default to None, which compiles the circuit for a single example.
 
         Returns:
             Circuit: The compiled Circuit.
@@ -714,6 +905,17 @@ class QuantizedModule:
                     f"At least one input should be encrypted but got {inputs_encryption_status}"
                 )
 
+        for batch_size_name, batch_size_value in [
+            ("simulation_batch_size", simulation_batch_size),
+            ("batch_size", batch_size),
+        ]:
+            assert_true(
+                batch_size_value is None
+                or (isinstance(batch_size_value, int) and batch_size_value > 0),
+                f"{batch_size_name} must be a strictly positive integer. Got {batch_size_value}",
+                ValueError,
+            )
+
         assert inputs_encryption_status is not None  # For mypy
         inputs_encryption_status_dict = dict(
             zip(orig_args_to_proxy_func_args.values(), inputs_encryption_status)
@@ -724,11 +926,17 @@ class QuantizedModule:
             parameter_encryption_statuses=inputs_encryption_status_dict,
         )
 
+        # Reset the simulation circuit for double compile
+        self.fhe_simulation_circuit = None
+
         # Quantize the inputs
         q_inputs = self.quantize_input(*inputs)
 
         # Generate the input-set with proper dimensions
-        inputset = _get_inputset_generator(q_inputs)
+        if batch_size is None:
+            inputset = _get_inputset_generator(q_inputs)
+        else:
+            inputset = _get_batched_inputset_generator(q_inputs, batch_size)
 
         # Check that p_error or global_p_error is not set in both the configuration and in the
         # direct parameters
@@ -739,7 +947,8 @@ class QuantizedModule:
 
         # Jit compiler is now deprecated and will soon be removed, it is thus forced to False
         # by default
-        self.fhe_circuit = compiler.compile(
+        self.fhe_circuit = compile_with_cache(
+            compiler,
             inputset,
             configuration=configuration,
             artifacts=artifacts,
@@ -752,6 +961,26 @@ class QuantizedModule:
             fhe_execution=True,
         )
 
+        if simulation_batch_size is not None:
+            # A new compiler is needed as the function is traced with inputs of a different shape.
+            # Setting the p_error actually used by the circuit makes the simulation of batches
+            # statistically equivalent to the simulation of each example separately
+            batched_compiler = Compiler(
+                forward_proxy,
+                parameter_encryption_statuses=inputs_encryption_status_dict,
+            )
+            self.fhe_simulation_circuit = compile_with_cache(
+                batched_compiler,
+                _get_batched_inputset_generator(q_inputs, simulation_batch_size),
+                configuration=configuration,
+                p_error=self.fhe_circuit.p_error,
+                global_p_error=None,
+                verbose=verbose,
+                single_precision=False,
+                fhe_simulation=True,
+                fhe_execution=False,
+            )
+
         self._is_compiled = True
 
         return self.fhe_circuit
@@ -3,7 +3,8 @@
 # pylint: disable=too-many-lines
 from __future__ import annotations
 
-from copy import deepcopy
+from copy import copy, deepcopy
+from functools import lru_cache
 from typing import Any, Dict, Optional, TextIO, Union, get_type_hints
 
 import numpy
@@ -16,6 +17,22 @@ from ..common.utils import QUANT_ROUND_LIKE_ROUND_PBS, array_allclose_and_same_s
 STABILITY_CONST = 10**-6
 
 
+@lru_cache(maxsize=None)
+def _get_members_type_hints(klass) -> Dict[str, Any]:
+    """Get the type hints of a parameter set structure's members.
+
+    Resolving type hints is costly and these structures are filled each time a QuantizedArray is
+    created, so the type hints are only resolved once per structure type.
+
+    Args:
+        klass: the type of the parameter set structure
+
+    Returns:
+        Dict[str, Any]: the type hints of the structure's members
+    """
+    return get_type_hints(klass)
+
+
 def fill_from_kwargs(obj, klass, **kwargs):
     """Fill a parameter set structure from kwargs parameters.
 
@@ -35,7 +52,7 @@ def fill_from_kwargs(obj, klass, **kwargs):
     """
 
     # Get the members of the parameter set structure
-    hints = get_type_hints(klass)
+    hints = _get_members_type_hints(klass)
 
     # Keep track of the parameters that were used
     list_args_used = []
@@ -841,7 +858,8 @@ class QuantizedArray:
         **kwargs,
     ):
         # If no options were passed, create a default options structure with the required n_bits
-        options = deepcopy(options) if options is not None else QuantizationOptions(n_bits)
+        # Options only hold scalar attributes, so a shallow copy is enough
+        options = copy(options) if options is not None else QuantizationOptions(n_bits)
 
         # Override the options number of bits if an options structure was provided
         # with the number of bits specified by the caller.
@@ -895,8 +913,7 @@ class QuantizedArray:
             if isinstance(values, numpy.ndarray):
                 assert_true(
                     numpy.issubdtype(values.dtype, numpy.floating),
-                    "Values must be float if value_is_float is set to True, "
-                    f"got {values.dtype}: {values}",
+                    f"Values must be float if value_is_float is set to True, got {values.dtype}",
                 )
 
             if isinstance(values, numpy.ndarray):
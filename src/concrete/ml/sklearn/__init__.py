@@ -1,6 +1,9 @@
 """Import sklearn models."""
 
-from typing import Dict, List, Optional, Union
+import importlib
+import warnings
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 from ..common.debugging.custom_assert import assert_true
 from ..common.utils import (
@@ -8,29 +11,99 @@ from ..common.utils import (
     is_classifier_or_partial_classifier,
     is_regressor_or_partial_regressor,
 )
-from .base import (
-    _ALL_SKLEARN_MODELS,
-    _LINEAR_MODELS,
-    _NEIGHBORS_MODELS,
-    _NEURALNET_MODELS,
-    _TREE_MODELS,
-)
-from .glm import GammaRegressor, PoissonRegressor, TweedieRegressor
-from .linear_model import (
-    ElasticNet,
-    Lasso,
-    LinearRegression,
-    LogisticRegression,
-    Ridge,
-    SGDClassifier,
-    SGDRegressor,
-)
-from .neighbors import KNeighborsClassifier
-from .qnn import NeuralNetClassifier, NeuralNetRegressor
-from .rf import RandomForestClassifier, RandomForestRegressor
-from .svm import LinearSVC, LinearSVR
-from .tree import DecisionTreeClassifier, DecisionTreeRegressor
-from .xgb import XGBClassifier, XGBRegressor
+
+# Map each built-in model to the module that defines it. Models are only imported when they are
+# first accessed, as some of them depend on libraries that are slow to import (e.g., xgboost,
+# skorch or brevitas)
+_MODELS_MODULES: Dict[str, str] = {
+    "DecisionTreeClassifier": "tree",
+    "DecisionTreeRegressor": "tree",
+    "ElasticNet": "linear_model",
+    "GammaRegressor": "glm",
+    "KNeighborsClassifier": "neighbors",
+    "Lasso": "linear_model",
+    "LinearRegression": "linear_model",
+    "LinearSVC": "svm",
+    "LinearSVR": "svm",
+    "LogisticRegression": "linear_model",
+    "NeuralNetClassifier": "qnn",
+    "NeuralNetRegressor": "qnn",
+    "PoissonRegressor": "glm",
+    "RandomForestClassifier": "rf",
+    "RandomForestRegressor": "rf",
+    "Ridge": "linear_model",
+    "SGDClassifier": "linear_model",
+    "SGDRegressor": "linear_model",
+    "TweedieRegressor": "glm",
+    "XGBClassifier": "xgb",
+    "XGBRegressor": "xgb",
+}
+
+__all__ = sorted(_MODELS_MODULES)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .glm import GammaRegressor, PoissonRegressor, TweedieRegressor
+    from .linear_model import (
+        ElasticNet,
+        Lasso,
+        LinearRegression,
+        LogisticRegression,
+        Ridge,
+        SGDClassifier,
+        SGDRegressor,
+    )
+    from .neighbors import KNeighborsClassifier
+    from .qnn import NeuralNetClassifier, NeuralNetRegressor
+    from .rf import RandomForestClassifier, RandomForestRegressor
+    from .svm import LinearSVC, LinearSVR
+    from .tree import DecisionTreeClassifier, DecisionTreeRegressor
+    from .xgb import XGBClassifier, XGBRegressor
+
+
+def _import_models_module(module_name: str) -> ModuleType:
+    """Import a module defining built-in models.
+
+    Args:
+        module_name (str): The name of the module, relative to this package.
+
+    Returns:
+        ModuleType: The imported module.
+    """
+    # Silence the warnings raised when importing some dependencies, such as xgboost or hummingbird
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return importlib.import_module(f".{module_name}", __name__)
+
+
+def __getattr__(name: str) -> Any:
+    """Import a built-in model the first time it is accessed.
+
+    Args:
+        name (str): The name of the attribute to retrieve.
+
+    Returns:
+        Any: The built-in model.
+
+    Raises:
+        AttributeError: If the attribute is not a built-in model.
+    """
+    if name not in _MODELS_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    model_class = getattr(_import_models_module(_MODELS_MODULES[name]), name)
+
+    # Store the model in the module so that it is directly found next time
+    globals()[name] = model_class
+    return model_class
+
+
+def __dir__() -> List[str]:
+    """List the module's attributes, including the built-in models that are not imported yet.
+
+    Returns:
+        List[str]: The module's attributes.
+    """
+    return sorted(set(globals()) | set(_MODELS_MODULES))
 
 
 def _get_sklearn_models() -> Dict[str, List]:
@@ -40,9 +113,18 @@ def _get_sklearn_models() -> Dict[str, List]:
         sklearn_models (Dict[str, List]): The lists of scikit-learn models available in Concrete ML.
     """
 
-    # Import anything in sklearn, just to force the import, to populate _ALL_SKLEARN_MODELS list
-    # pylint: disable-next=unused-import, import-outside-toplevel, cyclic-import, redefined-outer-name  # noqa: E501
-    from .linear_model import LinearRegression  # noqa: F401, F811
+    # Import all models, in order to populate the _ALL_SKLEARN_MODELS list
+    for module_name in sorted(set(_MODELS_MODULES.values())):
+        _import_models_module(module_name)
+
+    # pylint: disable-next=import-outside-toplevel
+    from .base import (
+        _ALL_SKLEARN_MODELS,
+        _LINEAR_MODELS,
+        _NEIGHBORS_MODELS,
+        _NEURALNET_MODELS,
+        _TREE_MODELS,
+    )
 
     # We return sorted lists such that it is ordered, to avoid notably issues when it is used
     # in @pytest.mark.parametrize
@@ -11,17 +11,26 @@ import tempfile
 # pylint: disable=too-many-lines,invalid-name
 import warnings
 from abc import ABC, abstractmethod
-from functools import partial
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Set, TextIO, Type, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Type,
+    Union,
+)
 
-import brevitas.nn as qnn
 import numpy
 import onnx
 import sklearn
-import skorch.net
 import torch
-from brevitas.export.onnx.qonnx.manager import QONNXManager as BrevitasONNXManager
 from concrete.fhe.compilation.artifacts import DebugArtifacts
 from concrete.fhe.compilation.circuit import Circuit
 from concrete.fhe.compilation.compiler import Compiler
@@ -35,13 +44,15 @@ from sklearn.utils.validation import check_is_fitted
 from concrete import fhe as cp
 
 from ..common.check_inputs import check_array_and_assert, check_X_y_and_assert_multi_output
+from ..common.compilation_cache import compile_with_cache
 from ..common.debugging.custom_assert import assert_true
 from ..common.serialization.dumpers import dump, dumps
 from ..common.utils import (
-    USE_OLD_VL,
     FheMode,
     check_there_is_no_p_error_options_in_configuration,
+    encrypt_run_decrypt_in_parallel,
     generate_proxy_function,
+    iter_data_chunks,
     manage_parameters_for_pbs_errors,
 )
 from ..onnx.convert import OPSET_VERSION_FOR_ONNX_EXPORT
@@ -57,22 +68,47 @@ from ..quantization import (
     _inspect_tree_n_bits,
     get_n_bits_dict,
 )
-from ..quantization.quantized_module import QuantizedModule, _get_inputset_generator
+from ..quantization.quantized_module import (
+    QuantizedModule,
+    _get_batched_inputset_generator,
+    _get_inputset_generator,
+    _simulate_in_batches,
+)
 from ..quantization.quantizers import (
     QuantizationOptions,
     UniformQuantizationParameters,
     UniformQuantizer,
 )
 from ..torch import NumpyModule
-from .qnn_module import SparseQuantNeuralNetwork
-from .tree_to_numpy import tree_to_numpy
 
-# Disable pylint to import Hummingbird while ignoring the warnings
-# pylint: disable=wrong-import-position,wrong-import-order
+# Brevitas, Skorch and Hummingbird are only needed to train models or to build their ONNX graph.
+# They are imported when needed, so that importing a model, for instance to load it in a
+# client/server setting, stays fast
+if TYPE_CHECKING:  # pragma: no cover
+    import skorch.net
+
+    from .qnn_module import SparseQuantNeuralNetwork
+
 # Silence Hummingbird warnings
 warnings.filterwarnings("ignore")
-from hummingbird.ml import convert as hb_convert  # noqa: E402
-from hummingbird.ml.operator_converters import constants  # noqa: E402
+
+
+def _get_hummingbird_convert() -> Callable:
+    """Import Hummingbird's conversion function.
+
+    Returns:
+        Callable: Hummingbird's `convert` function.
+    """
+    # Silence Hummingbird warnings, which may be turned into errors by filters set after this
+    # module was imported
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+
+        # pylint: disable-next=import-outside-toplevel
+        from hummingbird.ml import convert as hb_convert
+
+    return hb_convert
+
 
 _ALL_SKLEARN_MODELS: Set[Type] = set()
 _LINEAR_MODELS: Set[Type] = set()
@@ -158,6 +194,7 @@ class BaseEstimator:
         self._is_compiled: bool = False
 
         self.fhe_circuit_: Optional[Circuit] = None
+        self.fhe_simulation_circuit_: Optional[Circuit] = None
         self.onnx_model_: Optional[onnx.ModelProto] = None
 
     def __getattr__(self, attr: str):
@@ -275,6 +312,21 @@ class BaseEstimator:
         assert isinstance(self.fhe_circuit_, Circuit) or self.fhe_circuit_ is None
         return self.fhe_circuit_
 
+    @property
+    def fhe_simulation_circuit(self) -> Optional[Circuit]:
+        """Get the FHE circuit used for simulating batches of examples.
+
+        Is None if the model was not compiled with a `simulation_batch_size`.
+
+        Returns:
+            Circuit: The FHE simulation circuit.
+        """
+        assert (
+            isinstance(self.fhe_simulation_circuit_, Circuit)
+            or self.fhe_simulation_circuit_ is None
+        )
+        return self.fhe_simulation_circuit_
+
     def _sklearn_model_is_not_fitted_error_message(self) -> str:
         return (
             f"The underlying model (class: {self.sklearn_model_class}) is not fitted and thus "
@@ -504,6 +556,8 @@ class BaseEstimator:
         p_error: Optional[float] = None,
         global_p_error: Optional[float] = None,
         verbose: bool = False,
+        simulation_batch_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
     ) -> Circuit:
         """Compile the model.
 
@@ -526,12 +580,21 @@ class BaseEstimator:
                 currently set to 0. Default to None, which sets this error to a default value.
             verbose (bool): Indicate if compilation information should be printed
                 during compilation. Default to False.
+            simulation_batch_size (Optional[int]): If set, an additional circuit is compiled for
+                simulating this many examples at once, which makes FHE simulation on large data-sets
+                a lot faster. This circuit uses the same probability of error per PBS as the one
+                used for FHE execution. Default to None.
+            batch_size (Optional[int]): If set, the circuit is compiled for executing this many
+                examples at once, which amortizes the cost of encryption, execution and decryption
+                over the batch. Inputs are then split in batches of this size, the last one being
+                padded if needed. Default to None, which compiles the circuit for a single example.
 
         Returns:
             Circuit: The compiled Circuit.
         """
         # Reset for double compile
         self._is_compiled = False
+        self.fhe_simulation_circuit_ = None
 
         # Check that the model is correctly fitted
         self.check_model_is_fitted()
@@ -549,7 +612,15 @@ class BaseEstimator:
         q_X = self.quantize_input(X)
 
         # Generate the compilation input-set with proper dimensions
-        inputset = _get_inputset_generator(q_X)
+        if batch_size is None:
+            inputset = _get_inputset_generator(q_X)
+        else:
+            assert_true(
+                isinstance(batch_size, int) and batch_size > 0,
+                f"batch_size must be a strictly positive integer. Got {batch_size}",
+                ValueError,
+            )
+            inputset = _get_batched_inputset_generator(q_X, batch_size)
 
         # Retrieve the compiler instance
         module_to_compile = self._get_module_to_compile()
@@ -562,7 +633,8 @@ class BaseEstimator:
 
         # Jit compiler is now deprecated and will soon be removed, it is thus forced to False
         # by default
-        self.fhe_circuit_ = module_to_compile.compile(
+        self.fhe_circuit_ = compile_with_cache(
+            module_to_compile,
             inputset,
             configuration=configuration,
             artifacts=artifacts,
@@ -575,6 +647,32 @@ class BaseEstimator:
             fhe_execution=True,
         )
 
+        if simulation_batch_size is not None:
+            assert_true(
+                isinstance(simulation_batch_size, int) and simulation_batch_size > 0,
+                "simulation_batch_size must be a strictly positive integer. Got "
+                f"{simulation_batch_size}",
+                ValueError,
+            )
+
+            # A new compiler is needed as the function is traced with inputs of a different shape.
+            # Setting the p_error actually used by the circuit makes the simulation of batches
+            # statistically equivalent to the simulation of each example separately
+            batched_module_to_compile = self._get_module_to_compile()
+            assert isinstance(batched_module_to_compile, Compiler)
+
+            self.fhe_simulation_circuit_ = compile_with_cache(
+                batched_module_to_compile,
+                _get_batched_inputset_generator(q_X, simulation_batch_size),
+                configuration=configuration,
+                p_error=self.fhe_circuit_.p_error,
+                global_p_error=None,
+                verbose=verbose,
+                single_precision=False,
+                fhe_simulation=True,
+                fhe_execution=False,
+            )
+
         self._is_compiled = True
 
         # For mypy
@@ -593,7 +691,12 @@ class BaseEstimator:
             numpy.ndarray: The quantized predicted values.
         """
 
-    def predict(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         """Predict values for X, in FHE or in the clear.
 
         Args:
@@ -604,6 +707,9 @@ class BaseEstimator:
                 FheMode.SIMULATE for FHE simulation and FheMode.EXECUTE for actual FHE execution.
                 Can also be the string representation of any of these values.
                 Default to FheMode.DISABLE.
+            n_jobs (Optional[int]): The number of processes to use for executing the rows in FHE,
+                following scikit-learn's convention (-1 means using all CPUs). Only used when fhe
+                is FheMode.EXECUTE. Default to None, which executes the rows sequentially.
 
         Returns:
             np.ndarray: The predicted values for X.
@@ -634,42 +740,23 @@ class BaseEstimator:
             # Check that the model is properly compiled
             self.check_model_is_compiled()
 
-            q_y_pred_list = []
-            for q_X_i in q_X:
-                # Expected encrypt_run_decrypt output shape is (1, n_features) while q_X_i
-                # is of shape (n_features,)
-                q_X_i = numpy.expand_dims(q_X_i, 0)
-
-                # For mypy, even though we already check this with self.check_model_is_compiled()
-                assert self.fhe_circuit is not None
-
-                # If the inference should be executed using simulation
-                if fhe == "simulate":
-                    is_crt_encoding = self.fhe_circuit.statistics["packing_key_switch_count"] != 0
-
-                    # If the virtual library method should be used
-                    # For now, use the virtual library when simulating
-                    # circuits that use CRT  encoding because the official simulation is too slow
-                    # FIXME: https://github.com/zama-ai/concrete-ml-internal/issues/4391
-                    if USE_OLD_VL or is_crt_encoding:
-                        predict_method = partial(
-                            self.fhe_circuit.graph, p_error=self.fhe_circuit.p_error
-                        )  # pragma: no cover
-
-                    # Else, use the official simulation method
-                    else:
-                        predict_method = self.fhe_circuit.simulate
-
-                # Else, use the FHE execution method
-                else:
-                    predict_method = self.fhe_circuit.encrypt_run_decrypt
+            # For mypy, even though we already check this with self.check_model_is_compiled()
+            assert self.fhe_circuit is not None
 
-                # Execute the inference in FHE or with simulation
-                q_y_pred_i = predict_method(q_X_i)
-                assert isinstance(q_y_pred_i, numpy.ndarray)
-                q_y_pred_list.append(q_y_pred_i[0])
+            if fhe == "simulate":
+                # If a circuit was compiled for simulating batches of examples, use it instead of
+                # the one compiled for FHE execution
+                simulation_circuit = (
+                    self.fhe_simulation_circuit
+                    if self.fhe_simulation_circuit is not None
+                    else self.fhe_circuit
+                )
+                q_y_pred = _simulate_in_batches(simulation_circuit, q_X)[0]
 
-            q_y_pred = numpy.array(q_y_pred_list)
+            # Else, execute the inference in FHE batch by batch, possibly using several processes
+            else:
+                q_y_pred = encrypt_run_decrypt_in_parallel(self.fhe_circuit, q_X, n_jobs=n_jobs)
+                assert isinstance(q_y_pred, numpy.ndarray)
 
         # Else, the prediction is simulated in the clear
         else:
@@ -680,6 +767,44 @@ class BaseEstimator:
         assert isinstance(y_pred, numpy.ndarray)
         return y_pred
 
+    def predict_iter(
+        self,
+        X: Union[Data, Iterable[Data]],
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        chunk_size: int = 1000,
+        n_jobs: Optional[int] = None,
+    ) -> Generator[numpy.ndarray, None, None]:
+        """Predict values for X chunk by chunk, in FHE or in the clear.
+
+        Contrary to `predict`, the input values are checked, quantized, predicted and de-quantized
+        chunk by chunk, so that memory usage depends on the chunk size rather than on the number of
+        examples. This makes it possible to predict large data-sets, such as memory-mapped arrays or
+        data-frames read in chunks from disk.
+
+        Args:
+            X (Union[Data, Iterable[Data]]): The input values to predict, as a Numpy array
+                (possibly memory-mapped), Torch tensor, Pandas DataFrame or List, or as an iterable
+                of these, such as a generator of Pandas DataFrames.
+            fhe (Union[FheMode, str]): The mode to use for prediction.
+                Can be FheMode.DISABLE for Concrete ML Python inference,
+                FheMode.SIMULATE for FHE simulation and FheMode.EXECUTE for actual FHE execution.
+                Can also be the string representation of any of these values.
+                Default to FheMode.DISABLE.
+            chunk_size (int): The maximum number of examples to predict at once. Default to 1000.
+            n_jobs (Optional[int]): The number of processes to use for executing the rows in FHE,
+                following scikit-learn's convention (-1 means using all CPUs). Only used when fhe
+                is FheMode.EXECUTE. Default to None, which executes the rows sequentially.
+
+        Yields:
+            numpy.ndarray: The predicted values for each chunk of X, in the same order as X.
+        """
+        # Ensure inputs are 2D
+        if isinstance(X, (numpy.ndarray, torch.Tensor)) and X.ndim == 1:
+            X = X.reshape((1, -1))
+
+        for X_chunk in iter_data_chunks(X, chunk_size):
+            yield self.predict(X_chunk, fhe=fhe, n_jobs=n_jobs)
+
     # pylint: disable-next=no-self-use
     def post_processing(self, y_preds: numpy.ndarray) -> numpy.ndarray:
         """Apply post-processing to the de-quantized predictions.
@@ -773,7 +898,12 @@ class BaseClassifier(BaseEstimator):
         # FIXME: https://github.com/zama-ai/concrete-ml-internal/issues/3249
         return super().fit(X, y, **fit_parameters)  # type: ignore[safe-super]
 
-    def predict_proba(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict_proba(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         """Predict class probabilities.
 
         Args:
@@ -784,15 +914,57 @@ class BaseClassifier(BaseEstimator):
                 FheMode.SIMULATE for FHE simulation and FheMode.EXECUTE for actual FHE execution.
                 Can also be the string representation of any of these values.
                 Default to FheMode.DISABLE.
+            n_jobs (Optional[int]): The number of processes to use for executing the rows in FHE,
+                following scikit-learn's convention (-1 means using all CPUs). Only used when fhe
+                is FheMode.EXECUTE. Default to None, which executes the rows sequentially.
 
         Returns:
             numpy.ndarray: The predicted class probabilities.
         """
-        return super().predict(X, fhe=fhe)
+        return super().predict(X, fhe=fhe, n_jobs=n_jobs)
+
+    def predict_proba_iter(
+        self,
+        X: Union[Data, Iterable[Data]],
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        chunk_size: int = 1000,
+        n_jobs: Optional[int] = None,
+    ) -> Generator[numpy.ndarray, None, None]:
+        """Predict class probabilities chunk by chunk.
+
+        Args:
+            X (Union[Data, Iterable[Data]]): The input values to predict, as a Numpy array
+                (possibly memory-mapped), Torch tensor, Pandas DataFrame or List, or as an iterable
+                of these, such as a generator of Pandas DataFrames.
+            fhe (Union[FheMode, str]): The mode to use for prediction.
+                Can be FheMode.DISABLE for Concrete ML Python inference,
+                FheMode.SIMULATE for FHE simulation and FheMode.EXECUTE for actual FHE execution.
+                Can also be the string representation of any of these values.
+                Default to FheMode.DISABLE.
+            chunk_size (int): The maximum number of examples to predict at once. Default to 1000.
+            n_jobs (Optional[int]): The number of processes to use for executing the rows in FHE,
+                following scikit-learn's convention (-1 means using all CPUs). Only used when fhe
+                is FheMode.EXECUTE. Default to None, which executes the rows sequentially.
+
+        Yields:
+            numpy.ndarray: The predicted class probabilities for each chunk of X, in the same
+                order as X.
+        """
+        # Ensure inputs are 2D
+        if isinstance(X, (numpy.ndarray, torch.Tensor)) and X.ndim == 1:
+            X = X.reshape((1, -1))
+
+        for X_chunk in iter_data_chunks(X, chunk_size):
+            yield self.predict_proba(X_chunk, fhe=fhe, n_jobs=n_jobs)
 
-    def predict(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         # Compute the predicted probabilities
-        y_proba = self.predict_proba(X, fhe=fhe)
+        y_proba = self.predict_proba(X, fhe=fhe, n_jobs=n_jobs)
 
         # Retrieve the class with the highest probability
         y_preds = numpy.argmax(y_proba, axis=1)
@@ -893,6 +1065,10 @@ class QuantizedTorchEstimatorMixin(BaseEstimator):
     def fhe_circuit(self) -> Circuit:
         return self.quantized_module_.fhe_circuit
 
+    @property
+    def fhe_simulation_circuit(self) -> Optional[Circuit]:
+        return self.quantized_module_.fhe_simulation_circuit
+
     def get_params(self, deep: bool = True) -> dict:
         """Get parameters for this estimator.
 
@@ -933,6 +1109,9 @@ class QuantizedTorchEstimatorMixin(BaseEstimator):
         # pylint: disable-next=no-member
         params = super().get_params(deep=deep)  # type: ignore[misc]
 
+        # pylint: disable-next=import-outside-toplevel
+        from .qnn_module import SparseQuantNeuralNetwork
+
         # Set the quantized module to SparseQuantNeuralNetwork
         params["module"] = SparseQuantNeuralNetwork
 
@@ -992,6 +1171,9 @@ class QuantizedTorchEstimatorMixin(BaseEstimator):
         # Fit the model by using skorch's fit
         self._fit_sklearn_model(X, y, **fit_parameters)
 
+        # pylint: disable-next=import-outside-toplevel
+        from brevitas.export.onnx.qonnx.manager import QONNXManager as BrevitasONNXManager
+
         # Export the brevitas model to ONNX
         output_onnx_file_path = Path(tempfile.mkstemp(suffix=".onnx")[1])
 
@@ -1035,6 +1217,9 @@ class QuantizedTorchEstimatorMixin(BaseEstimator):
         Returns:
             float_module (torch.nn.Sequential): The equivalent float module.
         """
+        # pylint: disable-next=import-outside-toplevel
+        import brevitas.nn as qnn
+
         # Instantiate a new sequential module
         float_module = torch.nn.Sequential()
 
@@ -1157,6 +1342,8 @@ class QuantizedTorchEstimatorMixin(BaseEstimator):
         p_error: Optional[float] = None,
         global_p_error: Optional[float] = None,
         verbose: bool = False,
+        simulation_batch_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
     ) -> Circuit:
         # Reset for double compile
         self._is_compiled = False
@@ -1179,6 +1366,8 @@ class QuantizedTorchEstimatorMixin(BaseEstimator):
             p_error=p_error,
             global_p_error=global_p_error,
             verbose=verbose,
+            simulation_batch_size=simulation_batch_size,
+            batch_size=batch_size,
         )
 
         # Make sure that no avoidable TLUs are found in the built-in model
@@ -1367,6 +1556,9 @@ class BaseTreeEstimatorMixin(BaseEstimator, sklearn.base.BaseEstimator, ABC):
                 stacklevel=2,
             )
 
+        # pylint: disable-next=import-outside-toplevel
+        from .tree_to_numpy import tree_to_numpy
+
         # Convert the tree inference with Numpy operators
         self._tree_inference, self.output_quantizers, self.onnx_model_ = tree_to_numpy(
             self.sklearn_model,
@@ -1445,8 +1637,13 @@ class BaseTreeEstimatorMixin(BaseEstimator, sklearn.base.BaseEstimator, ABC):
 
         return self._tree_inference(q_X)[0]
 
-    def predict(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
-        y_pred = BaseEstimator.predict(self, X, fhe=fhe)
+    def predict(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
+        y_pred = BaseEstimator.predict(self, X, fhe=fhe, n_jobs=n_jobs)
         y_pred = self.post_processing(y_pred)
         return y_pred
 
@@ -1587,6 +1784,8 @@ class SklearnLinearModelMixin(BaseEstimator, sklearn.base.BaseEstimator, ABC):
         # Check that the underlying sklearn model has been set and fit
         assert self.sklearn_model is not None, self._sklearn_model_is_not_fitted_error_message()
 
+        hb_convert = _get_hummingbird_convert()
+
         self.onnx_model_ = hb_convert(
             self.sklearn_model,
             backend="onnx",
@@ -1780,7 +1979,10 @@ class SklearnLinearClassifierMixin(
         SklearnLinearModelMixin._clean_graph(self)
 
     def decision_function(
-        self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
     ) -> numpy.ndarray:
         """Predict confidence scores.
 
@@ -1792,25 +1994,38 @@ class SklearnLinearClassifierMixin(
                 FheMode.SIMULATE for FHE simulation and FheMode.EXECUTE for actual FHE execution.
                 Can also be the string representation of any of these values.
                 Default to FheMode.DISABLE.
+            n_jobs (Optional[int]): The number of processes to use for executing the rows in FHE,
+                following scikit-learn's convention (-1 means using all CPUs). Only used when fhe
+                is FheMode.EXECUTE. Default to None, which executes the rows sequentially.
 
         Returns:
             numpy.ndarray: The predicted confidence scores.
         """
         # Here, we want to use SklearnLinearModelMixin's `predict` method as confidence scores are
         # the dot product's output values, without any post-processing
-        y_scores = SklearnLinearModelMixin.predict(self, X, fhe=fhe)
+        y_scores = SklearnLinearModelMixin.predict(self, X, fhe=fhe, n_jobs=n_jobs)
 
         return y_scores
 
-    def predict_proba(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
-        y_scores = self.decision_function(X, fhe=fhe)
+    def predict_proba(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
+        y_scores = self.decision_function(X, fhe=fhe, n_jobs=n_jobs)
         y_proba = self.post_processing(y_scores)
         return y_proba
 
     # In scikit-learn, the argmax is done on the scores directly, not the probabilities
-    def predict(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         # Compute the predicted scores
-        y_scores = self.decision_function(X, fhe=fhe)
+        y_scores = self.decision_function(X, fhe=fhe, n_jobs=n_jobs)
 
         # Retrieve the class with the highest score
         # If there is a single dimension, only compare the scores to 0
@@ -1844,6 +2059,8 @@ class SklearnSGDRegressorMixin(SklearnLinearRegressorMixin):
         model_for_onnx.coef_ = self.sklearn_model.coef_
         model_for_onnx.intercept_ = self.sklearn_model.intercept_
 
+        hb_convert = _get_hummingbird_convert()
+
         self.onnx_model_ = hb_convert(
             model_for_onnx,
             backend="onnx",
@@ -1876,6 +2093,8 @@ class SklearnSGDClassifierMixin(SklearnLinearClassifierMixin):
         model_for_onnx.coef_ = self.sklearn_model.coef_
         model_for_onnx.intercept_ = self.sklearn_model.intercept_
 
+        hb_convert = _get_hummingbird_convert()
+
         self.onnx_model_ = hb_convert(
             model_for_onnx,
             backend="onnx",
@@ -1932,6 +2151,11 @@ class SklearnKNeighborsMixin(BaseEstimator, sklearn.base.BaseEstimator, ABC):
         # Check that the underlying sklearn model has been set and fit
         assert self.sklearn_model is not None, self._sklearn_model_is_not_fitted_error_message()
 
+        hb_convert = _get_hummingbird_convert()
+
+        # pylint: disable-next=import-outside-toplevel
+        from hummingbird.ml.operator_converters import constants
+
         self.onnx_model_ = hb_convert(
             self.sklearn_model,
             backend="onnx",
@@ -2053,6 +2277,22 @@ class SklearnKNeighborsMixin(BaseEstimator, sklearn.base.BaseEstimator, ABC):
 
         return compiler
 
+    def compile(self, *args, **kwargs) -> Circuit:
+        # The KNN inference function only handles a single query at a time, circuits can therefore
+        # not be compiled for batches of examples
+        assert_true(
+            kwargs.get("simulation_batch_size", None) is None,
+            "Simulating batches of examples is not supported for KNeighborsClassifier models.",
+            NotImplementedError,
+        )
+        assert_true(
+            kwargs.get("batch_size", None) is None,
+            "Executing batches of examples is not supported for KNeighborsClassifier models.",
+            NotImplementedError,
+        )
+
+        return BaseEstimator.compile(self, *args, **kwargs)
+
     @staticmethod
     def majority_vote(nearest_classes: numpy.ndarray):
         """Determine the most common class among nearest neighborsfor each query.
@@ -2232,7 +2472,12 @@ class SklearnKNeighborsMixin(BaseEstimator, sklearn.base.BaseEstimator, ABC):
         """
         return numpy.array([self.majority_vote(y.flatten()) for y in y_preds])
 
-    def get_topk_labels(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def get_topk_labels(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         """Return the K-nearest labels of each point.
 
         Args:
@@ -2243,6 +2488,9 @@ class SklearnKNeighborsMixin(BaseEstimator, sklearn.base.BaseEstimator, ABC):
                 FheMode.SIMULATE for FHE simulation and FheMode.EXECUTE for actual FHE execution.
                 Can also be the string representation of any of these values.
                 Default to FheMode.DISABLE.
+            n_jobs (Optional[int]): The number of processes to use for executing the rows in FHE,
+                following scikit-learn's convention (-1 means using all CPUs). Only used when fhe
+                is FheMode.EXECUTE. Default to None, which executes the rows sequentially.
 
         Returns:
             numpy.ndarray: The K-Nearest labels for each point.
@@ -2250,6 +2498,12 @@ class SklearnKNeighborsMixin(BaseEstimator, sklearn.base.BaseEstimator, ABC):
 
         X = check_array_and_assert(X)
 
+        # The FHE circuit is compiled for a single query, which BaseEstimator's predict method
+        # already handles by iterating over all rows, possibly using several processes
+        if fhe in ["simulate", "execute"]:
+            return BaseEstimator.predict(self, X, fhe=fhe, n_jobs=n_jobs)
+
+        # The clear inference function only handles a single query at a time
         topk_labels = []
         for query in X:
             query = numpy.expand_dims(query, 0)
@@ -2257,11 +2511,16 @@ class SklearnKNeighborsMixin(BaseEstimator, sklearn.base.BaseEstimator, ABC):
 
         return numpy.array(topk_labels)
 
-    def predict(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
 
         X = check_array_and_assert(X)
 
-        topk_labels = self.get_topk_labels(X, fhe)
+        topk_labels = self.get_topk_labels(X, fhe, n_jobs)
 
         y_preds = self.post_processing(topk_labels)
 
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from abc import abstractmethod
-from typing import Any, Dict, Union
+from typing import Any, Dict, Optional, Union
 
 import numpy
 import sklearn.linear_model
@@ -62,9 +62,14 @@ class _GeneralizedLinearRegressor(SklearnLinearRegressorMixin):
     def post_processing(self, y_preds: numpy.ndarray) -> numpy.ndarray:
         return self._inverse_link(y_preds)
 
-    def predict(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         # Call SklearnLinearModelMixin's predict method
-        y_preds = super().predict(X, fhe=fhe)
+        y_preds = super().predict(X, fhe=fhe, n_jobs=n_jobs)
 
         y_preds = self.post_processing(y_preds)
         return y_preds
@@ -12,7 +12,6 @@ from sklearn.preprocessing import LabelEncoder
 from ..common.utils import FheMode
 from ..onnx.ops_impl import numpy_sigmoid
 from ..quantization import QuantizedModule
-from ..torch.compile import compile_torch_model
 from ._fhe_training_utils import LogisticRegressionTraining, binary_cross_entropy
 from .base import (
     Data,
@@ -350,6 +349,9 @@ class SGDClassifier(SklearnSGDClassifierMixin):
         if self.verbose:
             print("Compiling training circuit ...")
 
+        # pylint: disable-next=import-outside-toplevel
+        from ..torch.compile import compile_torch_model
+
         start = time.time()
         training_quantized_module = compile_torch_model(
             trainer,
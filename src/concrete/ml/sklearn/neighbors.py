@@ -1,6 +1,6 @@
 """Implement sklearn neighbors model."""
 
-from typing import Any, Dict, Union
+from typing import Any, Dict, Optional, Union
 
 import numpy
 import sklearn.neighbors
@@ -122,7 +122,12 @@ class KNeighborsClassifier(SklearnKNeighborsClassifierMixin):
 
     # KNeighborsClassifier does not provide a predict_proba method for now
     # FIXME: https://github.com/zama-ai/concrete-ml-internal/issues/3962
-    def predict_proba(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict_proba(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         """Predict class probabilities.
 
         Args:
@@ -133,6 +138,9 @@ class KNeighborsClassifier(SklearnKNeighborsClassifierMixin):
                 FheMode.SIMULATE for FHE simulation and FheMode.EXECUTE for actual FHE execution.
                 Can also be the string representation of any of these values.
                 Default to FheMode.DISABLE.
+            n_jobs (Optional[int]): The number of processes to use for executing the rows in FHE,
+                following scikit-learn's convention (-1 means using all CPUs). Only used when fhe
+                is FheMode.EXECUTE. Default to None, which executes the rows sequentially.
 
         Raises:
             NotImplementedError: The method is not implemented for now.
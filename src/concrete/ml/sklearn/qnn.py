@@ -4,7 +4,7 @@
 # pylint: disable=invalid-name
 
 import io
-from typing import Any, Callable, Dict, Union
+from typing import Any, Callable, Dict, Optional, Union
 
 import numpy
 import skorch.classifier
@@ -183,19 +183,29 @@ class NeuralNetRegressor(QuantizedTorchEstimatorMixin, skorch.regressor.NeuralNe
     # confusion, a NotImplementedError is raised. This issue could be fixed by making these classes
     # not inherit from skorch.
     # FIXME: https://github.com/zama-ai/concrete-ml-internal/issues/3373
-    def predict_proba(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict_proba(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         raise NotImplementedError(
             "The `predict_proba` method is not implemented for neural network regressors. Please "
             "call `predict` instead."
         )
 
-    def predict(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         # Check that inputs are float32. If they are float64, they will be casted to float32 as
         # this should not have a great impact on the model's performances. Else, an error is raised.
         X = check_dtype_and_cast(X, "float32", error_information="Neural Network regressor input")
 
         # Call BaseEstimator's predict method and cast values to float32
-        y_preds = super().predict(X, fhe=fhe)
+        y_preds = super().predict(X, fhe=fhe, n_jobs=n_jobs)
         y_preds = self.post_processing(y_preds)
         return y_preds
 
@@ -493,23 +503,33 @@ class NeuralNetClassifier(
         # Call QuantizedTorchEstimatorMixin's fit_benchmark method
         return super().fit_benchmark(X, y, *args, **kwargs)
 
-    def predict_proba(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict_proba(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         # Check that inputs are float32. If they are, they will be casted to float32 as this
         # should not have a great impact on the model's performances. Else, an error is raised.
         X = check_dtype_and_cast(X, "float32", error_information="Neural Network classifier input")
 
         # Call BaseClassifier's predict_proba method, apply the sigmoid and cast values to float32
-        y_logits = super().predict_proba(X, fhe=fhe)
+        y_logits = super().predict_proba(X, fhe=fhe, n_jobs=n_jobs)
         y_proba = self.post_processing(y_logits)
         return y_proba
 
-    def predict(self, X: Data, fhe: Union[FheMode, str] = FheMode.DISABLE) -> numpy.ndarray:
+    def predict(
+        self,
+        X: Data,
+        fhe: Union[FheMode, str] = FheMode.DISABLE,
+        n_jobs: Optional[int] = None,
+    ) -> numpy.ndarray:
         # Check that inputs are float32. If they are float64, they will be casted to float32 as
         # this should not have a great impact on the model's performances. Else, an error is raised.
         X = check_dtype_and_cast(X, "float32", error_information="Neural Network classifier input")
 
         # Call BaseClassifier's predict method
-        return super().predict(X, fhe=fhe)
+        return super().predict(X, fhe=fhe, n_jobs=n_jobs)
 
     def dump_dict(self) -> Dict[str, Any]:
         metadata: Dict[str, Any] = {}
@@ -2,26 +2,45 @@
 
 import ast
 import enum
-import io
-import sys
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
 import time
 import uuid
 from abc import abstractmethod
-from collections import defaultdict
-from functools import lru_cache
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import numpy
 import requests
 import torch
 from brevitas.quant_tensor import QuantTensor
-from concrete.fhe import Configuration
+from concrete.fhe import Configuration, EvaluationKeys
 from torch import nn
 from transformers import Conv1D
 
-from ..common.utils import MAX_BITWIDTH_BACKWARD_COMPATIBLE
-from ..deployment.fhe_client_server import FHEModelClient, FHEModelDev, FHEModelServer
+from ..common.compilation_cache import (
+    COMPILATION_CACHE_ENV_VARIABLE,
+    COMPILATION_CACHE_MAX_SIZE_ENV_VARIABLE,
+)
+from ..common.debugging.custom_assert import assert_true
+from ..common.utils import MAX_BITWIDTH_BACKWARD_COMPATIBLE, get_n_jobs
+from ..deployment.compression import DEFAULT_MAX_DECOMPRESSED_SIZE, decompress
+from ..deployment.fhe_client_server import (
+    DEFAULT_CHUNK_SIZE,
+    FHEModelClient,
+    FHEModelDev,
+    FHEModelServer,
+    iter_chunks,
+    join_chunks,
+    pack_payloads,
+    unpack_payloads,
+)
 from .compile import (
     QuantizedModule,
     compile_brevitas_qat_model,
@@ -104,10 +123,182 @@ def convert_conv1d_to_linear(layer_or_module):
     return layer_or_module
 
 
+def _get_bucket(size: int, buckets: Sequence[int]) -> int:
+    """Get the smallest bucket fitting a size.
+
+    Args:
+        size (int): the size
+        buckets (Sequence[int]): the sizes of the buckets
+
+    Returns:
+        int: the smallest bucket greater or equal to the size
+
+    Raises:
+        ValueError: if the size is larger than all the buckets
+    """
+    fitting_buckets = [bucket for bucket in buckets if bucket >= size]
+    if not fitting_buckets:
+        raise ValueError(f"No shape bucket fits size {size}. The largest bucket is {max(buckets)}.")
+    return min(fitting_buckets)
+
+
+def _pad_to_size(x: torch.Tensor, dim: int, size: int) -> torch.Tensor:
+    """Pad a tensor with zeros along a dimension.
+
+    Args:
+        x (torch.Tensor): the tensor
+        dim (int): the dimension to pad
+        size (int): the size of the padded dimension
+
+    Returns:
+        torch.Tensor: the padded tensor
+    """
+    if x.shape[dim] == size:
+        return x
+
+    padding_shape = list(x.shape)
+    padding_shape[dim] = size - x.shape[dim]
+    return torch.cat([x, torch.zeros(padding_shape, dtype=x.dtype, device=x.device)], dim=dim)
+
+
+def _split_to_size(x: torch.Tensor, dim: int, size: int) -> torch.Tensor:
+    """Split examples into several examples of a given size along a dimension.
+
+    The dimension is first padded with zeros to a multiple of the size, then split, the parts being
+    concatenated along the first dimension.
+
+    Args:
+        x (torch.Tensor): the examples, along the first dimension
+        dim (int): the dimension to split
+        size (int): the size of the dimension in the resulting examples
+
+    Returns:
+        torch.Tensor: the split examples
+    """
+    x = _pad_to_size(x, dim, -(-x.shape[dim] // size) * size)
+    return torch.cat(torch.split(x, size, dim=dim), dim=0)
+
+
+class CalibrationReservoir:
+    """Bounded sample of the inputs a module receives during calibration.
+
+    A uniform sample of at most `size` examples, taken along the first dimension of the inputs, is
+    kept using reservoir sampling. The examples holding the smallest and largest values seen so far
+    are kept as well. Input quantizers are calibrated on the range of the input-set, so the module
+    quantizes its inputs as if it was calibrated on all the examples, while the memory used no
+    longer depends on their number.
+
+    Args:
+        size (int): the maximum number of examples in the sample
+        seed (Optional[int]): the seed of the random sampling. Default to None.
+    """
+
+    def __init__(self, size: int, seed: Optional[int] = None):
+        assert_true(
+            isinstance(size, int) and size > 0,
+            "The size of the calibration reservoir must be a strictly positive integer. Got "
+            f"{size}",
+            ValueError,
+        )
+
+        self.size = size
+        self.n_seen = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+        self._samples: Optional[torch.Tensor] = None
+        self._min_example: Optional[torch.Tensor] = None
+        self._max_example: Optional[torch.Tensor] = None
+
+        self._generator = torch.Generator()
+        if seed is not None:
+            self._generator.manual_seed(seed)
+        else:
+            self._generator.seed()
+
+    def update(self, x: torch.Tensor):
+        """Add a batch of examples to the sample.
+
+        Args:
+            x (torch.Tensor): the examples, along the first dimension
+        """
+        x = x.detach()
+        if x.shape[0] == 0:
+            return
+
+        # Keep the examples holding the extreme values, so that the sample has the same range as all
+        # the examples
+        flat_x = x.reshape(x.shape[0], -1)
+        batch_min, batch_argmin = flat_x.min(dim=1).values.min(dim=0)
+        batch_max, batch_argmax = flat_x.max(dim=1).values.max(dim=0)
+
+        if self.min is None or batch_min.item() < self.min:
+            self.min = batch_min.item()
+            self._min_example = x[batch_argmin : batch_argmin + 1].clone()
+
+        if self.max is None or batch_max.item() > self.max:
+            self.max = batch_max.item()
+            self._max_example = x[batch_argmax : batch_argmax + 1].clone()
+
+        if self._samples is None:
+            self._samples = torch.empty((self.size,) + tuple(x.shape[1:]), dtype=x.dtype)
+
+        # Fill the sample with the first examples
+        n_filled = max(min(self.size - self.n_seen, x.shape[0]), 0)
+        self._samples[self.n_seen : self.n_seen + n_filled] = x[:n_filled]
+
+        # Then, replace a random example of the sample with the i-th example with probability
+        # size / i
+        n_previous = self.n_seen + n_filled + torch.arange(x.shape[0] - n_filled)
+        replaced = (
+            torch.rand(len(n_previous), generator=self._generator) * (n_previous + 1)
+        ).long()
+        for index in torch.nonzero(replaced < self.size).flatten().tolist():
+            self._samples[replaced[index]] = x[n_filled + index]
+
+        self.n_seen += x.shape[0]
+
+    def get_data(self) -> torch.Tensor:
+        """Get the sampled examples, followed by the ones holding the extreme values.
+
+        Returns:
+            torch.Tensor: the examples
+
+        Raises:
+            ValueError: if no examples were added
+        """
+        if self._samples is None:
+            raise ValueError("No calibration data was gathered.")
+
+        assert self._min_example is not None and self._max_example is not None
+        return torch.cat(
+            [self._samples[: min(self.n_seen, self.size)], self._min_example, self._max_example],
+            dim=0,
+        )
+
+
 # pylint: disable-next=too-many-instance-attributes
 class RemoteModule(nn.Module):
-    """A wrapper class for the modules to be evaluated remotely with FHE."""
+    """A wrapper class for the modules to be evaluated remotely with FHE.
+
+    Remote calls share a pooled HTTP session. The rows of a batch are either sent in concurrent
+    requests, at most `max_concurrent_requests` at a time, so that encrypting a row overlaps with
+    the server computing the previous ones, or all together in a single request to the server's
+    `/compute_batch` route if `batch_remote_calls` is set.
+
+    During calibration, the module's inputs are all kept, unless `calibration_reservoir_size` is
+    set, in which case only a bounded sample of them is kept in a `CalibrationReservoir`.
+
+    If `shape_buckets` is set, a circuit is compiled for each of these sizes of the inputs'
+    `bucket_dim` dimension. Inputs are padded with zeros to the smallest bucket fitting them and
+    the outputs are sliced back to their size, so that inputs of any size up to the largest bucket
+    are supported by a fixed number of circuits. This requires the module to process the positions
+    of this dimension independently, as linear layers do with the tokens of a sequence. The padded
+    positions are part of the calibration data, as they are computed by the circuits as well, so
+    the quantization ranges always include the module's values over zeros.
+    """
 
+    # pylint: disable-next=too-many-arguments
     def __init__(
         self,
         module: Optional[nn.Module] = None,
@@ -115,13 +306,37 @@ class RemoteModule(nn.Module):
         module_name: Optional[str] = None,
         model_name: Optional[str] = None,
         verbose: int = 0,
+        max_concurrent_requests: int = 4,
+        batch_remote_calls: bool = False,
+        calibration_reservoir_size: Optional[int] = None,
+        shape_buckets: Optional[Sequence[int]] = None,
+        bucket_dim: int = 1,
     ):
         super().__init__()
+
+        assert_true(
+            shape_buckets is None or (len(shape_buckets) > 0 and min(shape_buckets) > 0),
+            "Shape buckets must be a non-empty list of strictly positive sizes. Got "
+            f"{shape_buckets}",
+            ValueError,
+        )
+        assert_true(
+            bucket_dim >= 1,
+            f"The bucketed dimension can't be the batch dimension. Got {bucket_dim}",
+            ValueError,
+        )
+
         self.private_module: Optional[nn.Module] = module
         self.server_remote_address: Optional[str] = server_remote_address
+        self.calibration_reservoir_size = calibration_reservoir_size
         self.calibration_data: List = []
+        self.calibration_reservoir: Optional[CalibrationReservoir] = None
+        self.reset_calibration()
         self.uid = str(uuid.uuid4())
         self.private_q_module: Optional[QuantizedModule] = None
+        self.private_q_bucket_modules: Dict[int, QuantizedModule] = {}
+        self.shape_buckets = sorted(shape_buckets) if shape_buckets is not None else None
+        self.bucket_dim = bucket_dim
         self.fhe_local_mode: HybridFHEMode = HybridFHEMode.CALIBRATE
         self.clients: Dict[str, Tuple[str, FHEModelClient]] = {}
         self.path_to_keys: Optional[Path] = None
@@ -129,6 +344,63 @@ class RemoteModule(nn.Module):
         self.module_name: Optional[str] = module_name
         self.model_name: Optional[str] = model_name
         self.verbose = verbose
+        self.max_concurrent_requests = max_concurrent_requests
+        self.batch_remote_calls = batch_remote_calls
+        self._session: Optional[requests.Session] = None
+
+    @property
+    def session(self) -> requests.Session:
+        """Get the HTTP session used for the remote calls, creating it if needed.
+
+        Returns:
+            requests.Session: the session, keeping up to `max_concurrent_requests` connections
+                alive
+        """
+        if self._session is None:
+            self._session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=self.max_concurrent_requests
+            )
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+
+        return self._session
+
+    def reset_calibration(self):
+        """Discard the calibration data gathered so far."""
+        self.calibration_data = []
+        self.calibration_reservoir = (
+            CalibrationReservoir(self.calibration_reservoir_size)
+            if self.calibration_reservoir_size is not None
+            else None
+        )
+
+    def get_calibration_data(self) -> torch.Tensor:
+        """Get the calibration data gathered so far, to use as the module's input-set.
+
+        Returns:
+            torch.Tensor: the calibration data
+        """
+        if self.calibration_reservoir is not None:
+            return self.calibration_reservoir.get_data()
+
+        return torch.cat(self.calibration_data, dim=0)
+
+    def _pad_to_bucket(self, x: torch.Tensor) -> Tuple[torch.Tensor, Optional[int]]:
+        """Pad an input to the smallest shape bucket fitting it, if shape buckets are used.
+
+        Args:
+            x (torch.Tensor): the input
+
+        Returns:
+            Tuple[torch.Tensor, Optional[int]]: the padded input and its bucket, or the input itself
+                and None if shape buckets are not used
+        """
+        if self.shape_buckets is None:
+            return x, None
+
+        bucket = _get_bucket(x.shape[self.bucket_dim], self.shape_buckets)
+        return _pad_to_size(x, self.bucket_dim, bucket), bucket
 
     def init_fhe_client(
         self, path_to_client: Optional[Path] = None, path_to_keys: Optional[Path] = None
@@ -155,7 +427,7 @@ class RemoteModule(nn.Module):
         # List all shapes supported by the server
         # This is needed until we have generic shape support in Concrete Python
         assert self.module_name is not None
-        shapes_response = requests.get(
+        shapes_response = self.session.get(
             f"{self.server_remote_address}/list_shapes",
             data={"module_name": self.module_name, "model_name": self.model_name},
         )
@@ -168,7 +440,7 @@ class RemoteModule(nn.Module):
         # For all supported shape we need to get the FHE client from the server
         shapes = shapes_response.json()
         for shape in shapes:
-            client_response = requests.get(
+            client_response = self.session.get(
                 f"{self.server_remote_address}/get_client",
                 data={
                     "module_name": self.module_name,
@@ -197,15 +469,15 @@ class RemoteModule(nn.Module):
                 print(f"Evaluation keys size: {len(serialized_evaluation_keys) / (10**6):.2f} MB")
             assert isinstance(serialized_evaluation_keys, bytes)
             assert self.module_name is not None
-            # Upload the key to the server
-            response = requests.post(
-                f"{self.server_remote_address}/add_key",
-                data={
+            # Upload the key to the server in chunks, without building the whole request in memory
+            response = self.session.post(
+                f"{self.server_remote_address}/add_key_stream",
+                params={
                     "module_name": self.module_name,
                     "model_name": self.model_name,
                     "input_shape": shape,
                 },
-                files={"key": io.BytesIO(initial_bytes=serialized_evaluation_keys)},
+                data=iter_chunks(serialized_evaluation_keys),
             )
             assert response.status_code == 200, response.content.decode("utf-8")
             uid = response.json()["uid"]
@@ -244,11 +516,17 @@ class RemoteModule(nn.Module):
             HybridFHEMode.REMOTE,
             None,
         }:
-            # Using quantized module
-            assert self.private_q_module is not None
+            # Using quantized module, compiled for the input's shape bucket if buckets are used
+            x_padded, bucket = self._pad_to_bucket(x)
+            private_q_module = (
+                self.private_q_module if bucket is None else self.private_q_bucket_modules[bucket]
+            )
+            assert private_q_module is not None
             y = torch.Tensor(
-                self.private_q_module.forward(x.detach().numpy(), fhe=self.fhe_local_mode.value)
+                private_q_module.forward(x_padded.detach().numpy(), fhe=self.fhe_local_mode.value)
             )
+            if bucket is not None:
+                y = y.narrow(self.bucket_dim, 0, x.shape[self.bucket_dim])
 
         elif self.fhe_local_mode == HybridFHEMode.DISABLE:
             # Calling torch
@@ -261,7 +539,27 @@ class RemoteModule(nn.Module):
         elif self.fhe_local_mode == HybridFHEMode.CALIBRATE:
             # Calling torch + gathering calibration data
             assert self.private_module is not None
-            self.calibration_data.append(x.detach())
+            # With shape buckets, inputs are padded to the largest bucket so that they can all be
+            # gathered in the same input-set. The padding is kept in the input-set, as the padded
+            # positions are also computed by the circuits and must fit their quantization ranges
+            calibration_x = x
+            if self.shape_buckets is not None:
+                size = x.shape[self.bucket_dim]
+
+                # Inputs larger than all the buckets couldn't be computed once compiled, so they
+                # are rejected during calibration already
+                assert_true(
+                    size <= self.shape_buckets[-1],
+                    f"No shape bucket fits size {size}. The largest bucket is "
+                    f"{self.shape_buckets[-1]}.",
+                    ValueError,
+                )
+                calibration_x = _pad_to_size(x, self.bucket_dim, self.shape_buckets[-1])
+
+            if self.calibration_reservoir is not None:
+                self.calibration_reservoir.update(calibration_x)
+            else:
+                self.calibration_data.append(calibration_x.detach())
             y = self.private_module(x)
             assert isinstance(y, (QuantTensor, torch.Tensor))
 
@@ -288,52 +586,208 @@ class RemoteModule(nn.Module):
         base_device = x.device
         x = x.to(device="cpu")
 
-        # We need to iterate over elements in the batch since
+        # Pad the input to its shape bucket, if buckets are used
+        size = x.shape[self.bucket_dim] if self.shape_buckets is not None else None
+        x, _ = self._pad_to_bucket(x)
+
+        # We need to encrypt each element in the batch separately since
         # we don't support batch inference
-        inferences = []
-        for index in range(len(x)):
-            # Manage tensor, tensor shape, and encrypt tensor
-            clear_input = x[[index], :].detach().numpy()
-            input_shape = (1,) + tuple(clear_input.shape)
-            repr_input_shape = str(input_shape[1:])
-            assert isinstance(clear_input, numpy.ndarray)
-            assert repr_input_shape in self.clients
-            key_id, client = self.clients[repr_input_shape]
-            assert client is not None
-            encrypted_input = client.quantize_encrypt_serialize(clear_input)
-            assert isinstance(encrypted_input, bytes)
-            if self.verbose:
-                print(
-                    f"Encrypted input size: {sys.getsizeof(encrypted_input) / 1024 / 1024:.2f} MB"
-                )
-            start = time.time()
-            assert self.module_name is not None
-            if self.verbose:
-                print("Infering ...")
-            # Inference using FHE server
-            inference_query = requests.post(
-                f"{self.server_remote_address}/compute",
-                files={
-                    "model_input": io.BytesIO(encrypted_input),
-                },
-                data={
-                    "uid": key_id,
-                    "module_name": self.module_name,
-                    "model_name": self.model_name,
-                    "input_shape": repr_input_shape,
-                },
-                stream=True,
+        clear_inputs = [x[[index], :].detach().numpy() for index in range(len(x))]
+        repr_input_shape = str((1,) + tuple(x.shape[1:]))
+
+        assert self.module_name is not None
+        assert repr_input_shape in self.clients
+        key_id, client = self.clients[repr_input_shape]
+
+        start = time.time()
+        if self.verbose:
+            print("Infering ...")
+
+        if self.batch_remote_calls:
+            encrypted_results = self._compute_batch(
+                [client.quantize_encrypt_serialize(clear_input) for clear_input in clear_inputs],
+                key_id,
+                repr_input_shape,
             )
-            end = time.time()
-            if self.verbose:
-                print(f"Inference done in {end - start} seconds")
-            # Deserialize and decrypt the result
-            assert inference_query.status_code == 200, inference_query.content.decode("utf-8")
-            encrypted_result = inference_query.content
-            decrypted_prediction = client.deserialize_decrypt_dequantize(encrypted_result)[0]
-            inferences.append(decrypted_prediction)
-        # Concatenate results and move them back to proper device
-        return torch.Tensor(numpy.array(inferences)).to(device=base_device)
+        else:
+            # Encrypt the next rows while the server computes the previous ones
+            with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+                futures = [
+                    executor.submit(
+                        self._compute,
+                        client.quantize_encrypt_serialize(clear_input),
+                        key_id,
+                        repr_input_shape,
+                    )
+                    for clear_input in clear_inputs
+                ]
+                encrypted_results = [future.result() for future in futures]
+
+        end = time.time()
+        if self.verbose:
+            print(f"Inference done in {end - start} seconds")
+
+        # Deserialize and decrypt the results
+        inferences = [
+            client.deserialize_decrypt_dequantize(encrypted_result)[0]
+            for encrypted_result in encrypted_results
+        ]
+
+        # Concatenate results, remove the padding and move them back to proper device
+        y = torch.Tensor(numpy.array(inferences))
+        if size is not None:
+            y = y.narrow(self.bucket_dim, 0, size)
+        return y.to(device=base_device)
+
+    def _compute(
+        self, encrypted_input: bytes, key_id: str, repr_input_shape: str
+    ) -> bytes:  # pragma:no cover
+        """Run the remote module over an encrypted input.
+
+        Args:
+            encrypted_input (bytes): The encrypted input.
+            key_id (str): The uid of the evaluation keys on the server.
+            repr_input_shape (str): The input shape of the module.
+
+        Returns:
+            bytes: The encrypted result.
+        """
+        if self.verbose:
+            print(f"Encrypted input size: {len(encrypted_input) / 1024 / 1024:.2f} MB")
+
+        # Inference using FHE server, streaming the input and the result in chunks
+        inference_query = self.session.post(
+            f"{self.server_remote_address}/compute_stream",
+            params={
+                "uid": key_id,
+                "module_name": self.module_name,
+                "model_name": self.model_name,
+                "input_shape": repr_input_shape,
+            },
+            data=iter_chunks(encrypted_input),
+            stream=True,
+        )
+        assert inference_query.status_code == 200, inference_query.content.decode("utf-8")
+        return join_chunks(inference_query.iter_content(DEFAULT_CHUNK_SIZE))
+
+    def _compute_batch(
+        self, encrypted_inputs: List[bytes], key_id: str, repr_input_shape: str
+    ) -> List[bytes]:  # pragma:no cover
+        """Run the remote module over several encrypted inputs in a single request.
+
+        Args:
+            encrypted_inputs (List[bytes]): The encrypted inputs.
+            key_id (str): The uid of the evaluation keys on the server.
+            repr_input_shape (str): The input shape of the module.
+
+        Returns:
+            List[bytes]: The encrypted results.
+        """
+        inference_query = self.session.post(
+            f"{self.server_remote_address}/compute_batch",
+            params={
+                "uid": key_id,
+                "module_name": self.module_name,
+                "model_name": self.model_name,
+                "input_shape": repr_input_shape,
+            },
+            data=iter_chunks(pack_payloads(encrypted_inputs)),
+            stream=True,
+        )
+        assert inference_query.status_code == 200, inference_query.content.decode("utf-8")
+        return unpack_payloads(join_chunks(inference_query.iter_content(DEFAULT_CHUNK_SIZE)))
+
+
+def _compile_private_module(
+    module: nn.Module, calibration_data: torch.Tensor, **compile_kwargs
+) -> QuantizedModule:
+    """Compile a private module, using its calibration data as the input-set.
+
+    Args:
+        module (nn.Module): the private module
+        calibration_data (torch.Tensor): the inputs of the module gathered during calibration
+        **compile_kwargs: the options given to `compile_torch_model` or
+            `compile_brevitas_qat_model`
+
+    Returns:
+        QuantizedModule: the compiled module
+    """
+    if has_any_qnn_layers(module):
+        return compile_brevitas_qat_model(module, calibration_data, **compile_kwargs)
+
+    return compile_torch_model(module, calibration_data, **compile_kwargs)
+
+
+def _compile_private_module_worker(
+    module: nn.Module,
+    calibration_data: torch.Tensor,
+    compilation_cache_location: str,
+    compile_kwargs: Dict[str, Any],
+) -> None:
+    """Compile a private module in a worker process, storing its server in the compilation cache.
+
+    Compiled modules can't be sent back from the worker, as Concrete's circuits can't be pickled.
+    The compilation cache is used instead to share the compiled servers with the main process.
+
+    Args:
+        module (nn.Module): the private module
+        calibration_data (torch.Tensor): the inputs of the module gathered during calibration
+        compilation_cache_location (str): the directory of the compilation cache
+        compile_kwargs (Dict[str, Any]): the options given to `compile_torch_model` or
+            `compile_brevitas_qat_model`
+    """
+    os.environ[COMPILATION_CACHE_ENV_VARIABLE] = compilation_cache_location
+    _compile_private_module(module, calibration_data, **compile_kwargs)
+
+
+def _get_private_module_fingerprint(module: nn.Module, calibration_data: torch.Tensor) -> str:
+    """Compute a fingerprint identifying the circuit a private module is compiled to.
+
+    Modules with the same architecture, weights and calibration data get the same quantization
+    parameters and thus the same circuit.
+
+    Args:
+        module (nn.Module): the private module
+        calibration_data (torch.Tensor): the inputs of the module gathered during calibration
+
+    Returns:
+        str: the fingerprint of the module
+    """
+    hasher = hashlib.sha256()
+    hasher.update(repr(module).encode("utf-8"))
+
+    for name, tensor in [*module.state_dict().items(), ("calibration_data", calibration_data)]:
+        hasher.update(f"{name}{tensor.dtype}{tuple(tensor.shape)}".encode("utf-8"))
+        hasher.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+
+    return hasher.hexdigest()
+
+
+@contextmanager
+def _shared_compilation_cache() -> Iterator[str]:
+    """Enable the compilation cache, using a temporary directory if it is not already enabled.
+
+    Yields:
+        str: the directory of the compilation cache
+    """
+    location = os.environ.get(COMPILATION_CACHE_ENV_VARIABLE)
+    if location:
+        yield location
+        return
+
+    previous_max_size = os.environ.get(COMPILATION_CACHE_MAX_SIZE_ENV_VARIABLE)
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        # The servers compiled by the workers must all stay in the cache until they are loaded
+        os.environ[COMPILATION_CACHE_ENV_VARIABLE] = temporary_directory
+        os.environ[COMPILATION_CACHE_MAX_SIZE_ENV_VARIABLE] = str(2**62)
+        try:
+            yield temporary_directory
+        finally:
+            del os.environ[COMPILATION_CACHE_ENV_VARIABLE]
+            if previous_max_size is None:
+                del os.environ[COMPILATION_CACHE_MAX_SIZE_ENV_VARIABLE]
+            else:
+                os.environ[COMPILATION_CACHE_MAX_SIZE_ENV_VARIABLE] = previous_max_size
 
 
 class HybridFHEModel:
@@ -348,8 +802,21 @@ class HybridFHEModel:
         server_remote_address): The remote address of the FHE server
         model_name (str): Model name identifier
         verbose (int): If logs should be printed when interacting with FHE server
+        max_concurrent_requests (int): The maximum number of requests each remote module sends
+            concurrently to the FHE server
+        batch_remote_calls (bool): If the rows of a batch should be sent to the FHE server in a
+            single request instead of concurrent ones
+        calibration_reservoir_size (Optional[int]): The maximum number of calibration examples
+            kept for each module, sampled from all the examples it receives during calibration.
+            If None, all the examples are kept.
+        shape_buckets (Optional[Sequence[int]]): The sizes of the inputs' `bucket_dim` dimension
+            for which the modules are compiled, inputs being padded to the smallest bucket
+            fitting them. If None, the modules are compiled for the inputs' shape.
+        bucket_dim (int): The dimension of the inputs padded to the shape buckets, for instance
+            the sequence dimension of a language model. Default to 1.
     """
 
+    # pylint: disable-next=too-many-arguments
     def __init__(
         self,
         model: nn.Module,
@@ -357,6 +824,11 @@ class HybridFHEModel:
         server_remote_address=None,
         model_name: str = "model",
         verbose: int = 0,
+        max_concurrent_requests: int = 4,
+        batch_remote_calls: bool = False,
+        calibration_reservoir_size: Optional[int] = None,
+        shape_buckets: Optional[Sequence[int]] = None,
+        bucket_dim: int = 1,
     ):
         self.model = model
         self.module_names = [module_names] if isinstance(module_names, str) else module_names
@@ -366,9 +838,15 @@ class HybridFHEModel:
         }
         self.remote_modules: Dict[str, RemoteModule] = {}
         self.private_q_modules: dict = {}
+        self.private_q_bucket_modules: Dict[str, Dict[int, QuantizedModule]] = {}
         self.configuration: Optional[Configuration] = None
         self.model_name = model_name
         self.verbose = verbose
+        self.max_concurrent_requests = max_concurrent_requests
+        self.batch_remote_calls = batch_remote_calls
+        self.calibration_reservoir_size = calibration_reservoir_size
+        self.shape_buckets = shape_buckets
+        self.bucket_dim = bucket_dim
         self._replace_modules()
 
     def _replace_modules(self):
@@ -388,6 +866,11 @@ class HybridFHEModel:
                 module_name=module_name,
                 model_name=self.model_name,
                 verbose=self.verbose,
+                max_concurrent_requests=self.max_concurrent_requests,
+                batch_remote_calls=self.batch_remote_calls,
+                calibration_reservoir_size=self.calibration_reservoir_size,
+                shape_buckets=self.shape_buckets,
+                bucket_dim=self.bucket_dim,
             )
 
             self.remote_modules[module_name] = remote_module
@@ -452,19 +935,29 @@ class HybridFHEModel:
             path_to_client.mkdir(exist_ok=True)
             module.init_fhe_client(path_to_client=path_to_client, path_to_keys=path_to_keys)
 
+    # pylint: disable-next=too-many-arguments
     def compile_model(
         self,
-        x: torch.Tensor,
+        x: Union[torch.Tensor, Iterable[torch.Tensor]],
         n_bits: Union[int, Dict[str, int]] = MAX_BITWIDTH_BACKWARD_COMPATIBLE,
         rounding_threshold_bits: Optional[int] = None,
         p_error: Optional[float] = None,
         configuration: Optional[Configuration] = None,
+        n_jobs: Optional[int] = None,
     ):
         """Compiles the specific layers to FHE.
 
+        Modules that have the same architecture, weights and calibration data are compiled once
+        and share the same compiled module. With `n_jobs`, the other modules are compiled in
+        parallel in worker processes, which share the compiled circuits with the current process
+        through the compilation cache. If the `CONCRETE_ML_COMPILATION_CACHE` environment variable
+        is not set, a temporary cache is used.
+
         Args:
-            x (torch.Tensor): The input tensor for the model. This is used to run the model
-                once for calibration.
+            x (Union[torch.Tensor, Iterable[torch.Tensor]]): The input tensor for the model, or
+                an iterable of input batches. This is used to run the model for calibration. Giving
+                batches with `calibration_reservoir_size` set streams the calibration, only keeping
+                a bounded sample of each module's inputs in memory.
             n_bits (int): The bit precision for quantization during FHE model compilation.
                 Default is 8.
             rounding_threshold_bits (int): The number of bits to use for rounding threshold during
@@ -472,41 +965,106 @@ class HybridFHEModel:
             p_error (float): Error allowed for each table look-up in the circuit.
             configuration (Configuration): A concrete Configuration object specifying the FHE
                 encryption parameters. If not specified, a default configuration is used.
+            n_jobs (Optional[int]): The number of worker processes compiling the modules,
+                following scikit-learn's convention. Default to None, which compiles all modules
+                sequentially in the current process.
         """
-        # We do a forward pass where we accumulate inputs to use for compilation
+        # We do forward passes where we accumulate inputs to use for compilation
         for name in self.module_names:
             # default is "calibrate"
             self.remote_modules[name].fhe_local_mode = HybridFHEMode.CALIBRATE
-        self.model(x)
+            self.remote_modules[name].reset_calibration()
+
+        for x_batch in [x] if isinstance(x, torch.Tensor) else x:
+            with torch.no_grad():
+                self.model(x_batch)
 
         self.configuration = configuration
 
+        compile_kwargs = {
+            "n_bits": n_bits,
+            "rounding_threshold_bits": rounding_threshold_bits,
+            "configuration": configuration,
+            "p_error": p_error,
+        }
+
+        # Group the modules that compile to the same circuit, so that each circuit is only compiled
+        # once. With shape buckets, each module is compiled for each bucket, its calibration
+        # examples being split to the bucket's size
+        modules_to_compile: Dict[
+            str, Tuple[nn.Module, torch.Tensor, List[Tuple[str, Optional[int]]]]
+        ] = {}
         for name in self.module_names:
             remote_module = self._get_module_by_name(self.model, name)
             assert isinstance(remote_module, RemoteModule)
 
-            calibration_data_tensor = torch.cat(remote_module.calibration_data, dim=0)
+            calibration_data_tensor = remote_module.get_calibration_data()
 
-            if has_any_qnn_layers(self.private_modules[name]):
-                self.private_q_modules[name] = compile_brevitas_qat_model(
-                    self.private_modules[name],
-                    calibration_data_tensor,
-                    n_bits=n_bits,
-                    rounding_threshold_bits=rounding_threshold_bits,
-                    configuration=configuration,
-                    p_error=p_error,
+            buckets: List[Optional[int]] = (
+                list(remote_module.shape_buckets)
+                if remote_module.shape_buckets is not None
+                else [None]
+            )
+            for bucket in buckets:
+                inputset = (
+                    calibration_data_tensor
+                    if bucket is None
+                    else _split_to_size(calibration_data_tensor, self.bucket_dim, bucket)
                 )
-            else:
-                self.private_q_modules[name] = compile_torch_model(
-                    self.private_modules[name],
-                    calibration_data_tensor,
-                    n_bits=n_bits,
-                    rounding_threshold_bits=rounding_threshold_bits,
-                    configuration=configuration,
-                    p_error=p_error,
+                fingerprint = _get_private_module_fingerprint(self.private_modules[name], inputset)
+
+                if fingerprint in modules_to_compile:
+                    modules_to_compile[fingerprint][2].append((name, bucket))
+                else:
+                    modules_to_compile[fingerprint] = (
+                        self.private_modules[name],
+                        inputset,
+                        [(name, bucket)],
+                    )
+
+        n_workers = min(get_n_jobs(n_jobs), len(modules_to_compile))
+
+        with ExitStack() as stack:
+            if n_workers > 1:
+                compilation_cache_location = stack.enter_context(_shared_compilation_cache())
+
+                # The 'spawn' start method is used as forking a process that holds the FHE
+                # runtime's threads is not safe
+                with ProcessPoolExecutor(
+                    max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")
+                ) as executor:
+                    futures = [
+                        executor.submit(
+                            _compile_private_module_worker,
+                            module,
+                            calibration_data_tensor,
+                            compilation_cache_location,
+                            compile_kwargs,
+                        )
+                        for module, calibration_data_tensor, _ in modules_to_compile.values()
+                    ]
+
+                    # Raise the workers' exceptions, if any
+                    for future in futures:
+                        future.result()
+
+            # Compile the modules in the current process, their servers being loaded from the
+            # compilation cache if they were compiled by the workers
+            for module, calibration_data_tensor, names in modules_to_compile.values():
+                private_q_module = _compile_private_module(
+                    module, calibration_data_tensor, **compile_kwargs
                 )
 
-            self.remote_modules[name].private_q_module = self.private_q_modules[name]
+                for name, bucket in names:
+                    if bucket is None:
+                        self.private_q_modules[name] = private_q_module
+                        self.remote_modules[name].private_q_module = private_q_module
+                    else:
+                        bucket_modules = self.private_q_bucket_modules.setdefault(name, {})
+                        bucket_modules[bucket] = private_q_module
+                        self.remote_modules[name].private_q_bucket_modules[
+                            bucket
+                        ] = private_q_module
 
     def _save_fhe_circuit(self, path: Path, via_mlir=False):
         """Private method that saves the FHE circuits.
@@ -519,21 +1077,30 @@ class HybridFHEModel:
 
         model_path = Path(path)
         for module_name in self.module_names:
-            input_shapes = [
-                tuple(elt.dim_value for elt in onnx_input.type.tensor_type.shape.dim)
-                for onnx_input in self.private_q_modules[  # pylint: disable=protected-access
-                    self.module_names[0]
-                ]._onnx_model.graph.input
-            ]
-            assert len(input_shapes) == 1, "Multi-input circuits not supported yet"
-            model_module_path = model_path.resolve() / module_name
-            model_module_path.mkdir(exist_ok=True)
-            model_module_shape_path = model_module_path / tuple_to_underscore_str(input_shapes[0])
-            model_dev = FHEModelDev(
-                str(model_module_shape_path.resolve()),
-                self.private_q_modules[module_name],
+            private_q_modules = (
+                list(self.private_q_bucket_modules[module_name].values())
+                if module_name in self.private_q_bucket_modules
+                else [self.private_q_modules[module_name]]
             )
-            model_dev.save(via_mlir=via_mlir)
+
+            # Save a circuit for each input shape of the module
+            for private_q_module in private_q_modules:
+                input_shapes = [
+                    tuple(elt.dim_value for elt in onnx_input.type.tensor_type.shape.dim)
+                    # pylint: disable-next=protected-access
+                    for onnx_input in private_q_module._onnx_model.graph.input
+                ]
+                assert len(input_shapes) == 1, "Multi-input circuits not supported yet"
+                model_module_path = model_path.resolve() / module_name
+                model_module_path.mkdir(exist_ok=True)
+                model_module_shape_path = model_module_path / tuple_to_underscore_str(
+                    input_shapes[0]
+                )
+                model_dev = FHEModelDev(
+                    str(model_module_shape_path.resolve()),
+                    private_q_module,
+                )
+                model_dev.save(via_mlir=via_mlir)
 
     def save_and_clear_private_info(self, path: Path, via_mlir=False):
         """Save the PyTorch model to the provided path and also saves the corresponding FHE circuit.
@@ -548,7 +1115,13 @@ class HybridFHEModel:
         for name in self.module_names:
             module = self._get_module_by_name(self.model, name)
             # Remove private information
-            for attr in ["private_module", "calibration_data", "private_q_module"]:
+            for attr in [
+                "private_module",
+                "calibration_data",
+                "calibration_reservoir",
+                "private_q_module",
+                "private_q_bucket_modules",
+            ]:
                 if hasattr(module, attr):
                     setattr(module, attr, None)
 
@@ -586,49 +1159,198 @@ class LoggerStub:  # pragma:no cover
         """
 
 
-@lru_cache(maxsize=None)  # noqa: B019
-def _load_key(key_path: Path, uid: Union[str, uuid.UUID]) -> bytes:  # pragma:no cover
-    """Load a public key from the file system.
+class LRUCache:
+    """Thread-safe least recently used cache, bounded by its number of entries and their size.
 
     Args:
-        key_path (Path): key path
-        uid (Union[str, uuid.UUID]): uid of the public key to load
-
-    Returns:
-        bytes: the bytes of the public key
+        max_size (Optional[int]): the maximum number of entries. If None, the number of entries is
+            not bounded.
+        max_memory (Optional[int]): the maximum total size of the entries, in bytes, as given to
+            `put`. Entries larger than this bound on their own are not cached. If None, the size is
+            not bounded.
     """
-    with open(key_path / str(uid), "rb") as file:
-        return file.read()
 
+    def __init__(self, max_size: Optional[int] = None, max_memory: Optional[int] = None):
+        assert_true(
+            max_size is None or max_size > 0,
+            f"The maximum size of the cache must be strictly positive. Got {max_size}",
+            ValueError,
+        )
+        assert_true(
+            max_memory is None or max_memory > 0,
+            f"The maximum memory of the cache must be strictly positive. Got {max_memory}",
+            ValueError,
+        )
 
-@lru_cache(maxsize=None)  # noqa: B019,W1517
-def _get_circuit(path: str) -> FHEModelServer:  # pragma:no cover
-    """Get circuit based on model name, module name and input shape.
+        self.max_size = max_size
+        self.max_memory = max_memory
 
-    Args:
-        path (str): path to the model server
+        # Entries, from the least to the most recently used, with their size
+        self._entries: OrderedDict[Any, Tuple[Any, int]] = OrderedDict()
+        self._memory = 0
+        self._lock = threading.Lock()
 
-    Returns:
-        FHEModelServer: a fhe model server of the given module of the given model
-            for the given shape
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-    """
-    return FHEModelServer(path)
+    def get(self, key: Any) -> Optional[Any]:
+        """Get an entry and mark it as the most recently used.
+
+        Args:
+            key (Any): the key of the entry
+
+        Returns:
+            Optional[Any]: the value of the entry, or None if it is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: Any, value: Any, size: int = 0):
+        """Add an entry, evicting the least recently used ones if the cache is full.
+
+        An entry larger than `max_memory` on its own is not cached, and replaces any entry of the
+        same key, which is then counted as evicted.
+
+        Args:
+            key (Any): the key of the entry
+            value (Any): the value of the entry
+            size (int): the size of the entry, in bytes
+        """
+        too_large = self.max_memory is not None and size > self.max_memory
+
+        with self._lock:
+            if key in self._entries:
+                self._memory -= self._entries.pop(key)[1]
+
+                if too_large:
+                    self.evictions += 1
+
+            if too_large:
+                return
+
+            self._entries[key] = (value, size)
+            self._memory += size
+
+            while (self.max_size is not None and len(self._entries) > self.max_size) or (
+                self.max_memory is not None and self._memory > self.max_memory
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._memory -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key: Any):
+        """Remove an entry, if cached.
+
+        Args:
+            key (Any): the key of the entry
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._memory -= entry[1]
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Get the cache's metrics.
+
+        Returns:
+            Dict[str, int]: the number of entries, their total size, and the number of hits, misses
+                and evictions
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "memory": self._memory,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
 
 
 class HybridFHEModelServer:  # pragma:no cover
     """Hybrid FHE Model Server.
 
     This is a class object to server FHE models serialized using HybridFHEModel.
+
+    Added keys are deserialized in the background, so that the first computation using them does
+    not pay for it. Circuits can also be loaded before they are first used with `warm_up`.
+
+    Loaded circuits, the keys' bytes and the deserialized keys are kept in bounded least recently
+    used caches, so that clients sending many requests with the same key only pay for the
+    computation itself. Keys evicted from the caches are loaded back from the key path.
+
+    Args:
+        key_path (Path): the directory where the added keys are stored
+        model_dir (Path): the directory where the models' circuits are saved
+        logger (Optional[LoggerStub]): the logger to use, if any
+        circuit_cache_size (Optional[int]): the maximum number of loaded circuits. If None, loaded
+            circuits are never evicted. Default to None.
+        key_cache_memory (Optional[int]): the maximum total size, in bytes, of the keys kept in
+            memory as bytes. If None, the size is not bounded. Default to 1 GB.
+        evaluation_keys_cache_size (Optional[int]): the maximum number of keys kept deserialized
+            in memory. If None, the number of keys is not bounded. Default to 32.
+        evaluation_keys_cache_memory (Optional[int]): the maximum total size, in bytes, of the
+            serialized keys kept deserialized in memory. If None, the size is not bounded. Default
+            to None.
+        max_decompressed_size (Optional[int]): the maximum size, in bytes, of compressed keys once
+            decompressed. Larger keys are rejected before being decompressed. If None, the size is
+            not bounded. Default to `compression.DEFAULT_MAX_DECOMPRESSED_SIZE`.
     """
 
-    def __init__(self, key_path: Path, model_dir: Path, logger: Optional[LoggerStub]):
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+        self,
+        key_path: Path,
+        model_dir: Path,
+        logger: Optional[LoggerStub],
+        circuit_cache_size: Optional[int] = None,
+        key_cache_memory: Optional[int] = 1024**3,
+        evaluation_keys_cache_size: Optional[int] = 32,
+        evaluation_keys_cache_memory: Optional[int] = None,
+        max_decompressed_size: Optional[int] = DEFAULT_MAX_DECOMPRESSED_SIZE,
+    ):
         self.logger = logger
         self.key_path = key_path
         self.key_path.mkdir(exist_ok=True)
         self.model_dir = model_dir
+        self.max_decompressed_size = max_decompressed_size
         self.modules: Dict[str, Dict[str, Dict[str, Dict]]] = defaultdict(dict)
 
+        # Loaded circuits, indexed by their model name, module name and input shape
+        self._circuits = LRUCache(max_size=circuit_cache_size)
+        self._circuits_lock = threading.Lock()
+
+        # Keys' bytes, indexed by their uid
+        self._keys = LRUCache(max_memory=key_cache_memory)
+
+        # Deserialized keys, or the background tasks deserializing them, indexed by their uid and
+        # the model name, module name and input shape they were added for
+        self._evaluation_keys = LRUCache(
+            max_size=evaluation_keys_cache_size, max_memory=evaluation_keys_cache_memory
+        )
+
+        # Keys are deserialized apart from the warm-up, so that loading many circuits doesn't delay
+        # the keys added meanwhile
+        self._warm_up_executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="hybrid-warm-up"
+        )
+        self._keys_executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="hybrid-key-deserialization"
+        )
+        self._warm_up: Optional[Future] = None
+
         # Populate modules at the beginning
         # this could also be done dynamically on each query if needed
         # We build the following mapping:
@@ -654,6 +1376,79 @@ class HybridFHEModelServer:  # pragma:no cover
                         "shape": input_shape,
                     }
 
+    def preload_circuits(self, manifest: Optional[List[Dict[str, str]]] = None) -> int:
+        """Load circuits before they are first used.
+
+        Args:
+            manifest (Optional[List[Dict[str, str]]]): the circuits to load, each given by its
+                "model_name", "module_name" and "input_shape". If the module name or the input
+                shape is missing, all the circuits of the model or of the module are loaded. If
+                None, all the circuits are loaded.
+
+        Returns:
+            int: the number of loaded circuits
+        """
+        if manifest is None:
+            manifest = [{"model_name": model_name} for model_name in self.modules]
+
+        n_circuits = 0
+        for entry in manifest:
+            model_name = entry["model_name"]
+
+            # Check the entry before listing its modules and shapes, as they default to empty
+            self.check_inputs(model_name, entry.get("module_name"), entry.get("input_shape"))
+
+            module_names = (
+                [entry["module_name"]] if "module_name" in entry else list(self.modules[model_name])
+            )
+            for module_name in module_names:
+                input_shapes = (
+                    [entry["input_shape"]]
+                    if "input_shape" in entry
+                    else list(self.modules[model_name][module_name])
+                )
+                for input_shape in input_shapes:
+                    self.get_circuit(model_name, module_name, input_shape)
+                    n_circuits += 1
+
+        if self.logger is not None:
+            self.logger.info(f"Preloaded {n_circuits} circuits")
+
+        return n_circuits
+
+    def warm_up(self, manifest: Optional[List[Dict[str, str]]] = None) -> Future:
+        """Load circuits in the background.
+
+        Args:
+            manifest (Optional[List[Dict[str, str]]]): the circuits to load, as given to
+                `preload_circuits`
+
+        Returns:
+            Future: the background task loading the circuits
+        """
+        self._warm_up = self._warm_up_executor.submit(self.preload_circuits, manifest)
+        return self._warm_up
+
+    @property
+    def ready(self) -> bool:
+        """Check whether the warm-up is done.
+
+        Returns:
+            bool: whether the circuits given to `warm_up` are loaded, True if it was not called
+
+        Raises:
+            Exception: if the warm-up failed
+        """
+        if self._warm_up is None:
+            return True
+
+        if not self._warm_up.done():
+            return False
+
+        # Raise the warm-up's exception, if any
+        self._warm_up.result()
+        return True
+
     def load_key(self, uid: Union[str, uuid.UUID]) -> bytes:
         """Load a public key from the key path in the file system.
 
@@ -663,7 +1458,13 @@ class HybridFHEModelServer:  # pragma:no cover
         Returns:
             bytes: the bytes of the public key
         """
-        return _load_key(self.key_path, uid)
+        key = self._keys.get(str(uid))
+        if key is None:
+            with open(self.key_path / str(uid), "rb") as file:
+                key = file.read()
+            self._keys.put(str(uid), key, len(key))
+
+        return key
 
     def dump_key(self, key_bytes: bytes, uid: Union[uuid.UUID, str]) -> None:
         """Dump a public key to a stream.
@@ -688,8 +1489,66 @@ class HybridFHEModelServer:  # pragma:no cover
                 for the given shape
 
         """
-        path = str(self.modules[model_name][module_name][input_shape]["path"])
-        return _get_circuit(path)
+        circuit = self._circuits.get((model_name, module_name, input_shape))
+        if circuit is not None:
+            return circuit
+
+        # Load circuits one at a time, so that concurrent requests don't load the same one twice
+        with self._circuits_lock:
+            if (model_name, module_name, input_shape) in self._circuits:
+                return self._circuits.get((model_name, module_name, input_shape))
+
+            circuit = FHEModelServer(
+                str(self.modules[model_name][module_name][input_shape]["path"])
+            )
+            self._circuits.put((model_name, module_name, input_shape), circuit)
+
+        return circuit
+
+    def get_evaluation_keys(
+        self, uid: str, model_name: str, module_name: str, input_shape: str
+    ) -> EvaluationKeys:
+        """Get deserialized evaluation keys, loading them from the key path if needed.
+
+        Args:
+            uid (str): uid of the public key
+            model_name (str): model name
+            module_name (str): name of the module in the model
+            input_shape (str): input shape of said module
+
+        Returns:
+            EvaluationKeys: the deserialized evaluation keys
+        """
+        cache_key = (uid, model_name, module_name, input_shape)
+
+        # Wait for the keys being deserialized in the background, if needed
+        evaluation_keys = self._evaluation_keys.get(cache_key)
+        if evaluation_keys is not None:
+            try:
+                return evaluation_keys.result()
+            except Exception:
+                self._evaluation_keys.pop(cache_key)
+                raise
+
+        key = self.load_key(uid)
+        deserialized_keys: Future = Future()
+        deserialized_keys.set_result(EvaluationKeys.deserialize(key))
+        self._evaluation_keys.put(cache_key, deserialized_keys, len(key))
+
+        return deserialized_keys.result()
+
+    def get_cache_metrics(self) -> Dict[str, Dict[str, int]]:
+        """Get the metrics of the circuits and keys caches.
+
+        Returns:
+            Dict[str, Dict[str, int]]: the number of entries, their total size, and the number of
+                hits, misses and evictions of the "circuits", "keys" and "evaluation_keys" caches
+        """
+        return {
+            "circuits": self._circuits.get_metrics(),
+            "keys": self._keys.get_metrics(),
+            "evaluation_keys": self._evaluation_keys.get_metrics(),
+        }
 
     def check_inputs(self, model_name: str, module_name: Optional[str], input_shape: Optional[str]):
         """Check that the given configuration exist in the compiled models folder.
@@ -779,7 +1638,7 @@ class HybridFHEModelServer:  # pragma:no cover
         """Add public key.
 
         Arguments:
-            key (bytes): public key
+            key (bytes): public key, possibly compressed
             model_name (str): model name
             module_name (str): name of the module in the model
             input_shape (str): input shape of said module
@@ -790,7 +1649,18 @@ class HybridFHEModelServer:  # pragma:no cover
         """
         self.check_inputs(model_name, module_name, input_shape)
         uid = str(uuid.uuid4())
+
+        # Store the key uncompressed, so that it is not decompressed for each computation
+        key = decompress(key, self.max_decompressed_size)
         self.dump_key(key, uid)
+        self._keys.put(uid, key, len(key))
+
+        # Deserialize the key in the background, so that it is ready for the first computation
+        self._evaluation_keys.put(
+            (uid, model_name, module_name, input_shape),
+            self._keys_executor.submit(EvaluationKeys.deserialize, key),
+            len(key),
+        )
         return {"uid": uid}
 
     def compute(
@@ -800,36 +1670,40 @@ class HybridFHEModelServer:  # pragma:no cover
         model_name: str,
         module_name: str,
         input_shape: str,
+        compression: Optional[str] = None,
     ):  # noqa: B008
         """Compute the circuit over encrypted input.
 
         Arguments:
-            model_input (bytes): input of the circuit
+            model_input (bytes): input of the circuit, possibly compressed
             uid (str): uid of the public key to use
             model_name (str): model name
             module_name (str): name of the module in the model
             input_shape (str): input shape of said module
+            compression (Optional[str]): the codec used to compress the result, if it is worth
+                compressing. If None, the result is not compressed.
 
         Returns:
             bytes: the result of the circuit
         """
         self.check_inputs(model_name, module_name, input_shape)
         start = time.time()
-        key_bytes = self.load_key(uid)
+        fhe = self.get_circuit(model_name, module_name, input_shape)
         end = time.time()
         if self.logger is not None:
-            self.logger.info(f"It took {end - start} seconds to load the key")
+            self.logger.info(f"It took {end - start} seconds to load the circuit")
 
         start = time.time()
-        fhe = self.get_circuit(model_name, module_name, input_shape)
+        evaluation_keys = self.get_evaluation_keys(uid, model_name, module_name, input_shape)
         end = time.time()
         if self.logger is not None:
-            self.logger.info(f"It took {end - start} seconds to load the circuit")
+            self.logger.info(f"It took {end - start} seconds to load the key")
 
         start = time.time()
         encrypted_results = fhe.run(
             serialized_encrypted_quantized_data=model_input,
-            serialized_evaluation_keys=key_bytes,
+            serialized_evaluation_keys=evaluation_keys,
+            compression=compression,
         )
         end = time.time()
 
@@ -838,3 +1712,32 @@ class HybridFHEModelServer:  # pragma:no cover
             self.logger.info(f"Results size is {len(encrypted_results)/(1024**2)} Mb")
         start = time.time()
         return encrypted_results
+
+    # pylint: disable-next=too-many-arguments
+    def compute_batch(
+        self,
+        model_inputs: List[bytes],
+        uid: str,
+        model_name: str,
+        module_name: str,
+        input_shape: str,
+        compression: Optional[str] = None,
+    ) -> List[bytes]:
+        """Compute the circuit over several encrypted inputs, using the same key.
+
+        Arguments:
+            model_inputs (List[bytes]): inputs of the circuit, possibly compressed
+            uid (str): uid of the public key to use
+            model_name (str): model name
+            module_name (str): name of the module in the model
+            input_shape (str): input shape of said module
+            compression (Optional[str]): the codec used to compress the results, if they are worth
+                compressing. If None, the results are not compressed.
+
+        Returns:
+            List[bytes]: the results of the circuit
+        """
+        return [
+            self.compute(model_input, uid, model_name, module_name, input_shape, compression)
+            for model_input in model_inputs
+        ]
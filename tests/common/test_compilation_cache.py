@@ -0,0 +1,113 @@
+"""Tests for the persistent compilation cache."""
+
+import numpy
+import pytest
+from concrete.fhe import Server
+
+from concrete.ml.common.compilation_cache import COMPILATION_CACHE_ENV_VARIABLE, CompilationCache
+from concrete.ml.sklearn import LogisticRegression
+
+
+@pytest.fixture
+def count_server_compilations(monkeypatch):
+    """Count the number of servers compiled by Concrete."""
+    counter = {"count": 0}
+    create = Server.create
+
+    def counting_create(*args, **kwargs):
+        counter["count"] += 1
+        return create(*args, **kwargs)
+
+    monkeypatch.setattr(Server, "create", counting_create)
+    return counter
+
+
+def test_compilation_cache(tmp_path, monkeypatch, count_server_compilations, default_configuration):
+    """Test that compiled servers are re-used across compilations of the same model."""
+
+    x = numpy.random.rand(100, 4)
+    y = (x.sum(axis=1) > 2).astype(numpy.int64)
+    model = LogisticRegression(n_bits=4).fit(x, y)
+
+    # Without a cache, each compilation compiles a new server
+    model.compile(x, configuration=default_configuration)
+    assert count_server_compilations["count"] == 1
+
+    monkeypatch.setenv(COMPILATION_CACHE_ENV_VARIABLE, str(tmp_path))
+
+    model.compile(x, configuration=default_configuration, simulation_batch_size=10)
+    assert count_server_compilations["count"] == 3
+    assert len(list(tmp_path.glob("*.zip"))) == 1
+    statistics = model.fhe_circuit.statistics
+    y_pred_simulate = model.predict(x, fhe="simulate")
+    y_pred_execute = model.predict(x[:3], fhe="execute")
+
+    # The second compilation of the same model loads the execution server from the cache, only the
+    # simulation server is compiled again
+    model.compile(x, configuration=default_configuration, simulation_batch_size=10)
+    assert count_server_compilations["count"] == 4
+    assert model.fhe_circuit.statistics == statistics
+    assert numpy.array_equal(model.predict(x, fhe="simulate"), y_pred_simulate)
+    assert numpy.array_equal(model.predict(x[:3], fhe="execute"), y_pred_execute)
+
+    # Changing the probability of error gives a different circuit
+    model.compile(x, configuration=default_configuration, p_error=2**-20)
+    assert count_server_compilations["count"] == 5
+    assert len(list(tmp_path.glob("*.zip"))) == 2
+
+    # Entries that can't be loaded are compiled again
+    for path in tmp_path.glob("*.zip"):
+        path.write_bytes(b"corrupted")
+
+    model.compile(x, configuration=default_configuration, p_error=2**-20)
+    assert count_server_compilations["count"] == 6
+    assert numpy.array_equal(model.predict(x[:3], fhe="execute"), y_pred_execute)
+
+
+def test_compilation_cache_without_server_internals(
+    tmp_path, monkeypatch, count_server_compilations, default_configuration
+):
+    """Test that circuits are compiled if the loaded servers can't be restored."""
+
+    x = numpy.random.rand(100, 4)
+    y = (x.sum(axis=1) > 2).astype(numpy.int64)
+    model = LogisticRegression(n_bits=4).fit(x, y)
+
+    monkeypatch.setenv(COMPILATION_CACHE_ENV_VARIABLE, str(tmp_path))
+
+    model.compile(x, configuration=default_configuration)
+    assert count_server_compilations["count"] == 1
+    y_pred_execute = model.predict(x[:3], fhe="execute")
+
+    # Simulate a version of Concrete whose servers don't have the private attributes used by the
+    # cache
+    load = Server.load
+
+    def load_without_internals(path):
+        server = load(path)
+        # pylint: disable-next=protected-access
+        del server._compilation_result
+        return server
+
+    monkeypatch.setattr(Server, "load", load_without_internals)
+
+    with pytest.warns(UserWarning, match="can't restore compiled servers"):
+        model.compile(x, configuration=default_configuration)
+
+    assert count_server_compilations["count"] == 2
+    assert numpy.array_equal(model.predict(x[:3], fhe="execute"), y_pred_execute)
+
+
+def test_compilation_cache_eviction(tmp_path):
+    """Test that the least recently used entries are evicted once the cache is full."""
+
+    cache = CompilationCache(tmp_path, max_size=10)
+
+    for index, size in enumerate([4, 4, 4]):
+        (tmp_path / f"{index}.zip").write_bytes(b"0" * size)
+        cache.evict()
+
+    assert sorted(path.name for path in tmp_path.glob("*.zip")) == ["1.zip", "2.zip"]
+
+    with pytest.raises(ValueError, match="must be a strictly positive integer"):
+        CompilationCache(tmp_path, max_size=0)
@@ -1,5 +1,7 @@
 """Test utils functions."""
 
+import os
+
 import numpy
 import pandas
 import pytest
@@ -7,7 +9,12 @@ import torch
 from torch.utils.data import DataLoader, TensorDataset
 
 from concrete.ml.common.debugging.custom_assert import assert_true
-from concrete.ml.common.utils import compute_bits_precision
+from concrete.ml.common.utils import (
+    compute_bits_precision,
+    get_n_jobs,
+    iter_data_chunks,
+    pad_batch,
+)
 from concrete.ml.pytest.torch_models import QuantCustomModel
 from concrete.ml.pytest.utils import data_calibration_processing
 
@@ -37,6 +44,22 @@ def test_compute_bits_precision(x, expected_n_bits):
     assert_true(compute_bits_precision(numpy.array(x)) == expected_n_bits)
 
 
+@pytest.mark.parametrize(
+    "n_jobs, expected_n_workers",
+    [(None, 1), (1, 1), (3, 3), (-1, os.cpu_count()), (-(os.cpu_count() or 1) - 5, 1)],
+)
+def test_get_n_jobs(n_jobs, expected_n_workers):
+    """Test the function that computes the number of workers from a joblib-like n_jobs value."""
+    assert get_n_jobs(n_jobs) == expected_n_workers
+
+
+@pytest.mark.parametrize("n_jobs", [0, 1.5])
+def test_get_n_jobs_error(n_jobs):
+    """Test that invalid n_jobs values raise an error."""
+    with pytest.raises(ValueError, match="n_jobs should be a non-zero integer or None"):
+        get_n_jobs(n_jobs)
+
+
 @pytest.mark.parametrize("input_type", ["dataloader", "pandas", "list", "numpy", "torch"])
 def test_data_processing_valid_input(input_type, load_data):
     """Check if the _update_attr method raises an exception when an undefined attribute is given."""
@@ -78,3 +101,53 @@ def test_data_processing_invalid_input(input_type, load_data):
 
         with pytest.raises(TypeError, match="Only numpy arrays, torch tensors and .*"):
             _ = data_calibration_processing(data=x, targets=y, n_sample=1)
+
+
+@pytest.mark.parametrize("n_examples, batch_size", [(3, 3), (2, 5), (1, 4)])
+def test_pad_batch(n_examples, batch_size):
+    """Test that batches are padded by repeating their last example."""
+
+    q_input = numpy.arange(n_examples * 2).reshape((n_examples, 2))
+
+    padded_q_input = pad_batch(q_input, batch_size)
+
+    assert padded_q_input.shape == (batch_size, 2)
+    assert numpy.array_equal(padded_q_input[:n_examples], q_input)
+    assert numpy.all(padded_q_input[n_examples:] == q_input[-1])
+
+
+@pytest.mark.parametrize(
+    "container", ["array", "memmap", "tensor", "dataframe", "list", "iterator"]
+)
+def test_iter_data_chunks(container, tmp_path):
+    """Test that data is split in chunks of the given size, whatever its container."""
+
+    values = numpy.arange(23 * 3, dtype=numpy.float64).reshape((23, 3))
+
+    if container == "array":
+        data = values
+    elif container == "memmap":
+        data = numpy.memmap(
+            tmp_path / "data.mmap", dtype=values.dtype, mode="w+", shape=values.shape
+        )
+        data[:] = values
+    elif container == "tensor":
+        data = torch.from_numpy(values)
+    elif container == "dataframe":
+        data = pandas.DataFrame(values)
+    elif container == "list":
+        data = values.tolist()
+    else:
+        data = (pandas.DataFrame(values[start : start + 11]) for start in range(0, 23, 11))
+
+    chunks = list(iter_data_chunks(data, chunk_size=5))
+
+    assert all(len(chunk) <= 5 for chunk in chunks)
+    assert numpy.array_equal(numpy.concatenate([numpy.asarray(chunk) for chunk in chunks]), values)
+
+
+def test_iter_data_chunks_error():
+    """Test that an invalid chunk size raises an error."""
+
+    with pytest.raises(ValueError, match="chunk_size must be a strictly positive integer"):
+        list(iter_data_chunks(numpy.zeros((10, 2)), chunk_size=0))
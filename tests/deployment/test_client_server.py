@@ -1,7 +1,10 @@
 """Tests the deployment APIs."""
 
 import json
+import subprocess
+import sys
 import tempfile
+import time
 import warnings
 import zipfile
 from pathlib import Path
@@ -12,10 +15,20 @@ import pytest
 from sklearn.exceptions import ConvergenceWarning
 from torch import nn
 
-from concrete.ml.deployment.fhe_client_server import FHEModelClient, FHEModelDev, FHEModelServer
+from concrete.ml.deployment.fhe_client_server import (
+    FHEModelClient,
+    FHEModelDev,
+    FHEModelServer,
+    iter_chunks,
+    join_chunks,
+    pack_payloads,
+    unpack_payloads,
+)
+from concrete.ml.deployment.key_store import SQLiteKeyStore
 from concrete.ml.pytest.torch_models import FCSmall
 from concrete.ml.pytest.utils import MODELS_AND_DATASETS, get_model_name, instantiate_model_generic
 from concrete.ml.quantization.quantized_module import QuantizedModule
+from concrete.ml.sklearn import DecisionTreeClassifier, LogisticRegression
 from concrete.ml.torch.compile import compile_torch_model
 
 # pylint: disable=too-many-statements,too-many-locals
@@ -171,6 +184,60 @@ def test_client_server_custom_model(
     )
 
 
+def test_client_server_batched(default_configuration, check_float_array_equal):
+    """Test the client-server interface for a model compiled for batches of examples."""
+
+    # Generate random data
+    x_train = numpy.random.rand(100, 4)
+    y_train = (x_train.sum(axis=1) > 2).astype(numpy.int64)
+    x_test = x_train[:5]
+
+    model = LogisticRegression(n_bits=4)
+    model.fit(x_train, y_train)
+
+    # Use a batch size that does not divide the number of examples in order to check the padding
+    model.compile(x_train, configuration=default_configuration, batch_size=3)
+
+    disk_network = OnDiskNetwork()
+
+    FHEModelDev(path_dir=disk_network.dev_dir.name, model=model).save()
+    disk_network.dev_send_clientspecs_and_modelspecs_to_client()
+    disk_network.dev_send_model_to_server()
+
+    fhe_model_client = FHEModelClient(
+        path_dir=disk_network.client_dir.name,
+        key_dir=default_configuration.insecure_key_cache_location,
+    )
+    fhe_model_server = FHEModelServer(path_dir=disk_network.server_dir.name)
+    fhe_model_server.load()
+
+    assert fhe_model_client.batch_size == 3
+
+    fhe_model_client.generate_private_and_evaluation_keys()
+    evaluation_keys = fhe_model_client.get_serialized_evaluation_keys()
+
+    # Too many examples cannot be encrypted at once
+    with pytest.raises(ValueError, match="The circuit was compiled for batches of 3 examples"):
+        fhe_model_client.quantize_encrypt_serialize(x_test)
+
+    q_x_encrypted_serialized_batches = fhe_model_client.quantize_encrypt_serialize_batches(x_test)
+    assert len(q_x_encrypted_serialized_batches) == 2
+
+    y_pred_batches = [
+        fhe_model_client.deserialize_decrypt_dequantize(
+            fhe_model_server.run(q_x_encrypted_serialized, evaluation_keys)
+        )
+        for q_x_encrypted_serialized in q_x_encrypted_serialized_batches
+    ]
+
+    # Remove the predictions of the padded examples
+    y_pred = numpy.concatenate(y_pred_batches, axis=0)[: len(x_test)]
+
+    check_float_array_equal(y_pred, model.predict_proba(x_test, fhe="execute"))
+
+    disk_network.cleanup()
+
+
 def check_client_server_files(model):
     """Test the client server interface API generates the expected file.
 
@@ -288,3 +355,177 @@ def check_client_server_execution(
 
     # Clean up
     disk_network.cleanup()
+
+
+def test_client_server_lazy_imports(tmp_path, default_configuration):
+    """Test that deploying a linear model does not import the training dependencies."""
+
+    x_train = numpy.random.rand(100, 4)
+    y_train = (x_train.sum(axis=1) > 2).astype(numpy.int64)
+
+    model = LogisticRegression(n_bits=4).fit(x_train, y_train)
+    model.compile(x_train, configuration=default_configuration)
+
+    FHEModelDev(path_dir=str(tmp_path), model=model).save()
+
+    # Load the model on the client and server sides in a fresh process, so that modules imported by
+    # the current test session do not interfere
+    script = f"""
+import sys
+
+import numpy
+
+from concrete.ml.deployment import FHEModelClient, FHEModelServer
+
+client = FHEModelClient(path_dir={str(tmp_path)!r}, key_dir={str(tmp_path / "keys")!r})
+server = FHEModelServer(path_dir={str(tmp_path)!r})
+server.load()
+
+client.generate_private_and_evaluation_keys()
+encrypted_input = client.quantize_encrypt_serialize(numpy.random.rand(1, 4))
+encrypted_output = server.run(encrypted_input, client.get_serialized_evaluation_keys())
+client.deserialize_decrypt_dequantize(encrypted_output)
+
+training_modules = ("brevitas", "hummingbird", "skorch", "xgboost")
+print("loaded:" + ",".join(name for name in training_modules if name in sys.modules))
+"""
+
+    output = subprocess.run(
+        [sys.executable, "-c", script], check=True, capture_output=True, text=True
+    ).stdout
+
+    assert output.strip().splitlines()[-1] == "loaded:"
+
+
+def test_client_server_registered_evaluation_keys(tmp_path, default_configuration):
+    """Test running the server with registered evaluation keys."""
+
+    x_train = numpy.random.rand(100, 4)
+    y_train = (x_train.sum(axis=1) > 2).astype(numpy.int64)
+
+    # Use a model with table lookups, as linear models don't need any evaluation keys
+    model = DecisionTreeClassifier(n_bits=3, max_depth=2).fit(x_train, y_train)
+    model.compile(x_train, configuration=default_configuration)
+
+    dev_dir = tmp_path / "dev"
+    FHEModelDev(path_dir=str(dev_dir), model=model).save()
+
+    # Only keep a single deserialized key in memory, others being loaded from disk
+    server = FHEModelServer(
+        path_dir=str(dev_dir),
+        evaluation_keys_cache_size=1,
+        evaluation_keys_dir=str(tmp_path / "server_keys"),
+    )
+
+    clients = []
+    key_ids = []
+    for _ in range(2):
+        client = FHEModelClient(path_dir=str(dev_dir))
+        client.generate_private_and_evaluation_keys()
+        evaluation_keys = client.get_serialized_evaluation_keys()
+
+        clients.append(client)
+        key_ids.append(server.register_evaluation_keys(evaluation_keys))
+
+        # Registering the same keys again gives the same id
+        assert server.register_evaluation_keys(evaluation_keys) == key_ids[-1]
+
+    assert key_ids[0] != key_ids[1]
+    assert list(server._evaluation_keys_cache) == [key_ids[1]]  # pylint: disable=protected-access
+
+    x_test = x_train[:1]
+    y_pred_clear = model.predict_proba(x_test, fhe="disable")
+
+    # The first client's keys are loaded back from disk
+    for client, key_id in zip(clients, key_ids):
+        encrypted_output = server.run(client.quantize_encrypt_serialize(x_test), key_id)
+        y_pred = client.deserialize_decrypt_dequantize(encrypted_output)
+
+        assert numpy.array_equal(y_pred.argmax(axis=1), y_pred_clear.argmax(axis=1))
+
+    # Keys that are already deserialized can also be given directly
+    encrypted_output = server.run(
+        clients[0].quantize_encrypt_serialize(x_test), server.get_evaluation_keys(key_ids[0])
+    )
+    y_pred = clients[0].deserialize_decrypt_dequantize(encrypted_output)
+    assert numpy.array_equal(y_pred.argmax(axis=1), y_pred_clear.argmax(axis=1))
+
+    # Without a directory, evicted keys need to be registered again
+    server = FHEModelServer(path_dir=str(dev_dir), evaluation_keys_cache_size=1)
+    for client in clients:
+        server.register_evaluation_keys(client.get_serialized_evaluation_keys())
+
+    with pytest.raises(KeyError, match="No evaluation keys are registered"):
+        server.run(clients[0].quantize_encrypt_serialize(x_test), key_ids[0])
+
+    # Keys that are not used expire, even if they are still in the cache
+    server = FHEModelServer(
+        path_dir=str(dev_dir),
+        evaluation_keys_store=SQLiteKeyStore(tmp_path / "sqlite_keys", ttl=0.5),
+    )
+    key_id = server.register_evaluation_keys(clients[0].get_serialized_evaluation_keys())
+    assert server.get_evaluation_keys(key_id) is not None
+
+    time.sleep(1)
+    with pytest.raises(KeyError, match="No evaluation keys are registered"):
+        server.get_evaluation_keys(key_id)
+    assert not server.evaluation_keys_store.entries()
+
+    with pytest.raises(ValueError, match="must be a strictly positive integer"):
+        FHEModelServer(path_dir=str(dev_dir), evaluation_keys_cache_size=0)
+
+
+def test_client_server_chunks(tmp_path, default_configuration):
+    """Test streaming keys, inputs and results in chunks."""
+
+    x_train = numpy.random.rand(100, 4)
+    y_train = (x_train.sum(axis=1) > 2).astype(numpy.int64)
+
+    model = LogisticRegression(n_bits=4).fit(x_train, y_train)
+    model.compile(x_train, configuration=default_configuration)
+
+    dev_dir = tmp_path / "dev"
+    FHEModelDev(path_dir=str(dev_dir), model=model).save()
+
+    client = FHEModelClient(path_dir=str(dev_dir))
+    client.generate_private_and_evaluation_keys()
+    server = FHEModelServer(path_dir=str(dev_dir))
+
+    # Chunks are views on the serialized values, so they can be gathered back without any loss
+    evaluation_keys_chunks = list(client.get_serialized_evaluation_keys_chunks(chunk_size=100))
+    assert all(len(chunk) <= 100 for chunk in evaluation_keys_chunks)
+    evaluation_keys = join_chunks(evaluation_keys_chunks)
+    assert evaluation_keys == client.get_serialized_evaluation_keys()
+
+    x_test = x_train[:1]
+    encrypted_input = join_chunks(client.quantize_encrypt_serialize_chunks(x_test, chunk_size=100))
+    encrypted_output = server.run(encrypted_input, evaluation_keys)
+
+    y_pred = client.deserialize_decrypt_dequantize_chunks(iter_chunks(encrypted_output, 100))
+    assert numpy.array_equal(
+        y_pred.argmax(axis=1), model.predict_proba(x_test, fhe="disable").argmax(axis=1)
+    )
+
+    with pytest.raises(ValueError, match="The chunk size must be strictly positive"):
+        iter_chunks(evaluation_keys, chunk_size=0)
+
+    # Several payloads can be packed together
+    payloads = [encrypted_input, b"", encrypted_output]
+    packed_payloads = pack_payloads(payloads)
+    assert unpack_payloads(packed_payloads) == payloads
+
+    with pytest.raises(ValueError, match="The packed payloads are truncated"):
+        unpack_payloads(packed_payloads[:-1])
+
+    # Compressed payloads are understood by both the client and the server
+    client = FHEModelClient(path_dir=str(dev_dir), compression="zlib")
+    client.generate_private_and_evaluation_keys()
+    encrypted_output = server.run(
+        client.quantize_encrypt_serialize(x_test),
+        client.get_serialized_evaluation_keys(),
+        compression="zlib",
+    )
+    y_pred = client.deserialize_decrypt_dequantize(encrypted_output)
+    assert numpy.array_equal(
+        y_pred.argmax(axis=1), model.predict_proba(x_test, fhe="disable").argmax(axis=1)
+    )
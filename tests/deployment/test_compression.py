@@ -0,0 +1,79 @@
+"""Tests the compression of the serialized keys and values."""
+
+import struct
+
+import numpy
+import pytest
+
+from concrete.ml.deployment.compression import (
+    CODECS,
+    COMPRESSION_HEADER_FORMAT,
+    COMPRESSION_HEADER_SIZE,
+    COMPRESSION_MAGIC,
+    available_compressions,
+    compress,
+    decompress,
+    is_compressed,
+    negotiate_compression,
+)
+
+
+@pytest.mark.parametrize("compression", available_compressions())
+def test_compression(compression):
+    """Test that payloads are compressed only if it is worth it."""
+
+    # Payloads with a lot of redundancy are compressed, even when larger than the sample size
+    data = numpy.arange(1_000_000, dtype=numpy.uint64).tobytes()
+    compressed_data = compress(data, compression)
+    assert is_compressed(compressed_data)
+    assert len(compressed_data) < len(data)
+    assert decompress(compressed_data) == data
+
+    # Uniformly random payloads, like keys and ciphertexts, are left as is
+    random_data = numpy.random.bytes(2_000_000)
+    assert compress(random_data, compression) is random_data
+    assert decompress(random_data) is random_data
+
+
+def test_compression_errors():
+    """Test the negotiation of codecs and the errors on invalid payloads."""
+
+    assert "zlib" in available_compressions()
+    assert negotiate_compression(None) is None
+    assert negotiate_compression("unknown, zlib") == "zlib"
+    assert negotiate_compression("unknown") is None
+
+    data = bytes(10_000)
+    assert compress(data, None) is data
+
+    with pytest.raises(ValueError, match="Unknown compression 'unknown'"):
+        compress(data, "unknown")
+
+    compressed_data = compress(data, "zlib")
+
+    with pytest.raises(ValueError, match="unknown codec"):
+        decompress(compressed_data[:4] + b"\xff" + compressed_data[5:])
+
+    with pytest.raises(ValueError, match="The payload is corrupted"):
+        decompress(compressed_data[:5] + bytes(8) + compressed_data[COMPRESSION_HEADER_SIZE:])
+
+
+@pytest.mark.parametrize("compression", available_compressions())
+def test_decompression_bomb(compression):
+    """Test that payloads are never decompressed beyond their announced and maximum sizes."""
+
+    # A small payload decompressing to 100 MB
+    data = bytes(100 * 1024**2)
+    compressed_data = compress(data, compression)
+    assert len(compressed_data) < 1024**2
+
+    # Payloads announcing too large a size are rejected before being decompressed
+    with pytest.raises(ValueError, match="The payload is too large"):
+        decompress(compressed_data, max_size=1024**2)
+
+    assert decompress(compressed_data, max_size=None) == data
+
+    # Payloads decompressing to more than announced are rejected without being fully decompressed
+    header = struct.pack(COMPRESSION_HEADER_FORMAT, COMPRESSION_MAGIC, CODECS[compression][0], 10)
+    with pytest.raises(ValueError, match="expected 10 bytes once decompressed but got more"):
+        decompress(header + compressed_data[COMPRESSION_HEADER_SIZE:])
@@ -0,0 +1,74 @@
+"""Tests the persistent stores of evaluation keys."""
+
+import time
+
+import pytest
+
+from concrete.ml.deployment.key_store import KEY_STORES, create_key_store
+
+
+@pytest.mark.parametrize("kind", sorted(KEY_STORES))
+def test_key_store(kind, tmp_path):
+    """Test storing, sharing and evicting keys."""
+
+    key_store = create_key_store(kind, tmp_path, max_size=20)
+
+    key_store.put("a", b"a" * 10)
+    key_store.put("b", b"b" * 10)
+    assert key_store.get("a") == b"a" * 10
+    assert key_store.get("unknown") is None
+
+    # Keys are shared by the stores using the same location
+    other_key_store = create_key_store(kind, tmp_path)
+    assert other_key_store.get("b") == b"b" * 10
+
+    # "a" is the least recently used keys once "b" was read, so it is evicted first
+    time.sleep(0.01)
+    key_store.put("c", b"c" * 10)
+    assert sorted(key_id for key_id, _, _ in key_store.entries()) == ["b", "c"]
+    assert key_store.get("a") is None
+
+    key_store.delete("b")
+    assert key_store.get("b") is None
+
+    # Keys larger than the store are rejected instead of being evicted right away
+    with pytest.raises(ValueError, match="more than the maximum size of the key store"):
+        key_store.put("d", b"d" * 21)
+
+    assert sorted(key_id for key_id, _, _ in key_store.entries()) == ["c"]
+
+
+@pytest.mark.parametrize("kind", sorted(KEY_STORES))
+def test_key_store_ttl(kind, tmp_path):
+    """Test that unused keys expire."""
+
+    key_store = create_key_store(kind, tmp_path, ttl=0.2)
+
+    key_store.put("a", b"a")
+    key_store.put("b", b"b")
+
+    # Reading keys keeps them alive
+    time.sleep(0.15)
+    assert key_store.get("a") == b"a"
+
+    time.sleep(0.1)
+    assert key_store.get("a") == b"a"
+    assert key_store.get("b") is None
+
+    # Expired keys are removed from the store when new ones are added
+    time.sleep(0.25)
+    key_store.put("c", b"c")
+    assert [key_id for key_id, _, _ in key_store.entries()] == ["c"]
+
+
+def test_key_store_errors(tmp_path):
+    """Test that invalid key stores are rejected."""
+
+    with pytest.raises(ValueError, match="Unknown key store 'unknown'"):
+        create_key_store("unknown", tmp_path)
+
+    with pytest.raises(ValueError, match="time to live must be strictly positive"):
+        create_key_store("directory", tmp_path, ttl=0)
+
+    with pytest.raises(ValueError, match="maximum size of the key store must be strictly positive"):
+        create_key_store("sqlite", tmp_path, max_size=0)
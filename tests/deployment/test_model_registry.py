@@ -0,0 +1,190 @@
+"""Tests the registry serving several FHE models."""
+
+import threading
+from pathlib import Path
+
+import numpy
+import pytest
+
+from concrete.ml.deployment import (
+    FHEModelClient,
+    FHEModelDev,
+    FHEModelServer,
+    model_registry,
+    server,
+)
+from concrete.ml.deployment.model_registry import FHEModelRegistry, discover_models
+from concrete.ml.sklearn import LogisticRegression
+
+
+def test_model_registry(tmp_path, default_configuration):
+    """Test that models are discovered, loaded when needed and evicted once too many are loaded."""
+
+    x_train = numpy.random.rand(100, 4)
+    y_train = (x_train.sum(axis=1) > 2).astype(numpy.int64)
+
+    model = LogisticRegression(n_bits=4).fit(x_train, y_train)
+    model.compile(x_train, configuration=default_configuration)
+
+    models_dir = tmp_path / "models"
+    for model_name in ["tenant_a/model", "tenant_b/model"]:
+        FHEModelDev(path_dir=str(models_dir / model_name), model=model).save()
+
+    models = discover_models(models_dir)
+    assert models == {
+        "tenant_a/model": str(models_dir / "tenant_a/model"),
+        "tenant_b/model": str(models_dir / "tenant_b/model"),
+    }
+
+    # Only a single model fits in the registry
+    model_size = (models_dir / "tenant_a/model/server.zip").stat().st_size
+    registry = FHEModelRegistry(
+        models, max_loaded_size=model_size, evaluation_keys_dir=str(tmp_path / "keys")
+    )
+    assert not registry.loaded_models
+
+    client = FHEModelClient(path_dir=str(models_dir / "tenant_a/model"))
+    client.generate_private_and_evaluation_keys()
+    evaluation_keys = client.get_serialized_evaluation_keys()
+
+    x_test = x_train[:1]
+    y_pred_clear = model.predict_proba(x_test, fhe="disable")
+
+    for model_name in models:
+        fhe_server, load_time = registry.load(model_name)
+        assert load_time is not None
+        assert registry.loaded_models == [model_name]
+
+        # Keys are stored in a directory specific to each model
+        key_id = fhe_server.register_evaluation_keys(evaluation_keys)
+        assert (tmp_path / "keys" / model_name / f"{key_id}.ekl").is_file()
+
+        encrypted_output = fhe_server.run(client.quantize_encrypt_serialize(x_test), key_id)
+        y_pred = client.deserialize_decrypt_dequantize(encrypted_output)
+        assert numpy.array_equal(y_pred.argmax(axis=1), y_pred_clear.argmax(axis=1))
+
+        # Loaded models are re-used
+        assert registry.load(model_name) == (fhe_server, None)
+
+    # The first model is loaded again
+    registry.get("tenant_a/model")
+
+    assert {name: metrics["loads"] for name, metrics in registry.load_metrics.items()} == {
+        "tenant_a/model": 2,
+        "tenant_b/model": 1,
+    }
+    assert registry.get_metrics()["loaded_models"] == ["tenant_a/model"]
+
+    with pytest.raises(KeyError, match="No model is named unknown"):
+        registry.get("unknown")
+
+
+def test_run_model_computations(tmp_path, default_configuration, monkeypatch):
+    """Test that the computations of a batch share the lookup of their model and key."""
+
+    x_train = numpy.random.rand(100, 4)
+    y_train = (x_train.sum(axis=1) > 2).astype(numpy.int64)
+
+    model = LogisticRegression(n_bits=4).fit(x_train, y_train)
+    model.compile(x_train, configuration=default_configuration)
+
+    model_dir = tmp_path / "model"
+    FHEModelDev(path_dir=str(model_dir), model=model).save()
+
+    # Restore the registry of the current process once the test is done
+    monkeypatch.setattr(server, "MODEL_REGISTRY", None)
+    server.init_model_registry(
+        {"model": str(model_dir)}, None, str(tmp_path / "keys"), "directory", {}, {}
+    )
+    fhe_server, _ = server.MODEL_REGISTRY.load("model")
+
+    client = FHEModelClient(path_dir=str(model_dir))
+    client.generate_private_and_evaluation_keys()
+    uid = fhe_server.register_evaluation_keys(client.get_serialized_evaluation_keys())
+
+    # Count the lookups of the deserialized keys
+    key_lookups = []
+    get_evaluation_keys = FHEModelServer.get_evaluation_keys
+
+    def counting_get_evaluation_keys(self, key_id):
+        key_lookups.append(key_id)
+        return get_evaluation_keys(self, key_id)
+
+    monkeypatch.setattr(FHEModelServer, "get_evaluation_keys", counting_get_evaluation_keys)
+
+    x_test = x_train[:3]
+    computations = []
+    for index, x in enumerate(x_test):
+        input_path = tmp_path / f"input_{index}"
+        input_path.write_bytes(client.quantize_encrypt_serialize(x[None, :]))
+        computations.append((str(input_path), str(tmp_path / f"result_{index}"), None))
+
+    # Add a computation with an invalid input
+    (tmp_path / "invalid_input").write_bytes(b"invalid")
+    computations.append((str(tmp_path / "invalid_input"), str(tmp_path / "invalid_result"), None))
+
+    load_time, errors = server.run_model_computations("model", uid, computations)
+
+    # The model was already loaded and the key is only looked up once for the whole batch
+    assert load_time is None
+    assert key_lookups == [uid]
+
+    assert errors[:3] == [None] * 3 and isinstance(errors[3], Exception)
+
+    y_pred_clear = model.predict_proba(x_test, fhe="disable")
+    for index, (_, result_path, _) in enumerate(computations[:3]):
+        y_pred = client.deserialize_decrypt_dequantize(Path(result_path).read_bytes())
+        assert numpy.array_equal(y_pred.argmax(axis=1), y_pred_clear[[index]].argmax(axis=1))
+
+    # An unknown key fails all the computations of the batch
+    _, errors = server.run_model_computations("model", "unknown", computations[:2])
+    assert len(errors) == 2 and all(isinstance(error, KeyError) for error in errors)
+
+
+def test_model_registry_concurrent_loads(tmp_path, default_configuration, monkeypatch):
+    """Test that loading a model does not block the use of the models that are already loaded."""
+
+    x_train = numpy.random.rand(100, 4)
+    y_train = (x_train.sum(axis=1) > 2).astype(numpy.int64)
+
+    model = LogisticRegression(n_bits=4).fit(x_train, y_train)
+    model.compile(x_train, configuration=default_configuration)
+
+    for model_name in ["fast", "slow"]:
+        FHEModelDev(path_dir=str(tmp_path / model_name), model=model).save()
+
+    registry = FHEModelRegistry(discover_models(tmp_path))
+    fast_server, _ = registry.load("fast")
+
+    # Make the load of the "slow" model wait until it is released
+    slow_load_started = threading.Event()
+    release_slow_load = threading.Event()
+
+    def blocking_fhe_model_server(path_dir, **kwargs):
+        if path_dir.endswith("slow"):
+            slow_load_started.set()
+            assert release_slow_load.wait(timeout=10)
+        return FHEModelServer(path_dir, **kwargs)
+
+    monkeypatch.setattr(model_registry, "FHEModelServer", blocking_fhe_model_server)
+
+    slow_loads = []
+    threads = [
+        threading.Thread(target=lambda: slow_loads.append(registry.load("slow"))) for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+
+    assert slow_load_started.wait(timeout=10)
+
+    # The loaded model is still available while the other one is loading
+    assert registry.load("fast") == (fast_server, None)
+
+    release_slow_load.set()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    # Concurrent loads of the same model only load it once
+    assert sorted(load_time is None for _, load_time in slow_loads) == [False, True]
+    assert slow_loads[0][0] is slow_loads[1][0]
+    assert registry.load_metrics["slow"]["loads"] == 1
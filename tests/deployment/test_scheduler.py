@@ -0,0 +1,99 @@
+"""Tests the scheduler batching requests."""
+
+import asyncio
+import time
+
+import pytest
+
+from concrete.ml.deployment.scheduler import BatchScheduler
+
+
+def test_batch_scheduler():
+    """Test that concurrent requests with the same key are batched together."""
+
+    batches = []
+
+    async def process_batch(key, inputs):
+        batches.append((key, list(inputs)))
+        if key == "error":
+            raise ValueError("Batch failed")
+        return [f"{key}-{request_input}" for request_input in inputs]
+
+    async def run_requests():
+        scheduler = BatchScheduler(process_batch, max_batch_size=3, max_wait_time=0.01)
+
+        results = await asyncio.gather(
+            *(scheduler.submit("a", index) for index in range(4)),
+            scheduler.submit("b", 0),
+        )
+
+        with pytest.raises(ValueError, match="Batch failed"):
+            await scheduler.submit("error", 0)
+
+        # Let the tasks processing the batches complete
+        await asyncio.sleep(0)
+
+        return results, scheduler.get_metrics()
+
+    results, metrics = asyncio.run(run_requests())
+
+    assert results == ["a-0", "a-1", "a-2", "a-3", "b-0"]
+
+    # The first batch is dispatched once full, the others after the maximum wait time
+    assert batches == [("a", [0, 1, 2]), ("a", [3]), ("b", [0]), ("error", [0])]
+    assert metrics == {"queue_depth": 0, "running_batches": 0, "batch_size_histogram": {1: 3, 3: 1}}
+
+    with pytest.raises(ValueError, match="must be a strictly positive integer"):
+        BatchScheduler(process_batch, max_batch_size=0)
+
+
+def test_batch_scheduler_request_errors():
+    """Test that an error returned for a request of a batch is only raised to this request."""
+
+    async def process_batch(_, inputs):
+        return [
+            ValueError(f"Request {request_input} failed") if request_input < 0 else request_input
+            for request_input in inputs
+        ]
+
+    async def run_requests():
+        scheduler = BatchScheduler(process_batch, max_batch_size=3, max_wait_time=0.01)
+
+        return await asyncio.gather(
+            *(scheduler.submit("a", request_input) for request_input in [1, -1, 2]),
+            return_exceptions=True,
+        )
+
+    first_result, error, last_result = asyncio.run(run_requests())
+
+    assert (first_result, last_result) == (1, 2)
+    assert isinstance(error, ValueError) and str(error) == "Request -1 failed"
+
+
+def test_batch_scheduler_dispatch_when_idle():
+    """Test that requests are dispatched right away when no batch is being processed."""
+
+    batches = []
+
+    async def process_batch(_, inputs):
+        batches.append(list(inputs))
+        await asyncio.sleep(0.05)
+        return inputs
+
+    async def run_requests():
+        scheduler = BatchScheduler(
+            process_batch, max_batch_size=2, max_wait_time=10.0, dispatch_when_idle=True
+        )
+
+        first_request = asyncio.ensure_future(scheduler.submit("a", 0))
+        await asyncio.sleep(0.01)
+
+        # The first request is being processed, so the next ones wait for a full batch
+        return await asyncio.gather(
+            first_request, scheduler.submit("a", 1), scheduler.submit("a", 2)
+        )
+
+    start = time.perf_counter()
+    assert asyncio.run(run_requests()) == [0, 1, 2]
+    assert time.perf_counter() - start < 1.0
+    assert batches == [[0], [1, 2]]
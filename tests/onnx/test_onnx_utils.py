@@ -0,0 +1,45 @@
+"""Test file for the ONNX utils."""
+
+import numpy
+from onnx import TensorProto, helper
+
+from concrete.ml.onnx.onnx_utils import execute_onnx_with_numpy, get_tensors_to_free
+
+
+def test_get_tensors_to_free():
+    """Test that tensors are freed after their last consumer, except the kept ones."""
+
+    tensors_to_free = get_tensors_to_free(
+        [("x",), ("a",), ("x", "b"), ()],
+        [("a",), ("b",), ("c",), ("unused",)],
+        ["c"],
+    )
+
+    assert tensors_to_free == [(), ("a",), ("x", "b"), ("unused",)]
+
+
+def test_execute_onnx_with_numpy_frees_intermediates():
+    """Test that executing a graph with intermediates used by several nodes is correct."""
+
+    nodes = [
+        helper.make_node("Relu", inputs=["x"], outputs=["a"]),
+        helper.make_node("Add", inputs=["a", "x"], outputs=["b"]),
+        helper.make_node("Mul", inputs=["b", "a"], outputs=["c"]),
+        helper.make_node("Relu", inputs=["c"], outputs=["d"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "test_graph",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [2, 3])],
+        [
+            helper.make_tensor_value_info("b", TensorProto.FLOAT, [2, 3]),
+            helper.make_tensor_value_info("d", TensorProto.FLOAT, [2, 3]),
+        ],
+    )
+
+    x = numpy.random.uniform(-1, 1, size=(2, 3))
+    b, d = execute_onnx_with_numpy(graph, x)
+
+    a = numpy.maximum(x, 0)
+    assert numpy.allclose(b, a + x)
+    assert numpy.allclose(d, numpy.maximum((a + x) * a, 0))
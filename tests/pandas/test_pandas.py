@@ -5,6 +5,7 @@ import shutil
 import tempfile
 from pathlib import Path
 from typing import List, Optional, Sequence, Tuple, Union
+from zipfile import ZipFile
 
 import numpy
 import pandas
@@ -12,8 +13,22 @@ import pytest
 from concrete.fhe.compilation.specs import ClientSpecs
 
 import concrete.ml.pandas
+from concrete import fhe
 from concrete.ml.pandas import ClientEngine, load_encrypted_dataframe
-from concrete.ml.pandas._development import CLIENT_PATH, get_min_max_allowed, save_client_server
+from concrete.ml.pandas._development import (
+    CLIENT_PATH,
+    LEFT_RIGHT_JOIN_BLOCK_SIZES,
+    N_BITS_PANDAS,
+    get_left_right_join_inputset,
+    get_min_max_allowed,
+    left_right_join_to_compile,
+    load_server,
+    save_client_server,
+)
+from concrete.ml.pandas._operators import (
+    get_left_right_join_block_size,
+    get_server_left_right_join_block_sizes,
+)
 from concrete.ml.pytest.utils import pandas_dataframe_are_equal
 
 
@@ -212,6 +227,105 @@ def test_merge(as_method, how, selected_column):
     ), "Joined encrypted data-frame does not match Pandas' joined data-frame."
 
 
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_merge_n_jobs(n_jobs):
+    """Test that merging with several workers matches Pandas and reports the progress."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        keys_path = Path(temp_dir) / "keys"
+
+        client = ClientEngine(keys_path=keys_path)
+
+    pandas_df_left = generate_pandas_dataframe(feat_name="left", indexes=[1, 2, 3])
+    pandas_df_right = generate_pandas_dataframe(feat_name="right", indexes=[2, 3])
+
+    encrypted_df_left = client.encrypt_from_pandas(pandas_df_left)
+    encrypted_df_right = client.encrypt_from_pandas(pandas_df_right)
+
+    progress = []
+    encrypted_df_joined = encrypted_df_left.merge(
+        encrypted_df_right,
+        how="left",
+        on="index",
+        n_jobs=n_jobs,
+        progress_callback=lambda *args: progress.append(args),
+    )
+
+    clear_df_joined = client.decrypt_to_pandas(encrypted_df_joined)
+    pandas_joined_df = pandas_df_left.merge(pandas_df_right, how="left", on="index")
+
+    assert pandas_dataframe_are_equal(
+        clear_df_joined, pandas_joined_df, float_atol=1, equal_nan=True
+    ), "Joined encrypted data-frame does not match Pandas' joined data-frame."
+
+    assert [(n_rows_joined, n_rows) for n_rows_joined, n_rows, _ in progress] == [
+        (1, 3),
+        (2, 3),
+        (3, 3),
+    ]
+    assert progress[-1][2] == 0
+
+
+@pytest.mark.parametrize(
+    "indexes_right, expected_block_size",
+    [
+        pytest.param([2], None, id="scalar"),
+        pytest.param([1, 3, 4], (2, 2), id="block_2x2"),
+        pytest.param([5, 1, 2, 4, 3], (4, 4), id="block_4x4"),
+    ],
+)
+def test_merge_blocks(indexes_right, expected_block_size):
+    """Test that merging by blocks of the right data-frame matches Pandas."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        keys_path = Path(temp_dir) / "keys"
+
+        client = ClientEngine(keys_path=keys_path)
+
+    pandas_df_left = generate_pandas_dataframe(feat_name="left", indexes=[4, 2])
+    pandas_df_right = generate_pandas_dataframe(
+        feat_name="right", n_features=2, indexes=indexes_right
+    )
+
+    # The column to merge on is not joined
+    assert (
+        get_left_right_join_block_size(len(indexes_right), len(pandas_df_right.columns) - 1)
+        == expected_block_size
+    )
+
+    encrypted_df_left = client.encrypt_from_pandas(pandas_df_left)
+    encrypted_df_right = client.encrypt_from_pandas(pandas_df_right)
+
+    encrypted_df_joined = encrypted_df_left.merge(encrypted_df_right, how="left", on="index")
+
+    clear_df_joined = client.decrypt_to_pandas(encrypted_df_joined)
+    pandas_joined_df = pandas_df_left.merge(pandas_df_right, how="left", on="index")
+
+    assert pandas_dataframe_are_equal(
+        clear_df_joined, pandas_joined_df, float_atol=1, equal_nan=True
+    ), "Joined encrypted data-frame does not match Pandas' joined data-frame."
+
+
+def test_server_block_sizes():
+    """Test that block joins are only used if the server provides them."""
+    assert get_server_left_right_join_block_sizes(load_server()) == LEFT_RIGHT_JOIN_BLOCK_SIZES
+
+    # Servers built before block joins were introduced only provide the scalar join
+    scalar_join_circuit = fhe.compiler(
+        {
+            "val_1": "encrypted",
+            "val_2": "encrypted",
+            "left_key": "encrypted",
+            "right_key": "encrypted",
+        }
+    )(left_right_join_to_compile).compile(
+        get_left_right_join_inputset(N_BITS_PANDAS), composable=True
+    )
+
+    block_sizes = get_server_left_right_join_block_sizes(scalar_join_circuit.server)
+    assert not block_sizes
+
+    assert get_left_right_join_block_size(8, 8, block_sizes) is None
+
+
 @pytest.mark.parametrize("dtype", ["int", "float", "str", "mixed"])
 def test_pre_post_processing(dtype):
     """Test pre-processing and post-processing steps."""
@@ -257,7 +371,23 @@ def test_quantization_corner_cases(float_min_max):
     ), "Processed encrypted data-frame does not match Pandas' initial data-frame."
 
 
-def test_save_load():
+def get_encrypted_values_size(path: Path) -> int:
+    """Get the size of a saved encrypted data-frame, without its evaluation keys.
+
+    Args:
+        path (Path): The path of the saved encrypted data-frame, without the '.zip' suffix.
+
+    Returns:
+        int: The total size of the saved files, evaluation keys excluded.
+    """
+    with ZipFile(path.with_suffix(".zip")) as zip_file:
+        return sum(
+            info.file_size for info in zip_file.infolist() if info.filename != "evaluation_keys"
+        )
+
+
+@pytest.mark.parametrize("columnar", [True, False])
+def test_save_load(columnar):
     """Test saving and loading an encrypted data-frame."""
     client = ClientEngine()
 
@@ -268,10 +398,19 @@ def test_save_load():
     with tempfile.TemporaryDirectory() as temp_dir:
         enc_df_path = Path(temp_dir) / "encrypted_dataframe"
 
-        encrypted_df.save(enc_df_path)
+        encrypted_df.save(enc_df_path, columnar=columnar)
 
         loaded_encrypted_df = load_encrypted_dataframe(enc_df_path)
 
+        # The binary columnar format does not store values as hexadecimal strings
+        if columnar:
+            json_enc_df_path = Path(temp_dir) / "encrypted_dataframe_json"
+            encrypted_df.save(json_enc_df_path, columnar=False)
+
+            assert get_encrypted_values_size(enc_df_path) * 1.5 < get_encrypted_values_size(
+                json_enc_df_path
+            ), "Columnar encrypted data-frame file is not smaller than the JSON one."
+
     assert (
         encrypted_df.api_version == loaded_encrypted_df.api_version
     ), "API versions between initial and loaded encrypted data-frame do not match."
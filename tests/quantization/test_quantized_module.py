@@ -558,3 +558,139 @@ def test_crt_circuit_creation_with_rounding(model_class, input_shape, default_co
         quantized_model_without_rounding.fhe_circuit.statistics.get("packing_key_switch_count", 0)
         > 0
     ), "Packing key switch count should be > 0 when rounding_threshold_bits is not set."
+
+
+@pytest.mark.parametrize("simulation_batch_size", [1, 7, 100])
+@pytest.mark.parametrize("model_class, input_shape", [pytest.param(FC, (50, 32 * 32 * 3))])
+def test_batched_simulation(model_class, input_shape, simulation_batch_size, default_configuration):
+    """Check that simulating batches of examples matches the simulation of each example."""
+
+    torch_fc_model = model_class(activation_function=nn.ReLU)
+    torch_fc_model.eval()
+
+    # Create random input
+    numpy_input = numpy.random.uniform(size=input_shape)
+    torch_input = torch.from_numpy(numpy_input).float()
+
+    # Use a very small p_error so that both simulations are exact
+    quantized_model = compile_torch_model(
+        torch_fc_model,
+        torch_input,
+        False,
+        default_configuration,
+        n_bits=4,
+        p_error=2**-40,
+        rounding_threshold_bits=6,
+    )
+
+    assert quantized_model.fhe_simulation_circuit is None
+    y_pred_per_example = quantized_model.forward(numpy_input[:23], fhe="simulate")
+
+    # Re-compile the module with a simulation circuit for batches of examples
+    quantized_model.compile(
+        numpy_input,
+        default_configuration,
+        p_error=2**-40,
+        simulation_batch_size=simulation_batch_size,
+    )
+
+    assert quantized_model.fhe_simulation_circuit is not None
+    y_pred_batched = quantized_model.forward(numpy_input[:23], fhe="simulate")
+
+    assert numpy.array_equal(y_pred_per_example, y_pred_batched)
+
+    # Compiling again without a batch size removes the simulation circuit
+    quantized_model.compile(numpy_input, default_configuration, p_error=2**-40)
+    assert quantized_model.fhe_simulation_circuit is None
+
+
+def test_batched_execution(default_configuration):
+    """Check that a circuit compiled for batches of examples matches per-example predictions."""
+
+    torch_fc_model = FC(activation_function=nn.ReLU)
+    torch_fc_model.eval()
+
+    numpy_input = numpy.random.uniform(size=(50, 32 * 32 * 3))
+
+    # Use a very small p_error so that FHE executions are exact
+    quantized_model = compile_torch_model(
+        torch_fc_model,
+        torch.from_numpy(numpy_input).float(),
+        False,
+        default_configuration,
+        n_bits=2,
+        p_error=2**-40,
+        rounding_threshold_bits=4,
+    )
+
+    y_pred_per_example = quantized_model.forward(numpy_input[:5], fhe="simulate")
+
+    # Use a batch size that does not divide the number of examples in order to check the padding
+    quantized_model.compile(numpy_input, default_configuration, p_error=2**-40, batch_size=3)
+
+    assert quantized_model.fhe_circuit is not None
+    assert quantized_model.fhe_circuit.graph.ordered_inputs()[0].output.shape[0] == 3
+
+    y_pred_batched_simulated = quantized_model.forward(numpy_input[:5], fhe="simulate")
+    assert numpy.array_equal(y_pred_per_example, y_pred_batched_simulated)
+
+    y_pred_batched_executed = quantized_model.forward(numpy_input[:5], fhe="execute")
+    assert numpy.array_equal(y_pred_per_example, y_pred_batched_executed)
+
+
+def test_batched_simulation_invalid_batch_size(default_configuration):
+    """Check that an invalid simulation batch size raises an error."""
+
+    torch_fc_model = FC(activation_function=nn.ReLU)
+    numpy_input = numpy.random.uniform(size=(10, 32 * 32 * 3))
+
+    quantized_model = compile_torch_model(
+        torch_fc_model,
+        torch.from_numpy(numpy_input).float(),
+        False,
+        default_configuration,
+        n_bits=2,
+        rounding_threshold_bits=6,
+    )
+
+    with pytest.raises(ValueError, match="simulation_batch_size must be a strictly positive"):
+        quantized_model.compile(numpy_input, default_configuration, simulation_batch_size=0)
+
+    with pytest.raises(ValueError, match="batch_size must be a strictly positive"):
+        quantized_model.compile(numpy_input, default_configuration, batch_size=-1)
+
+
+def test_clear_forward_plan():
+    """Check that the clear forward plan is re-used and re-built when the module changes."""
+
+    torch_fc_model = FC(activation_function=nn.ReLU)
+    torch_fc_model.eval()
+
+    numpy_input = numpy.random.uniform(size=(100, 32 * 32 * 3))
+    numpy_fc_model = NumpyModule(torch_fc_model, torch.from_numpy(numpy_input).float())
+
+    post_training_quant = PostTrainingAffineQuantization(8, numpy_fc_model)
+    quantized_module = post_training_quant.quantize_module(numpy_input)
+
+    q_x = quantized_module.quantize_input(numpy_input)
+    q_x_before = q_x.copy()
+
+    q_y = quantized_module.quantized_forward(q_x, fhe="disable")
+    plan = quantized_module._clear_forward_plan
+    assert plan is not None
+
+    # The plan is re-used across calls, and the inputs are not modified
+    assert numpy.array_equal(quantized_module.quantized_forward(q_x, fhe="disable"), q_y)
+    assert quantized_module._clear_forward_plan is plan
+    assert numpy.array_equal(q_x, q_x_before)
+
+    # The plan is re-built if the input quantizers are replaced
+    quantized_module.set_inputs_quantization_parameters(*quantized_module.input_quantizers)
+    assert numpy.array_equal(quantized_module.quantized_forward(q_x, fhe="disable"), q_y)
+    assert quantized_module._clear_forward_plan is not plan
+
+    # The plan is re-built if the graph is replaced
+    plan = quantized_module._clear_forward_plan
+    quantized_module.quant_layers_dict = dict(quantized_module.quant_layers_dict)
+    assert numpy.array_equal(quantized_module.quantized_forward(q_x, fhe="disable"), q_y)
+    assert quantized_module._clear_forward_plan is not plan
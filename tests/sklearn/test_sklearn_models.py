@@ -60,6 +60,7 @@ from concrete.ml.pytest.utils import (
     get_sklearn_all_models_and_datasets,
     get_sklearn_linear_models_and_datasets,
     get_sklearn_neighbors_models_and_datasets,
+    get_sklearn_neural_net_models_and_datasets,
     get_sklearn_tree_models_and_datasets,
     instantiate_model_generic,
 )
@@ -2032,3 +2033,157 @@ def test_error_raise_unsupported_pandas_values(model_class, bad_value, expected_
 
     with pytest.raises(ValueError, match=expected_error):
         model.fit(x_train, y_train)
+
+
+@pytest.mark.parametrize(
+    "model_class, parameters",
+    get_sklearn_linear_models_and_datasets(unique_models=True, select="LogisticRegression")
+    + get_sklearn_tree_models_and_datasets(unique_models=True, select="DecisionTree"),
+)
+def test_predict_with_n_jobs(
+    model_class,
+    parameters,
+    load_data,
+    default_configuration,
+    is_weekly_option,
+    check_float_array_equal,
+):
+    """Test that executing rows in FHE using several processes gives the same predictions."""
+
+    n_bits = min(N_BITS_REGULAR_BUILDS)
+
+    model, x = preamble(model_class, parameters, n_bits, load_data, is_weekly_option)
+
+    model.compile(x, default_configuration)
+
+    # Use more samples than batches kept in flight by the two workers
+    fhe_test = get_random_samples(x, 6)
+
+    predict_method = (
+        model.predict_proba if is_classifier_or_partial_classifier(model) else model.predict
+    )
+
+    y_pred_sequential = predict_method(fhe_test, fhe="execute")
+    y_pred_parallel = predict_method(fhe_test, fhe="execute", n_jobs=2)
+
+    check_float_array_equal(y_pred_sequential, y_pred_parallel)
+
+
+@pytest.mark.parametrize("model_class, parameters", UNIQUE_MODELS_AND_DATASETS)
+def test_batched_simulation(
+    model_class,
+    parameters,
+    load_data,
+    default_configuration,
+    is_weekly_option,
+    check_float_array_equal,
+):
+    """Test that simulating batches of examples gives the same predictions as per-row simulation."""
+
+    n_bits = min(N_BITS_REGULAR_BUILDS)
+
+    model, x = preamble(model_class, parameters, n_bits, load_data, is_weekly_option)
+
+    # KNN's inference function only handles a single query at a time
+    if get_model_name(model_class) == "KNeighborsClassifier":
+        with pytest.raises(NotImplementedError, match="Simulating batches of examples"):
+            model.compile(x, default_configuration, simulation_batch_size=4)
+        return
+
+    # Use a very small p_error so that both simulations are exact
+    model.compile(x, default_configuration, p_error=2**-40)
+    assert model.fhe_simulation_circuit is None
+
+    fhe_test = get_random_samples(x, 10)
+
+    predict_method = (
+        model.predict_proba if is_classifier_or_partial_classifier(model) else model.predict
+    )
+
+    y_pred_per_row = predict_method(fhe_test, fhe="simulate")
+
+    # Use a batch size that does not divide the number of samples in order to check the padding
+    model.compile(x, default_configuration, p_error=2**-40, simulation_batch_size=4)
+    assert model.fhe_simulation_circuit is not None
+
+    y_pred_batched = predict_method(fhe_test, fhe="simulate")
+
+    check_float_array_equal(y_pred_per_row, y_pred_batched)
+
+
+@pytest.mark.parametrize(
+    "model_class, parameters",
+    get_sklearn_linear_models_and_datasets(unique_models=True, select="LogisticRegression")
+    + get_sklearn_tree_models_and_datasets(unique_models=True, select="DecisionTree")
+    + get_sklearn_neural_net_models_and_datasets(unique_models=True),
+)
+def test_batched_execution(
+    model_class,
+    parameters,
+    load_data,
+    default_configuration,
+    is_weekly_option,
+    check_float_array_equal,
+):
+    """Test that circuits compiled for batches of examples give the same predictions."""
+
+    n_bits = min(N_BITS_REGULAR_BUILDS)
+
+    model, x = preamble(model_class, parameters, n_bits, load_data, is_weekly_option)
+
+    # Use a very small p_error so that FHE executions are exact
+    model.compile(x, default_configuration, p_error=2**-40)
+
+    fhe_test = get_random_samples(x, 5)
+
+    predict_method = (
+        model.predict_proba if is_classifier_or_partial_classifier(model) else model.predict
+    )
+
+    y_pred_per_row = predict_method(fhe_test, fhe="simulate")
+
+    # Use a batch size that does not divide the number of samples in order to check the padding
+    model.compile(x, default_configuration, p_error=2**-40, batch_size=3)
+    assert model.fhe_circuit.graph.ordered_inputs()[0].output.shape[0] == 3
+
+    y_pred_batched_simulated = predict_method(fhe_test, fhe="simulate")
+    check_float_array_equal(y_pred_per_row, y_pred_batched_simulated)
+
+    y_pred_batched_executed = predict_method(fhe_test, fhe="execute")
+    check_float_array_equal(y_pred_per_row, y_pred_batched_executed)
+
+
+@pytest.mark.parametrize(
+    "model_class, parameters",
+    get_sklearn_linear_models_and_datasets(unique_models=True, select="LogisticRegression")
+    + get_sklearn_linear_models_and_datasets(unique_models=True, select="LinearRegression")
+    + get_sklearn_tree_models_and_datasets(unique_models=True, select="DecisionTree"),
+)
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_predict_iter(
+    model_class,
+    parameters,
+    chunk_size,
+    load_data,
+    is_weekly_option,
+    check_float_array_equal,
+):
+    """Test that predicting chunk by chunk gives the same predictions as predicting at once."""
+
+    n_bits = min(N_BITS_REGULAR_BUILDS)
+
+    model, x = preamble(model_class, parameters, n_bits, load_data, is_weekly_option)
+
+    y_pred = model.predict(x)
+    y_pred_iter = numpy.concatenate(list(model.predict_iter(x, chunk_size=chunk_size)))
+    check_float_array_equal(y_pred, y_pred_iter)
+
+    # Predictions can also be made over an iterator of data-frames
+    x_dataframes = (pandas.DataFrame(x[start : start + 15]) for start in range(0, len(x), 15))
+    y_pred_iter = numpy.concatenate(list(model.predict_iter(x_dataframes, chunk_size=chunk_size)))
+    check_float_array_equal(y_pred, y_pred_iter)
+
+    if is_classifier_or_partial_classifier(model):
+        y_proba = model.predict_proba(x)
+        y_proba_iter = numpy.concatenate(list(model.predict_proba_iter(x, chunk_size=chunk_size)))
+        check_float_array_equal(y_proba, y_proba_iter)
@@ -1,17 +1,30 @@
 """Tests for the hybrid model converter."""
 
+import json
 import tempfile
+import threading
 from pathlib import Path
 from typing import List, Union
 
+import numpy
 import pytest
 import torch
 from concrete.fhe import Configuration
 from transformers import GPT2LMHeadModel, GPT2Tokenizer
 
-from concrete.ml.pytest.torch_models import PartialQATModel
+from concrete.ml.deployment import FHEModelClient
+from concrete.ml.deployment.fhe_client_server import (
+    iter_chunks,
+    join_chunks,
+    pack_payloads,
+    unpack_payloads,
+)
+from concrete.ml.pytest.torch_models import PartialQATModel, TwinBranchesModel
 from concrete.ml.torch.hybrid_model import (
+    CalibrationReservoir,
     HybridFHEModel,
+    HybridFHEModelServer,
+    LRUCache,
     tuple_to_underscore_str,
     underscore_str_to_tuple,
 )
@@ -145,6 +158,379 @@ def test_hybrid_brevitas_qat_model():
     hybrid_model.compile_model(x=inputs)
 
 
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_hybrid_compile_identical_modules(n_jobs):
+    """Test that identical modules are compiled once, possibly in parallel."""
+
+    inputs = torch.randn((100, 8))
+    model = TwinBranchesModel(input_shape=8, output_shape=2)
+
+    hybrid_model = HybridFHEModel(model, module_names=["branch_1", "branch_2", "fc"])
+    hybrid_model.compile_model(x=inputs, n_bits=6, n_jobs=n_jobs)
+
+    # The identical branches share the same compiled module
+    assert hybrid_model.private_q_modules["branch_1"] is hybrid_model.private_q_modules["branch_2"]
+    assert hybrid_model.private_q_modules["branch_1"] is not hybrid_model.private_q_modules["fc"]
+
+    output_simulate = hybrid_model(inputs, fhe="simulate")
+    assert output_simulate.shape == (100, 2)
+
+
+def test_calibration_reservoir():
+    """Test that the calibration reservoir keeps a bounded sample with the same range."""
+
+    reservoir = CalibrationReservoir(size=50, seed=0)
+
+    with pytest.raises(ValueError, match="No calibration data was gathered"):
+        reservoir.get_data()
+
+    batches = [torch.randn((100, 3, 4)) for _ in range(10)]
+    for batch in batches:
+        reservoir.update(batch)
+
+    all_examples = torch.cat(batches, dim=0)
+    sample = reservoir.get_data()
+
+    # The sample also holds the examples with the smallest and largest values
+    assert reservoir.n_seen == 1000
+    assert sample.shape == (52, 3, 4)
+    assert sample.min() == all_examples.min()
+    assert sample.max() == all_examples.max()
+
+    with pytest.raises(ValueError, match="must be a strictly positive integer"):
+        CalibrationReservoir(size=0)
+
+
+def test_hybrid_streaming_calibration():
+    """Test compiling a hybrid model calibrated on batches with a bounded reservoir."""
+
+    inputs = torch.randn((200, 8))
+    model = TwinBranchesModel(input_shape=8, output_shape=2)
+
+    hybrid_model = HybridFHEModel(model, module_names="fc", calibration_reservoir_size=20)
+    hybrid_model.compile_model(x=iter(inputs.split(50)), n_bits=6)
+
+    reservoir = hybrid_model.remote_modules["fc"].calibration_reservoir
+    assert reservoir is not None
+    assert reservoir.n_seen == 200
+    assert not hybrid_model.remote_modules["fc"].calibration_data
+
+    output_simulate = hybrid_model(inputs, fhe="simulate")
+    assert output_simulate.shape == (200, 2)
+
+
+def test_hybrid_shape_buckets():
+    """Test compiling a hybrid model for a few sequence lengths, padding the inputs to them."""
+
+    model = torch.nn.Sequential(torch.nn.Linear(4, 8), torch.nn.ReLU(), torch.nn.Linear(8, 2))
+    hybrid_model = HybridFHEModel(model, module_names="0", shape_buckets=[4, 8])
+
+    # Calibrate on sequences of various lengths
+    hybrid_model.compile_model(
+        x=[torch.randn((20, length, 4)) for length in [3, 6, 8]],
+        n_bits=6,
+    )
+    assert sorted(hybrid_model.private_q_bucket_modules["0"]) == [4, 8]
+
+    # Sequences of any length up to the largest bucket are supported
+    for length in [1, 5, 8]:
+        inputs = torch.randn((3, length, 4))
+        output_simulate = hybrid_model(inputs, fhe="simulate")
+        output_disable = hybrid_model(inputs, fhe="disable")
+
+        assert output_simulate.shape == output_disable.shape == (3, length, 2)
+
+        # The padding doesn't change the results beyond the quantization error
+        tolerance = 0.1 * (output_disable.max() - output_disable.min()).item()
+        assert torch.allclose(output_simulate, output_disable, atol=tolerance)
+
+    with pytest.raises(ValueError, match="No shape bucket fits size 9"):
+        hybrid_model(torch.randn((1, 9, 4)), fhe="simulate")
+
+    with pytest.raises(ValueError, match="No shape bucket fits size 9"):
+        hybrid_model(torch.randn((1, 9, 4)), fhe="calibrate")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir_path = Path(temp_dir)
+        hybrid_model.save_and_clear_private_info(temp_dir_path)
+
+        # A circuit is saved for each bucket
+        assert sorted(path.name for path in (temp_dir_path / "0").iterdir()) == [
+            "po_1_4_4_pc",
+            "po_1_8_4_pc",
+        ]
+
+    with pytest.raises(ValueError, match="Shape buckets must be a non-empty list"):
+        HybridFHEModel(torch.nn.Sequential(torch.nn.Linear(4, 2)), "0", shape_buckets=[])
+
+
+def test_lru_cache():
+    """Test that the LRU cache is bounded by its number of entries and their size."""
+
+    cache = LRUCache(max_size=2, max_memory=10)
+
+    cache.put("a", 1, 4)
+    cache.put("b", 2, 4)
+    assert cache.get("a") == 1
+
+    # "b" is the least recently used entry, so it is evicted first
+    cache.put("c", 3, 4)
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.get_metrics() == {
+        "entries": 2,
+        "memory": 8,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 1,
+    }
+
+    # Replacing an entry updates its size, evicting "a" to stay within the memory bound
+    cache.put("c", 4, 7)
+    assert "a" not in cache
+    assert cache.get("c") == 4
+    assert cache.get_metrics()["memory"] == 7
+
+    # An entry larger than the memory bound on its own is not cached, and replaces the cached one
+    cache.put("d", 5, 11)
+    cache.put("c", 6, 11)
+    assert cache.get_metrics() == {
+        "entries": 0,
+        "memory": 0,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 3,
+    }
+
+    cache.put("e", 7, 3)
+    cache.pop("e")
+    cache.pop("e")
+    assert cache.get_metrics()["entries"] == cache.get_metrics()["memory"] == 0
+
+    with pytest.raises(ValueError, match="maximum size of the cache must be strictly positive"):
+        LRUCache(max_size=0)
+
+    with pytest.raises(ValueError, match="maximum memory of the cache must be strictly positive"):
+        LRUCache(max_memory=0)
+
+
+@pytest.fixture
+def hybrid_model_dir(tmp_path):
+    """Save a small hybrid model, as expected by the hybrid model server.
+
+    Returns:
+        Path: the directory holding the model, saved in its "model" sub-directory
+    """
+
+    model = torch.nn.Sequential(torch.nn.Linear(4, 8), torch.nn.ReLU(), torch.nn.Linear(8, 2))
+    hybrid_model = HybridFHEModel(model, module_names="0")
+    hybrid_model.compile_model(x=torch.randn((100, 4)), n_bits=6)
+
+    model_dir = tmp_path / "models"
+    hybrid_model.save_and_clear_private_info(model_dir / "model")
+    return model_dir
+
+
+def test_hybrid_server_evaluation_keys(hybrid_model_dir, tmp_path):
+    """Test that the hybrid model server reuses the deserialized keys across computations."""
+
+    input_shape = str((1, 4))
+    client = FHEModelClient(
+        str(hybrid_model_dir / "model" / "0" / tuple_to_underscore_str((1, 4))),
+        key_dir=str(tmp_path / "client_keys"),
+    )
+    client.generate_private_and_evaluation_keys()
+    key = client.get_serialized_evaluation_keys()
+
+    server = HybridFHEModelServer(tmp_path / "keys", hybrid_model_dir, logger=None)
+    uid = server.add_key(key, "model", "0", input_shape)["uid"]
+
+    evaluation_keys = server.get_evaluation_keys(uid, "model", "0", input_shape)
+    assert server.get_evaluation_keys(uid, "model", "0", input_shape) is evaluation_keys
+
+    metrics = server.get_cache_metrics()["evaluation_keys"]
+    assert metrics["entries"] == 1
+    assert metrics["hits"] == 2
+    assert metrics["memory"] == len(key)
+
+    # Keys too large for the caches are loaded back from the key path for each computation
+    server = HybridFHEModelServer(
+        tmp_path / "keys",
+        hybrid_model_dir,
+        logger=None,
+        key_cache_memory=len(key) - 1,
+        evaluation_keys_cache_memory=len(key) - 1,
+    )
+    assert server.get_evaluation_keys(uid, "model", "0", input_shape) is not None
+
+    cache_metrics = server.get_cache_metrics()
+    assert cache_metrics["keys"]["entries"] == cache_metrics["evaluation_keys"]["entries"] == 0
+
+    x = numpy.random.randn(1, 4)
+    result = server.compute(client.quantize_encrypt_serialize(x), uid, "model", "0", input_shape)
+    assert client.deserialize_decrypt_dequantize(result).shape == (1, 8)
+
+
+def test_hybrid_server_warm_up(hybrid_model_dir, tmp_path):
+    """Test loading the hybrid model server's circuits before they are first used."""
+
+    input_shape = str((1, 4))
+    server = HybridFHEModelServer(tmp_path / "keys", hybrid_model_dir, logger=None)
+    assert server.ready
+
+    assert server.preload_circuits([{"model_name": "model", "module_name": "0"}]) == 1
+    assert server.get_cache_metrics()["circuits"]["entries"] == 1
+
+    server = HybridFHEModelServer(tmp_path / "keys", hybrid_model_dir, logger=None)
+    server.warm_up().result()
+    assert server.ready
+    assert server.get_cache_metrics()["circuits"]["entries"] == 1
+
+    server.warm_up([{"model_name": "model", "module_name": "0", "input_shape": input_shape}])
+    server.warm_up([{"model_name": "unknown"}]).exception()
+    with pytest.raises(ValueError, match="'unknown' does not match any known name"):
+        assert server.ready
+
+
+def test_hybrid_server_key_deserialization(hybrid_model_dir, tmp_path, monkeypatch):
+    """Test that added keys are deserialized in the background, even during a warm-up."""
+
+    input_shape = str((1, 4))
+    client = FHEModelClient(
+        str(hybrid_model_dir / "model" / "0" / tuple_to_underscore_str((1, 4))),
+        key_dir=str(tmp_path / "client_keys"),
+    )
+    client.generate_private_and_evaluation_keys()
+
+    server = HybridFHEModelServer(tmp_path / "keys", hybrid_model_dir, logger=None)
+
+    # Keep all the warm-up threads busy
+    release_warm_up = threading.Event()
+    monkeypatch.setattr(server, "preload_circuits", lambda manifest: release_warm_up.wait())
+    warm_ups = [server.warm_up() for _ in range(4)]
+
+    try:
+        assert not server.ready
+
+        uid = server.add_key(client.get_serialized_evaluation_keys(), "model", "0", input_shape)[
+            "uid"
+        ]
+
+        # The key is deserialized before the first computation, which then doesn't miss it
+        # pylint: disable-next=protected-access
+        server._evaluation_keys.get((uid, "model", "0", input_shape)).result(timeout=60)
+
+        x = numpy.random.randn(1, 4)
+        result = server.compute(
+            client.quantize_encrypt_serialize(x), uid, "model", "0", input_shape
+        )
+        assert client.deserialize_decrypt_dequantize(result).shape == (1, 8)
+        assert server.get_cache_metrics()["evaluation_keys"]["misses"] == 0
+    finally:
+        release_warm_up.set()
+
+    for warm_up in warm_ups:
+        warm_up.result()
+    assert server.ready
+
+
+class InProcessResponse:
+    """Response of an in-process session, with the attributes used by the remote modules."""
+
+    def __init__(self, content: bytes):
+        self.status_code = 200
+        self.content = content
+
+    def json(self):
+        """Decode the response's JSON content."""
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size):
+        """Split the response's content in chunks."""
+        return iter_chunks(self.content, chunk_size)
+
+
+class InProcessSession:
+    """Session handling the remote modules' requests with a hybrid model server, in-process.
+
+    The requests are handled as by the routes of the hybrid model example's server.
+    """
+
+    def __init__(self, server: HybridFHEModelServer):
+        self.server = server
+        self.routes: List[str] = []
+
+    def get(self, url, data):
+        """Handle a GET request."""
+        route = url.rsplit("/", 1)[-1]
+        self.routes.append(route)
+
+        if route == "list_shapes":
+            shapes = self.server.list_shapes(data["model_name"], data["module_name"])
+            return InProcessResponse(json.dumps(list(shapes)).encode())
+
+        assert route == "get_client"
+        path_to_client = self.server.get_client(
+            data["model_name"], data["module_name"], data["input_shape"]
+        )
+        return InProcessResponse(path_to_client.read_bytes())
+
+    def post(self, url, params, data, stream=False):
+        """Handle a POST request, whose body is sent in chunks."""
+        del stream
+        route = url.rsplit("/", 1)[-1]
+        self.routes.append(route)
+        body = join_chunks(data)
+
+        if route == "add_key_stream":
+            return InProcessResponse(json.dumps(self.server.add_key(body, **params)).encode())
+
+        if route == "compute_stream":
+            return InProcessResponse(self.server.compute(body, **params))
+
+        assert route == "compute_batch"
+        return InProcessResponse(
+            pack_payloads(self.server.compute_batch(unpack_payloads(body), **params))
+        )
+
+
+@pytest.mark.parametrize("batch_remote_calls", [False, True])
+def test_hybrid_remote_calls(batch_remote_calls, tmp_path):
+    """Test running a hybrid model with its private module computed by the hybrid model server."""
+
+    model = torch.nn.Sequential(torch.nn.Linear(4, 8), torch.nn.ReLU(), torch.nn.Linear(8, 2))
+    hybrid_model = HybridFHEModel(
+        model,
+        module_names="0",
+        server_remote_address="http://localhost",
+        max_concurrent_requests=2,
+        batch_remote_calls=batch_remote_calls,
+    )
+    hybrid_model.compile_model(x=torch.randn((100, 4)), n_bits=6)
+
+    inputs = torch.randn((5, 4))
+    output_simulate = hybrid_model(inputs, fhe="simulate")
+
+    model_dir = tmp_path / "models"
+    hybrid_model.save_and_clear_private_info(model_dir / "model")
+    server = HybridFHEModelServer(tmp_path / "server_keys", model_dir, logger=None)
+
+    session = InProcessSession(server)
+    # pylint: disable-next=protected-access
+    hybrid_model.remote_modules["0"]._session = session
+    hybrid_model.init_client(tmp_path / "clients", tmp_path / "client_keys")
+
+    output_remote = hybrid_model(inputs, fhe="remote")
+    assert torch.allclose(output_remote, output_simulate, atol=1e-5)
+
+    # The rows of the batch are either sent together or in a request each
+    compute_routes = ["compute_batch"] if batch_remote_calls else ["compute_stream"] * 5
+    assert session.routes == ["list_shapes", "get_client", "add_key_stream"] + compute_routes
+
+    # All the rows use the key deserialized when it was added
+    assert server.get_cache_metrics()["evaluation_keys"]["misses"] == 0
+
+
 def test_gpt2_hybrid_mlp_module_not_found():
     """Test GPT2 hybrid."""
 
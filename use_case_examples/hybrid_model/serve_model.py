@@ -1,14 +1,27 @@
 """Hybrid Model Deployment Server.
 
 Routes:
+    - Check readiness
+    - Get cache metrics
     - Get all names
     - Get client.zip
     - Add a key
     - Compute
+
+Keys and encrypted inputs can also be streamed as raw request bodies to /add_key_stream and
+/compute_stream, the other fields then being given as query parameters. Several inputs using the
+same key can be sent together to /compute_batch, packed using `pack_payloads`. Results are
+compressed with the first available codec listed in the X-Accept-Compression header, if any.
+
+The circuits listed in the JSON manifest given with --warm-manifest are loaded in the background at
+startup. Each entry gives a "model_name" and optionally a "module_name" and an "input_shape", all
+the matching circuits being loaded. The /ready route answers with a 503 status until they are
+loaded, so that it can be used as a readiness probe.
 """
 
 import argparse
 import io
+import json
 import time
 import uuid
 from collections import defaultdict
@@ -17,12 +30,14 @@ from pathlib import Path
 from typing import Generator, Optional, Tuple, Union
 
 import uvicorn
-from fastapi import FastAPI, Form, HTTPException, UploadFile
+from fastapi import FastAPI, Form, HTTPException, Request, UploadFile
 from fastapi.responses import FileResponse, StreamingResponse
 from loguru import logger
 
 # No relative import here because when not used in the package itself
 from concrete.ml.deployment import FHEModelServer
+from concrete.ml.deployment.compression import ACCEPT_COMPRESSION_HEADER, negotiate_compression
+from concrete.ml.deployment.fhe_client_server import pack_payloads, unpack_payloads
 from concrete.ml.torch.hybrid_model import HybridFHEModelServer, underscore_str_to_tuple
 
 if __name__ == "__main__":
@@ -42,6 +57,13 @@ if __name__ == "__main__":
         type=Path,
         default=FILE_FOLDER / Path("user_keys"),
     )
+    parser.add_argument(
+        "--warm-manifest",
+        dest="warm_manifest",
+        type=Path,
+        default=None,
+        help="JSON file listing the circuits to load at startup",
+    )
     args = parser.parse_args()
     app = FastAPI(debug=False)
     # Model-name -> Module-Name -> Input-shape
@@ -49,6 +71,9 @@ if __name__ == "__main__":
         key_path=args.path_to_keys, model_dir=args.path_to_models, logger=logger
     )
 
+    if args.warm_manifest is not None:
+        server.warm_up(json.loads(args.warm_manifest.read_text(encoding="utf-8")))
+
     PORT = args.port
 
     def check_inputs(
@@ -75,6 +100,32 @@ if __name__ == "__main__":
                 f"{list(server.modules[model_name][module_name].keys())}",
             )
 
+    @app.get("/ready")
+    def ready():
+        """Check whether the circuits listed in the warm-up manifest are loaded.
+
+        Returns:
+            Dict[str, bool]
+                - ready: whether the server is ready
+
+        Raises:
+            HTTPException: if the circuits are still being loaded
+        """
+        if not server.ready:
+            raise HTTPException(status_code=503, detail="The server is warming up.")
+        return {"ready": True}
+
+    @app.get("/metrics")
+    def metrics():
+        """Get the metrics of the server's circuits and keys caches.
+
+        Returns:
+            Dict[str, Dict[str, int]]
+                - circuits, keys, evaluation_keys: the entries, memory, hits, misses and evictions
+                    of each cache
+        """
+        return server.get_cache_metrics()
+
     @app.get("/list_models")
     def list_models():
         return server.modules
@@ -123,6 +174,39 @@ if __name__ == "__main__":
         check_inputs(server, model_name, module_name, input_shape)
         return server.add_key(await key.read(), model_name, module_name, input_shape)
 
+    async def read_stream(request: Request) -> bytes:
+        """Read a request body sent in chunks.
+
+        The chunks are kept in memory until they are joined, so the peak memory is about twice the
+        size of the body.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            bytes: The request body.
+        """
+        return b"".join([chunk async for chunk in request.stream()])
+
+    @app.post("/add_key_stream")
+    async def add_key_stream(
+        request: Request,
+        model_name: str,
+        module_name: str,
+        input_shape: str,
+    ):
+        """Add public key, sent as the raw request body.
+
+        Arguments:
+            request (Request): the request, whose body is the public key
+
+        Returns:
+            Dict[str, str]
+                - uid: uid a personal uid
+        """
+        check_inputs(server, model_name, module_name, input_shape)
+        return server.add_key(await read_stream(request), model_name, module_name, input_shape)
+
     def stream_response(
         encrypted_results: bytes, chunk_size: int = 1024 * 1024
     ) -> Generator[bytes, None, None]:
@@ -142,6 +226,7 @@ if __name__ == "__main__":
 
     @app.post("/compute")
     async def compute(
+        request: Request,
         model_input: UploadFile,
         uid: str = Form(),
         model_name: str = Form(),
@@ -152,6 +237,7 @@ if __name__ == "__main__":
         Computes the circuit over encrypted input.
 
         Args:
+            request (Request): The request.
             model_input (UploadFile): Input of the circuit.
             uid (str): The UID of the public key to use for computations.
             model_name (str): The name of the model to be used.
@@ -174,7 +260,80 @@ if __name__ == "__main__":
             model_name,
             module_name,
             input_shape,
+            negotiate_compression(request.headers.get(ACCEPT_COMPRESSION_HEADER)),
+        )
+        return StreamingResponse(stream_response(encrypted_results))
+
+    @app.post("/compute_stream")
+    async def compute_stream(
+        request: Request,
+        uid: str,
+        model_name: str,
+        module_name: str,
+        input_shape: str,
+    ):
+        """
+        Computes the circuit over encrypted input, sent as the raw request body.
+
+        Args:
+            request (Request): The request, whose body is the input of the circuit.
+            uid (str): The UID of the public key to use for computations.
+            model_name (str): The name of the model to be used.
+            module_name (str): The name of the module containing the computation circuit.
+            input_shape (str): The shape of the input data.
+
+        Returns:
+            StreamingResponse: The result of the computation, streamed back in chunks.
+        """
+        check_inputs(server, model_name, module_name, input_shape)
+        encrypted_results = server.compute(
+            await read_stream(request),
+            uid,
+            model_name,
+            module_name,
+            input_shape,
+            negotiate_compression(request.headers.get(ACCEPT_COMPRESSION_HEADER)),
         )
         return StreamingResponse(stream_response(encrypted_results))
 
+    @app.post("/compute_batch")
+    async def compute_batch(
+        request: Request,
+        uid: str,
+        model_name: str,
+        module_name: str,
+        input_shape: str,
+    ):
+        """
+        Computes the circuit over several encrypted inputs, sent packed as the raw request body.
+
+        Args:
+            request (Request): The request, whose body is the packed inputs of the circuit.
+            uid (str): The UID of the public key to use for computations.
+            model_name (str): The name of the model to be used.
+            module_name (str): The name of the module containing the computation circuit.
+            input_shape (str): The shape of the input data.
+
+        Returns:
+            StreamingResponse: The packed results of the computation, streamed back in chunks.
+
+        Raises:
+            HTTPException: if the packed inputs are truncated
+        """
+        check_inputs(server, model_name, module_name, input_shape)
+        try:
+            model_inputs = unpack_payloads(await read_stream(request))
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error)) from error
+
+        encrypted_results = server.compute_batch(
+            model_inputs,
+            uid,
+            model_name,
+            module_name,
+            input_shape,
+            negotiate_compression(request.headers.get(ACCEPT_COMPRESSION_HEADER)),
+        )
+        return StreamingResponse(stream_response(pack_payloads(encrypted_results)))
+
     uvicorn.run(app, host="0.0.0.0", port=int(PORT))